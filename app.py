@@ -5,9 +5,15 @@ Streamlit ile oluşturulmuş araba sorunları uzmanı ChatBot arayüzü.
 
 import streamlit as st
 import os
+import re
+import time
+import uuid
 from gemini_client import CarExpertChatBot
-from document_processor import DocumentProcessor, SimpleDocumentStore
-from datetime import datetime
+from intent_classifier import get_shared_intent_model
+from ingest_queue import IngestQueue
+from tenant_collections import CollectionManager, DEFAULT_COLLECTION
+from conversation_store import SQLiteConversationStore
+from document_processor import format_context
 
 # Sayfa yapılandırması
 st.set_page_config(
@@ -33,6 +39,14 @@ MODEL_MAP = {
     "ChatGPT": "gpt-4o"
 }
 
+# Sidebar'da bir seferde listelenen sohbet sayısı
+CHAT_PAGE_SIZE = 20
+
+# Sohbet ekranında bir seferde gösterilen mesaj sayısı (eskiler istenince yüklenir)
+MESSAGE_PAGE_SIZE = 30
+# Önbellekte tutulan en fazla mesaj HTML'i
+MESSAGE_HTML_CACHE_SIZE = 1000
+
 # Özel CSS stilleri
 st.markdown("""
 <style>
@@ -253,10 +267,124 @@ st.markdown("""
     .new-chat-btn {
         background: linear-gradient(135deg, #2ed573 0%, #26de81 100%) !important;
     }
+    
+    .doc-context {
+        background: rgba(255, 255, 255, 0.03);
+        border-left: 3px solid #667eea;
+        border-radius: 0 12px 12px 0;
+        padding: 12px 18px;
+        margin: 0 0 15px auto;
+        max-width: 75%;
+        color: #c0c0d0;
+        font-size: 0.85rem;
+        line-height: 1.5;
+    }
 </style>
 """, unsafe_allow_html=True)
 
 
+# Çok süreçli dağıtımda (python shared_index.py --workers N) doküman indeksi
+# koordinatörün yayınladığı paylaşımlı nesilden okunur
+SHARED_INDEX_DIR = os.getenv("SHARED_INDEX_DIR")
+
+
+@st.cache_resource
+def get_shared_index():
+    """Süreçteki tüm oturumların kullandığı paylaşımlı indeks"""
+    from shared_index import get_shared_index as load_shared_index
+    return load_shared_index(SHARED_INDEX_DIR)
+
+
+@st.cache_resource
+def get_collections():
+    """Tüm oturumların paylaştığı doküman koleksiyonları (her biri ilk sorguda yüklenir)"""
+    # Paylaşımlı indekste işçi kendi intent modelini eğitmez; neslin belleğe eşlenmiş modeli kullanılır
+    if SHARED_INDEX_DIR:
+        return CollectionManager(intent_classifier=get_shared_index().intent_model)
+    return CollectionManager(intent_classifier=get_shared_intent_model())
+
+
+# Ayarlanırsa sohbetler anonimleştirilip bu dosyaya kaydedilir
+# (python replay_load.py --input <dosya> ile yük testi olarak yeniden oynatılır)
+CONVERSATION_RECORD_FILE = os.getenv("CONVERSATION_RECORD_FILE")
+
+
+@st.cache_resource
+def get_conversation_recorder():
+    """Tüm oturumların paylaştığı sohbet kaydedici"""
+    from replay_load import ConversationRecorder
+    return ConversationRecorder(CONVERSATION_RECORD_FILE)
+
+
+@st.cache_resource
+def get_shared_ingest_queue():
+    """Paylaşımlı indekste dosyalar sadece diske yazılır, indeksi koordinatör günceller"""
+    return IngestQueue(None, "documents")
+
+
+def uses_shared_index() -> bool:
+    """Seçili koleksiyon koordinatörün yayınladığı paylaşımlı indeksten mi okunuyor"""
+    return bool(SHARED_INDEX_DIR) and st.session_state.collection == DEFAULT_COLLECTION
+
+
+def get_document_store():
+    """Sohbette seçili koleksiyonun doküman deposu (tüm oturumlarda ortak)"""
+    if uses_shared_index():
+        return get_shared_index().store
+    return get_collections().get(st.session_state.collection)
+
+
+def get_ingest_queue():
+    """Seçili koleksiyona doküman yükleme işlerini arka planda çalıştıran kuyruk"""
+    if uses_shared_index():
+        return get_shared_ingest_queue()
+    return get_collections().get_ingest_queue(st.session_state.collection)
+
+
+def get_index_version():
+    """Seçili koleksiyonun indeks sürümü (değiştiğinde DTC indeksi yeniden eşitlenir)"""
+    if uses_shared_index():
+        return (DEFAULT_COLLECTION, get_shared_index().generation)
+    store = get_document_store()
+    # Bellekten çıkarılıp yeniden yüklenen koleksiyon yeni bir depodur
+    return (st.session_state.collection, id(store), store.version)
+
+
+def set_collection(collection: str):
+    """Sohbette aranan koleksiyonu değiştirir (kayıtlı sohbete de yazılır)"""
+    st.session_state.collection = collection
+    chat_id = st.session_state.current_chat_id
+    if chat_id:
+        st.session_state.chat_store.set_chat_collection(chat_id, collection,
+                                                        owner=st.session_state.owner_id)
+
+
+@st.cache_resource
+def get_conversation_store():
+    """Kalıcı sohbet deposu (bağlantı ortak; her oturum sadece kendi sohbetlerini görür)"""
+    return SQLiteConversationStore("chat_history.db")
+
+
+def new_chat_id():
+    """Oturumlar arasında çakışmayan sohbet kimliği"""
+    return uuid.uuid4().hex
+
+
+def get_owner_id():
+    """
+    Oturumun sohbet sahibi kimliği. Tarayıcı yenilendiğinde geçmiş kaybolmasın
+    diye URL'de (?owner=) tutulur; kimlik tahmin edilemez (uuid4)
+    """
+    if hasattr(st, "query_params"):
+        owner = st.query_params.get("owner")
+        if owner and re.fullmatch(r"[0-9a-f]{32}", owner):
+            return owner
+        owner = uuid.uuid4().hex
+        st.query_params["owner"] = owner
+        return owner
+    return uuid.uuid4().hex
+
+
 def initialize_session_state():
     """Session state'i başlatır"""
     if 'messages' not in st.session_state:
@@ -278,25 +406,66 @@ def initialize_session_state():
     if 'show_welcome' not in st.session_state:
         st.session_state.show_welcome = True
     
-    # Sohbet geçmişi için
-    if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []  # [{id, title, messages, date}]
+    # Sohbet geçmişi için (kalıcı depoda tutulur)
+    if 'owner_id' not in st.session_state:
+        st.session_state.owner_id = get_owner_id()
+    
+    if 'chat_store' not in st.session_state:
+        st.session_state.chat_store = get_conversation_store()
     
     if 'current_chat_id' not in st.session_state:
         st.session_state.current_chat_id = None
     
-    # Doküman işleme için
-    if 'doc_processor' not in st.session_state:
-        st.session_state.doc_processor = DocumentProcessor("documents")
+    # Mevcut sohbetin depoya yazılmış mesaj sayısı
+    if 'persisted_count' not in st.session_state:
+        st.session_state.persisted_count = 0
+    
+    # Sidebar'da listelenen sohbet sayısı
+    if 'chat_list_limit' not in st.session_state:
+        st.session_state.chat_list_limit = CHAT_PAGE_SIZE
+    
+    # Sohbet ekranında gösterilen son mesaj sayısı
+    if 'message_limit' not in st.session_state:
+        st.session_state.message_limit = MESSAGE_PAGE_SIZE
     
-    if 'doc_store' not in st.session_state:
-        st.session_state.doc_store = SimpleDocumentStore()
-        # İlk yüklemede dokümanları yükle
-        chunks = st.session_state.doc_processor.get_document_chunks()
-        st.session_state.doc_store.add_documents(chunks)
+    # Sohbette aranan doküman koleksiyonu (bayi / marka); depolar tüm oturumlarda
+    # ortak, yüklemeler arka plan kuyruğunda işlenir
+    if 'collection' not in st.session_state:
+        st.session_state.collection = DEFAULT_COLLECTION
+        st.session_state.index_version = None
+    elif st.session_state.collection not in get_collections().list_collections():
+        # Koleksiyon klasörü silinmiş
+        st.session_state.collection = DEFAULT_COLLECTION
+    
+    # Yüklenen dosyaların kimlikleri (widget her yeniden çalıştırmada aynı dosyaları döndürür)
+    if 'submitted_uploads' not in st.session_state:
+        st.session_state.submitted_uploads = set()
+    
+    # Depoya yeni dokümanlar eklendiyse DTC indeksini güncelle
+    index_version = get_index_version()
+    if st.session_state.index_version != index_version:
+        st.session_state.index_version = index_version
+        sync_dtc_index()
+
 
 
 
+def reload_documents() -> dict:
+    """Tüm dokümanları yeniden işleyen arka plan işi açar"""
+    if uses_shared_index():
+        # Yeniden işleme koordinatörün işi; sadece yayınlanan son nesil alınır
+        get_shared_index().refresh()
+        return {"status": "done", "chunks": len(get_document_store().documents)}
+    return get_ingest_queue().submit_reload()
+
+
+def sync_dtc_index():
+    """Dokümanlardaki arıza kodlarını chatbot'un DTC indeksine aktarır"""
+    chatbot = st.session_state.get('chatbot')
+    if chatbot and chatbot.dtc_index:
+        chatbot.dtc_index.clear_documents()
+        chatbot.dtc_index.add_documents(get_document_store().documents)
+
 
 def get_chat_title(messages):
     """Sohbetin ilk mesajından başlık oluşturur"""
@@ -307,37 +476,43 @@ def get_chat_title(messages):
 
 
 def save_current_chat():
-    """Mevcut sohbeti geçmişe kaydeder"""
-    if st.session_state.messages:
-        chat_data = {
-            "id": st.session_state.current_chat_id or datetime.now().strftime("%Y%m%d%H%M%S"),
-            "title": get_chat_title(st.session_state.messages),
-            "messages": st.session_state.messages.copy(),
-            "date": datetime.now().strftime("%d.%m.%Y %H:%M")
-        }
-        
-        # Eğer mevcut chat varsa güncelle, yoksa ekle
-        existing_idx = None
-        for i, chat in enumerate(st.session_state.chat_history):
-            if chat["id"] == chat_data["id"]:
-                existing_idx = i
-                break
-        
-        if existing_idx is not None:
-            st.session_state.chat_history[existing_idx] = chat_data
-        else:
-            st.session_state.chat_history.insert(0, chat_data)
+    """Mevcut sohbetin henüz kaydedilmemiş mesajlarını depoya ekler"""
+    messages = st.session_state.messages
+    if not messages:
+        return
+    
+    if st.session_state.current_chat_id is None:
+        st.session_state.current_chat_id = new_chat_id()
+    
+    store = st.session_state.chat_store
+    chat_id = st.session_state.current_chat_id
+    store.create_chat(chat_id, get_chat_title(messages), st.session_state.collection,
+                      owner=st.session_state.owner_id)
+    
+    new_messages = messages[st.session_state.persisted_count:]
+    if new_messages:
+        store.append_messages(chat_id, new_messages)
+        st.session_state.persisted_count = len(messages)
 
 
 def load_chat(chat_id):
-    """Geçmişten sohbet yükler"""
-    for chat in st.session_state.chat_history:
-        if chat["id"] == chat_id:
-            st.session_state.messages = chat["messages"].copy()
-            st.session_state.current_chat_id = chat_id
-            st.session_state.show_welcome = False
-            return True
-    return False
+    """Geçmişten sohbet yükler (mesajlar sadece açılan sohbet için okunur)"""
+    store = st.session_state.chat_store
+    chat = store.get_chat(chat_id, owner=st.session_state.owner_id)
+    if chat is None:
+        return False
+    
+    st.session_state.messages = store.get_messages(chat_id, owner=st.session_state.owner_id)
+    # Sohbetin koleksiyonu geri yüklenir (silinmişse varsayılan koleksiyon)
+    collection = chat.get("collection") or DEFAULT_COLLECTION
+    if collection not in get_collections().list_collections():
+        collection = DEFAULT_COLLECTION
+    st.session_state.collection = collection
+    st.session_state.persisted_count = len(st.session_state.messages)
+    st.session_state.current_chat_id = chat_id
+    st.session_state.show_welcome = False
+    st.session_state.message_limit = MESSAGE_PAGE_SIZE
+    return True
 
 
 def start_new_chat():
@@ -347,15 +522,19 @@ def start_new_chat():
     
     # Yeni sohbet
     st.session_state.messages = []
-    st.session_state.current_chat_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    st.session_state.persisted_count = 0
+    st.session_state.current_chat_id = new_chat_id()
     st.session_state.show_welcome = True
+    st.session_state.message_limit = MESSAGE_PAGE_SIZE
     st.session_state.chatbot.clear_history()
 
 
 def delete_chat(chat_id):
     """Sohbeti siler"""
-    st.session_state.chat_history = [c for c in st.session_state.chat_history if c["id"] != chat_id]
+    st.session_state.chat_store.delete_chat(chat_id, owner=st.session_state.owner_id)
     if st.session_state.current_chat_id == chat_id:
+        # Silinen sohbet yeniden kaydedilmesin
+        st.session_state.messages = []
         start_new_chat()
 
 
@@ -371,9 +550,11 @@ def render_sidebar():
         
         st.markdown("---")
         
-        # Sohbet geçmişi listesi
-        if st.session_state.chat_history:
-            for chat in st.session_state.chat_history:
+        # Sohbet geçmişi listesi (sayfalı, mesaj içerikleri yüklenmeden)
+        store = st.session_state.chat_store
+        chat_count = store.count_chats(owner=st.session_state.owner_id)
+        if chat_count:
+            for chat in store.list_chats(st.session_state.owner_id, 0, st.session_state.chat_list_limit):
                 col1, col2 = st.columns([4, 1])
                 
                 with col1:
@@ -392,6 +573,11 @@ def render_sidebar():
                         st.rerun()
                 
                 st.caption(f"📅 {chat['date']}")
+            
+            if chat_count > st.session_state.chat_list_limit:
+                if st.button("⬇️ Daha Fazla Göster", key="more_chats", use_container_width=True):
+                    st.session_state.chat_list_limit += CHAT_PAGE_SIZE
+                    st.rerun()
         else:
             st.markdown("""
             <div style="color: #666; text-align: center; padding: 20px;">
@@ -435,9 +621,33 @@ def render_sidebar():
                 except Exception as e:
                     st.error(f"Model yüklenirken hata: {e}")
 
+        # Yönlendirme metrikleri (şablon / hızlı model / seçili model)
+        if st.session_state.get('chatbot'):
+            with st.expander("📈 Yanıt Yolları"):
+                route_names = {"template": "Şablon", "fast": "Hızlı model", "full": "Seçili model",
+                               "dtc": "Arıza kodu tablosu", "reject": "Kapsam dışı (yerel)"}
+                for route, stats in st.session_state.chatbot.router.get_metrics().items():
+                    st.caption(
+                        f"{route_names.get(route, route)}: {stats['count']} yanıt "
+                        f"(%{stats['share'] * 100:.0f}) • ort. {stats['avg_latency_ms']:.0f} ms "
+                        f"• ~${stats['cost_usd']:.4f}"
+                    )
+
         # Doküman Yönetimi
         st.markdown('<div class="sidebar-title">📄 Dokümanlar</div>', unsafe_allow_html=True)
         
+        # Koleksiyon seçimi (sohbete kaydedilir; aramalar ve yüklemeler bu koleksiyona yapılır)
+        collection_options = get_collections().list_collections()
+        selected_collection = st.selectbox(
+            "Koleksiyon",
+            collection_options,
+            index=collection_options.index(st.session_state.collection),
+            help="Dokümanları aranacak bayi / marka koleksiyonu (collections/<ad>/ klasörleri)"
+        )
+        if selected_collection != st.session_state.collection:
+            set_collection(selected_collection)
+            st.rerun()
+        
         # Doküman yükleme
         uploaded_files = st.file_uploader(
             "Doküman Yükle",
@@ -447,85 +657,201 @@ def render_sidebar():
             key="doc_uploader"
         )
         
-        if uploaded_files:
-            for uploaded_file in uploaded_files:
-                file_path = os.path.join("documents", uploaded_file.name)
-                with open(file_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-            st.success(f"✅ {len(uploaded_files)} dosya yüklendi!")
-            # Dokümanları yeniden yükle
-            chunks = st.session_state.doc_processor.get_document_chunks()
-            st.session_state.doc_store.clear()
-            st.session_state.doc_store.add_documents(chunks)
-            st.rerun()
+        # Yeni dosyalar kuyruğa alınır; işlenmeleri sohbeti bekletmez
+        for uploaded_file in uploaded_files or []:
+            upload_id = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+            if upload_id in st.session_state.submitted_uploads:
+                continue
+            st.session_state.submitted_uploads.add(upload_id)
+            get_ingest_queue().submit(uploaded_file.name, bytes(uploaded_file.getbuffer()))
         
         # Dokümanları yenile butonu
         if st.button("🔄 Dokümanları Yenile", key="reload_docs", use_container_width=True):
-            chunks = st.session_state.doc_processor.get_document_chunks()
-            st.session_state.doc_store.clear()
-            st.session_state.doc_store.add_documents(chunks)
-            st.success(f"✅ {len(chunks)} parça yüklendi!")
-            st.rerun()
+            job = reload_documents()
+            if job["status"] == "done":
+                st.success(f"✅ {job['chunks']} parça yüklendi!")
+        
+        # Yükleme işlerinin durumu (iş sürerken kendini yeniler)
+        if get_ingest_queue().pending_count() and render_ingest_jobs_live:
+            render_ingest_jobs_live()
+        else:
+            render_ingest_jobs()
         
         # Doküman istatistikleri
-        doc_count = len(st.session_state.doc_store.documents)
+        doc_count = len(get_document_store().documents)
         if doc_count > 0:
             st.caption(f"📊 {doc_count} doküman parçası yüklü")
+        cache = get_document_store().cache_stats()
+        if cache["hits"] + cache["misses"]:
+            st.caption(f"⚡ Arama önbelleği: %{cache['hit_rate'] * 100:.0f} isabet "
+                       f"({cache['size']}/{cache['max_size']} sorgu)")
+        if len(collection_options) > 1:
+            stats = get_collections().stats()
+            st.caption(f"🏷️ Bellekteki koleksiyonlar: {len(stats['loaded'])}/{len(collection_options)} "
+                       f"({stats['memory_mb']:.0f}/{stats['budget_mb']:.0f} MB)")
+        if uses_shared_index():
+            st.caption(f"🗂️ İndeks nesli: {get_shared_index().generation} "
+                       f"(yeni dokümanlar koordinatör tarafından işlenir)")
         
         st.markdown("---")
         
         # Tüm geçmişi temizle
-        if st.session_state.chat_history:
+        if chat_count:
             if st.button("🗑️ Tüm Geçmişi Temizle", key="clear_all", use_container_width=True):
-                st.session_state.chat_history = []
+                store.clear(owner=st.session_state.owner_id)
+                st.session_state.messages = []
                 start_new_chat()
                 st.rerun()
 
 
-def render_chat_message(role: str, content: str, intent: str = None, intent_score: float = None):
-    """Chat mesajını render eder"""
+# Yükleme işi durumları -> gösterim
+INGEST_STATUS_LABELS = {
+    "queued": "⏳ Sırada",
+    "running": "⚙️ İşleniyor",
+    "done": "✅ Eklendi",
+    "failed": "❌ Hata",
+    "duplicate": "♻️ Zaten yüklü",
+    "rejected": "🚫 Kuyruk dolu",
+}
+
+
+def render_ingest_jobs():
+    """Son doküman yükleme işlerinin durumunu gösterir"""
+    queue = get_ingest_queue()
+    for job in queue.get_jobs():
+        name = job["filename"] or "Tüm dokümanlar"
+        line = f"{INGEST_STATUS_LABELS.get(job['status'], job['status'])} • {name}"
+        if job["status"] == "done":
+            line += f" ({job['chunks']} parça)"
+        elif job["status"] == "duplicate":
+            line += f" ({job['duplicate_of']})"
+        elif job.get("error"):
+            line += f" ({job['error']})"
+        st.caption(line)
+    
+    pending = queue.pending_count()
+    if pending and render_ingest_jobs_live is None:
+        # st.fragment yoksa durum elle yenilenir
+        if st.button(f"🔄 Durumu Yenile ({pending} iş)", key="refresh_jobs", use_container_width=True):
+            st.rerun()
+
+
+def _refresh_ingest_jobs():
+    """Durum bölümünü yeniler; işler bitince sayfanın tamamı güncellenir"""
+    render_ingest_jobs()
+    if not get_ingest_queue().pending_count():
+        st.rerun()
+
+
+# Streamlit 1.37+: iş sürerken sadece durum bölümü periyodik olarak yeniden çalışır
+render_ingest_jobs_live = (
+    st.fragment(run_every=2)(_refresh_ingest_jobs) if hasattr(st, "fragment") else None
+)
+
+
+@st.cache_data(max_entries=MESSAGE_HTML_CACHE_SIZE, show_spinner=False)
+def build_message_html(role: str, content: str, intent_desc: str = None, intent_score: float = None) -> str:
+    """Mesajın HTML'ini üretir (aynı mesaj her yeniden çalıştırmada tekrar işlenmez)"""
     content_html = content.replace('\n', '<br>').replace('**', '<strong>').replace('*', '<em>')
     
     if role == "user":
-        st.markdown(f"""
+        return f"""
         <div class="user-message">
             <div class="user-label">👤 Siz</div>
             {content_html}
         </div>
-        """, unsafe_allow_html=True)
-    else:
-        # Intent badge oluştur
-        intent_badge = ""
-        if intent and intent_score and st.session_state.get('chatbot'):
-            intent_desc = st.session_state.chatbot.get_intent_description(intent)
-            intent_badge = f'<div style="font-size: 0.75rem; color: #888; margin-top: 10px; padding-top: 8px; border-top: 1px solid rgba(255,255,255,0.1);">📌 {intent_desc} ({intent_score:.0%}) <span style="color: #666; font-size: 0.7rem;">• Bu yüzde, sorunuzun bu kategoriye ait olma güvenini gösterir</span></div>'
-        
-        st.markdown(f"""
+        """
+    
+    # Intent badge oluştur
+    intent_badge = ""
+    if intent_desc:
+        intent_badge = f'<div style="font-size: 0.75rem; color: #888; margin-top: 10px; padding-top: 8px; border-top: 1px solid rgba(255,255,255,0.1);">📌 {intent_desc} ({intent_score:.0%}) <span style="color: #666; font-size: 0.7rem;">• Bu yüzde, sorunuzun bu kategoriye ait olma güvenini gösterir</span></div>'
+    
+    return f"""
         <div class="bot-message">
             <div class="bot-label">🚗 Araba Uzmanı</div>
             {content_html}
             {intent_badge}
         </div>
-        """, unsafe_allow_html=True)
+        """
 
 
-def send_message(message: str, doc_context: str = ""):
+def render_chat_message(role: str, content: str, intent: str = None, intent_score: float = None):
+    """Chat mesajını render eder"""
+    intent_desc = None
+    if role != "user" and intent and intent_score and st.session_state.get('chatbot'):
+        intent_desc = st.session_state.chatbot.get_intent_description(intent)
+    st.markdown(build_message_html(role, content, intent_desc, intent_score), unsafe_allow_html=True)
+
+
+@st.cache_data(max_entries=MESSAGE_HTML_CACHE_SIZE, show_spinner=False)
+def build_doc_context_html(doc_context: str) -> str:
+    """Doküman bağlamının HTML'ini üretir"""
+    return f'<div class="doc-context">{doc_context.replace(chr(10), "<br>")}</div>'
+
+
+def render_doc_context(message, key: str):
+    """Mesajın doküman bağlamını sadece kullanıcı açtığında tarayıcıya gönderir"""
+    doc_chunks = message.get("doc_chunks")
+    if not doc_chunks:
+        return
+    sources = ", ".join(dict.fromkeys(chunk["source"] for chunk in doc_chunks))
+    label = f"📚 Dokümanlardan Bilgiler ({len(doc_chunks)} pasaj • {sources})"
+    # st.toggle Streamlit 1.26+
+    toggle = st.toggle if hasattr(st, "toggle") else st.checkbox
+    if toggle(label, key=key):
+        doc_context = format_context(doc_chunks)
+        st.markdown(build_doc_context_html(doc_context), unsafe_allow_html=True)
+
+
+def _show_older_messages():
+    st.session_state.message_limit += MESSAGE_PAGE_SIZE
+
+
+def _render_chat_history():
+    """Sohbet geçmişini gösterir; uzun sohbetlerde sadece son mesajlar gönderilir"""
+    messages = st.session_state.messages
+    start = max(0, len(messages) - st.session_state.message_limit)
+    if start:
+        st.button(f"⬆️ Önceki Mesajları Göster ({start} mesaj)", key="more_messages",
+                  on_click=_show_older_messages, use_container_width=True)
+    
+    for index in range(start, len(messages)):
+        message = messages[index]
+        render_chat_message(
+            message["role"],
+            message["content"],
+            message.get("intent"),
+            message.get("intent_score")
+        )
+        if message["role"] == "user":
+            render_doc_context(message, key=f"ctx_{st.session_state.current_chat_id}_{index}")
+
+
+# Streamlit 1.37+: geçmişteki etkileşimler (bağlamı açma, eski mesajları yükleme)
+# sayfanın tamamını değil sadece bu bölümü yeniden çalıştırır
+render_chat_history = st.fragment(_render_chat_history) if hasattr(st, "fragment") else _render_chat_history
+
+
+def send_message(message: str, doc_chunks=None):
     """Mesaj gönderir"""
     st.session_state.show_welcome = False
     
     if st.session_state.current_chat_id is None:
-        st.session_state.current_chat_id = datetime.now().strftime("%Y%m%d%H%M%S")
-    
-    # Doküman bağlamı varsa mesaja ekle
-    if doc_context:
-        message_with_context = f"{message}\n\n📚 Dokümanlardan Bilgiler:\n{doc_context}"
-    else:
-        message_with_context = message
+        st.session_state.current_chat_id = new_chat_id()
     
-    st.session_state.messages.append({
+    user_message = {
         "role": "user",
-        "content": message_with_context
-    })
+        "content": message
+    }
+    # Doküman bağlamı mesaj metnine gömülmez; chatbot tekrar eden chunk'ları
+    # konuşmaya yeniden eklemeden referans verebilsin diye ayrı tutulur
+    if doc_chunks:
+        user_message["doc_chunks"] = [
+            {"content": c["content"], "source": c["source"], "chunk_id": c["chunk_id"]}
+            for c in doc_chunks
+        ]
+    st.session_state.messages.append(user_message)
 
 
 def main():
@@ -557,24 +883,24 @@ def main():
                 category = "motor"
                 question = CATEGORY_QUESTIONS[category]
                 # Dokümanlardan bilgi çek
-                doc_context = st.session_state.doc_store.get_category_context(category)
-                send_message(question, doc_context)
+                doc_chunks = get_document_store().get_category_passages(category)
+                send_message(question, doc_chunks)
                 st.rerun()
         
         with col2:
             if st.button("🛞\n\nFren Sistemleri", key="btn_fren", use_container_width=True):
                 category = "fren"
                 question = CATEGORY_QUESTIONS[category]
-                doc_context = st.session_state.doc_store.get_category_context(category)
-                send_message(question, doc_context)
+                doc_chunks = get_document_store().get_category_passages(category)
+                send_message(question, doc_chunks)
                 st.rerun()
         
         with col3:
             if st.button("⚡\n\nElektrik & Akü", key="btn_elektrik", use_container_width=True):
                 category = "elektrik"
                 question = CATEGORY_QUESTIONS[category]
-                doc_context = st.session_state.doc_store.get_category_context(category)
-                send_message(question, doc_context)
+                doc_chunks = get_document_store().get_category_passages(category)
+                send_message(question, doc_chunks)
                 st.rerun()
         
         col4, col5, col6 = st.columns(3)
@@ -583,24 +909,24 @@ def main():
             if st.button("🌡️\n\nKlima & Isıtma", key="btn_klima", use_container_width=True):
                 category = "klima"
                 question = CATEGORY_QUESTIONS[category]
-                doc_context = st.session_state.doc_store.get_category_context(category)
-                send_message(question, doc_context)
+                doc_chunks = get_document_store().get_category_passages(category)
+                send_message(question, doc_chunks)
                 st.rerun()
         
         with col5:
             if st.button("⚙️\n\nŞanzıman", key="btn_sanziman", use_container_width=True):
                 category = "sanziman"
                 question = CATEGORY_QUESTIONS[category]
-                doc_context = st.session_state.doc_store.get_category_context(category)
-                send_message(question, doc_context)
+                doc_chunks = get_document_store().get_category_passages(category)
+                send_message(question, doc_chunks)
                 st.rerun()
         
         with col6:
             if st.button("🔍\n\nBakım İpuçları", key="btn_bakim", use_container_width=True):
                 category = "bakim"
                 question = CATEGORY_QUESTIONS[category]
-                doc_context = st.session_state.doc_store.get_category_context(category)
-                send_message(question, doc_context)
+                doc_chunks = get_document_store().get_category_passages(category)
+                send_message(question, doc_chunks)
                 st.rerun()
         
         st.markdown("""
@@ -612,17 +938,11 @@ def main():
     
     # Chat Section
     if st.session_state.messages:
-        for message in st.session_state.messages:
-            render_chat_message(
-                message["role"], 
-                message["content"],
-                message.get("intent"),
-                message.get("intent_score")
-            )
+        render_chat_history()
         
         # Son mesaj user ise yanıt al
         if st.session_state.messages[-1]["role"] == "user":
-            user_msg = st.session_state.messages[-1]["content"]
+            last_message = st.session_state.messages[-1]
             
             # Chatbot instance'ını kontrol et
             if not st.session_state.chatbot:
@@ -630,7 +950,21 @@ def main():
                 st.stop()
             
             with st.spinner("🔍 Düşünüyorum..."):
-                response, detected_intent, intent_score = st.session_state.chatbot.get_response(user_msg)
+                response_start = time.perf_counter()
+                response, detected_intent, intent_score = st.session_state.chatbot.get_response(
+                    last_message["content"], last_message.get("doc_chunks")
+                )
+                response_ms = (time.perf_counter() - response_start) * 1000
+            
+            if CONVERSATION_RECORD_FILE:
+                try:
+                    get_conversation_recorder().record(
+                        st.session_state.chatbot, st.session_state.current_chat_id,
+                        last_message["content"], response, last_message.get("doc_chunks"),
+                        response_ms, st.session_state.collection
+                    )
+                except OSError as e:
+                    print(f"⚠️ Sohbet kaydı yazılamadı: {e}")
             
             # Intent badge oluştur
             intent_desc = st.session_state.chatbot.get_intent_description(detected_intent)
@@ -652,6 +986,7 @@ def main():
         with col2:
             if st.button("🗑️ Sohbeti Temizle", use_container_width=True):
                 st.session_state.messages = []
+                st.session_state.persisted_count = 0
                 st.session_state.show_welcome = True
                 if st.session_state.chatbot:
                     st.session_state.chatbot.clear_history()
@@ -666,9 +1001,12 @@ def main():
         if not st.session_state.chatbot:
             st.error("❌ Gemini modeli başlatılamadı. Lütfen API anahtarınızı kontrol edin.")
         else:
-            # Dokümanlardan ilgili bilgiyi çek
-            doc_context = st.session_state.doc_store.get_context(user_input)
-            send_message(user_input, doc_context)
+            # Dokümanlardan ilgili pasajları çek (chunk'ların sadece soruyla ilgili kısımları);
+            # şablonla yanıtlanacak selamlaşmalarda arama yapılmaz
+            doc_chunks = []
+            if not st.session_state.chatbot.is_small_talk(user_input):
+                doc_chunks = get_document_store().get_context_passages(user_input)
+            send_message(user_input, doc_chunks)
             st.rerun()
     
     # Footer
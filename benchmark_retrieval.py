@@ -0,0 +1,140 @@
+"""
+Doküman Arama Karşılaştırma (Benchmark) Modülü
+Anahtar kelime araması ile hibrit (anahtar kelime + dense) aramayı
+gecikme ve isabet açısından karşılaştırır.
+
+Derlem: documents/ klasöründeki dokümanların chunk'ları (sohbetteki indeksle aynı)
+Sorgular: retrieval_queries.txt - her sorgunun ilgili bölüm başlıkları elle
+etiketlenmiştir. Dense projeksiyonu intents.txt ile eğitildiğinden sorgular
+intents.txt'den bağımsızdır; eğitim cümlesiyle aynı olan sorgular atlanır.
+"""
+
+import time
+from typing import List, Tuple, Dict, Callable
+
+from document_processor import DocumentProcessor, SimpleDocumentStore
+
+# Ölçümden önce çalıştırılan ısınma sorgusu sayısı (ilk çağrıdaki numpy/BLAS
+# yüklemesi gecikme rakamlarına katılmaz)
+WARMUP_QUERIES = 5
+
+
+def load_examples(filepath: str) -> List[Tuple[str, str]]:
+    """intent|cümle formatındaki dosyayı yükler"""
+    examples = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '|' not in line:
+                continue
+            intent, text = line.split('|', 1)
+            examples.append((intent.strip().lower(), text.strip()))
+    return examples
+
+
+def load_queries(filepath: str, exclude_file: str = "intents.txt") -> List[Tuple[List[str], str]]:
+    """
+    ilgili_bölüm|sorgu formatındaki etiketli sorguları yükler.
+    exclude_file'daki (dense eğitim verisi) cümlelerle aynı olan sorgular atlanır.
+    """
+    seen = {text.lower() for _, text in load_examples(exclude_file)} if exclude_file else set()
+    queries = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '|' not in line:
+                continue
+            sections, text = line.split('|', 1)
+            text = text.strip()
+            if text.lower() in seen:
+                continue
+            queries.append(([s.strip().lower() for s in sections.split(';') if s.strip()], text))
+    return queries
+
+
+def is_relevant(doc: Dict, sections: List[str]) -> bool:
+    """Chunk'ın bölüm başlığı etiketlenen bölümlerden birini içeriyor mu"""
+    section = (doc.get("section") or "").lower()
+    return any(label in section for label in sections)
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Sıralı olmayan listeden yüzdelik değer hesaplar"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def run_benchmark(search: Callable[[str, int], List[Dict]], queries: List[Tuple[List[str], str]],
+                  top_k: int = 5, warmup: int = WARMUP_QUERIES) -> Dict[str, float]:
+    """Bir arama fonksiyonunu tüm sorgular üzerinde ölçer (önce warmup sorgu ısınma için çalışır)"""
+    for _, text in queries[:warmup]:
+        search(text, top_k)
+
+    latencies = []
+    hits = 0
+    found = 0
+    reciprocal_rank = 0.0
+
+    for sections, text in queries:
+        start = time.perf_counter()
+        results = search(text, top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        ranks = [rank for rank, doc in enumerate(results, 1) if is_relevant(doc, sections)]
+        if ranks:
+            found += 1
+            reciprocal_rank += 1 / ranks[0]
+            if ranks[0] == 1:
+                hits += 1
+
+    n = len(queries)
+    return {
+        "hit@1": hits / n if n else 0.0,
+        f"recall@{top_k}": found / n if n else 0.0,
+        "mrr": reciprocal_rank / n if n else 0.0,
+        "mean_ms": sum(latencies) / n if n else 0.0,
+        "p95_ms": percentile(latencies, 95)
+    }
+
+
+def main(top_k: int = 5, documents_folder: str = "documents",
+         queries_file: str = "retrieval_queries.txt"):
+    chunks = DocumentProcessor(documents_folder).get_document_chunks()
+    queries = load_queries(queries_file)
+
+    lexical_store = SimpleDocumentStore()
+    lexical_store.add_documents(chunks)
+
+    start = time.perf_counter()
+    hybrid_store = SimpleDocumentStore(dense=True)
+    hybrid_store.add_documents(chunks)
+    index_ms = (time.perf_counter() - start) * 1000
+
+    results = {
+        "Anahtar kelime (search)": run_benchmark(lexical_store.search, queries, top_k),
+        "Sadece dense": run_benchmark(
+            lambda q, k: [hybrid_store.documents[i] for i, _ in hybrid_store.dense_retriever.search(q, k)],
+            queries, top_k),
+        "Hibrit (RRF)": run_benchmark(hybrid_store.search, queries, top_k),
+    }
+
+    print("\n" + "=" * 80)
+    print("📊 DOKÜMAN ARAMA KARŞILAŞTIRMASI")
+    print("=" * 80)
+    print(f"Derlem: {len(chunks)} chunk, Sorgu: {len(queries)}, "
+          f"Dense indeksleme: {index_ms:.0f} ms, Isınma: {WARMUP_QUERIES} sorgu")
+    print("-" * 80)
+    print(f"{'Yöntem':<26} {'Hit@1':>9} {f'R@{top_k}':>9} {'MRR':>7} {'Ort. ms':>10} {'p95 ms':>10}")
+    print("-" * 80)
+    for name, metrics in results.items():
+        print(f"{name:<26} {metrics['hit@1']:>8.2%} {metrics[f'recall@{top_k}']:>8.2%} "
+              f"{metrics['mrr']:>7.3f} {metrics['mean_ms']:>10.3f} {metrics['p95_ms']:>10.3f}")
+    print("=" * 80)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Başlangıç (Import) Süresi Ölçümü
+Her modülü temiz bir Python sürecinde import edip süresini ölçer ve
+belirlenen bütçeyi aşan modül varsa hata koduyla çıkar.
+
+Kullanım:
+    python benchmark_startup.py            # tüm modüller
+    python benchmark_startup.py --top 5    # en ağır 5 bağımlılığı da göster
+"""
+
+import sys
+import argparse
+import subprocess
+from typing import List, Tuple
+
+
+# Modül -> import süresi bütçesi (ms)
+IMPORT_BUDGETS_MS = {
+    "hashed_features": 30,
+    "intent_classifier": 50,
+    "evaluate_intent": 60,
+    "intent_feedback": 50,
+    "dtc_index": 50,
+    "model_router": 50,
+    "shared_index": 100,
+    "dense_retriever": 50,
+    "passage_extractor": 30,
+    "conversation_store": 80,
+    "chunk_store": 30,
+    "document_processor": 80,
+    "ingest_queue": 80,
+    "tenant_collections": 80,
+    "gemini_client": 100,
+    "replay_load": 150,
+}
+
+# Ölçüm tekrar sayısı (en düşük değer alınır, disk önbelleği etkisini azaltır)
+REPEATS = 3
+
+
+def _run_importtime(code: str) -> List[Tuple[str, float]]:
+    """Kodu `-X importtime` ile çalıştırıp (modül, kümülatif_ms) listesini döndürür"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    entries = []
+    for line in result.stderr.splitlines():
+        # Format: "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) == 3:
+            entries.append((parts[2].strip(), int(parts[1].strip()) / 1000))
+    return entries
+
+
+def measure_import(module: str, baseline: set) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Modülü yeni bir süreçte import edip süresini ölçer.
+
+    Args:
+        baseline: Yorumlayıcı açılışında zaten yüklenen modüller (hariç tutulur)
+
+    Returns:
+        (toplam_ms, [(üst_seviye_bağımlılık, kümülatif_ms), ...])
+    """
+    entries = _run_importtime(f"import {module}")
+    total_ms = next((ms for name, ms in entries if name == module), 0.0)
+
+    heaviest = sorted(
+        ((name, ms) for name, ms in entries
+         if name != module and "." not in name and name not in baseline),
+        key=lambda x: x[1], reverse=True
+    )
+    return total_ms, heaviest
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Modül import sürelerini ölçer")
+    parser.add_argument("--top", type=int, default=0, help="Gösterilecek en ağır bağımlılık sayısı")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print("⏱️  BAŞLANGIÇ (IMPORT) SÜRESİ")
+    print("=" * 60)
+    print(f"{'Modül':<22} {'Süre (ms)':>12} {'Bütçe (ms)':>12} {'Durum':>8}")
+    print("-" * 60)
+
+    baseline = {name for name, _ in _run_importtime("pass")}
+    failures = 0
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        try:
+            runs = [measure_import(module, baseline) for _ in range(REPEATS)]
+        except RuntimeError as e:
+            print(f"{module:<22} {'-':>12} {budget:>12} {'HATA':>8}  ({e})")
+            failures += 1
+            continue
+
+        total_ms, heaviest = min(runs, key=lambda r: r[0])
+        ok = total_ms <= budget
+        failures += 0 if ok else 1
+        print(f"{module:<22} {total_ms:>12.1f} {budget:>12} {'✅' if ok else '❌':>8}")
+
+        for name, ms in heaviest[:args.top]:
+            print(f"    └─ {name:<30} {ms:>8.1f} ms")
+
+    print("=" * 60)
+    if failures:
+        print(f"❌ {failures} modül bütçeyi aştı.")
+    else:
+        print("✅ Tüm modüller bütçe içinde.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+Sıkıştırılmış Chunk Deposu
+Doküman chunk'larını sözlük listesi yerine sütunlar halinde tutar:
+- Tüm içerikler tek bir UTF-8 tamponda, başlangıç offset'leri bir dizide
+- Kaynak dosya ve bölüm adları bir kez saklanır (tamsayı id ile referans)
+- chunk_id "<kaynak>_<n>" biçimindeyse sadece n tutulur
+- Intent etiket kümeleri bir kez saklanır
+
+Chunk'a erişildiğinde sadece iki alanlık bir ChunkView oluşturulur; alanlar
+okundukça sütunlardan üretilir. Kaydedilen depo yüklenirken içerik tamponu ve
+sayısal sütunlar belleğe eşlenir (mmap); aynı klasörü açan süreçler bunları
+tek kopya olarak paylaşır. ChunkView sözlük gibi okunur (chunk["content"],
+chunk.get("keys", {})), bu yüzden depoyu kullanan kod değişmez.
+"""
+
+import os
+import json
+import mmap
+from array import array
+from typing import List, Dict, Tuple, Optional, Any, Iterator, Iterable
+
+
+# chunks.cols dosyasındaki sayısal sütunlar (öznitelik, tür) sırasıyla; her sütunun
+# eleman boyutu öncekileri böldüğü için bölümler hizalı kalır
+COLUMN_ARRAYS = (("_offsets", 'Q'), ("_source_of", 'I'), ("_section_of", 'I'),
+                 ("_local_ids", 'i'), ("_intent_of", 'H'))
+
+# Sütunlarda tutulan alanlar; diğerleri (ör. tablo satırlarının fields/keys
+# alanları) sadece sahip oldukları chunk'lar için ayrıca saklanır
+COLUMN_FIELDS = ("content", "source", "chunk_id", "section", "intents")
+
+_MISSING = object()
+
+
+class ChunkView:
+    """Depodaki tek bir chunk'ın salt-okunur, sözlük benzeri görünümü"""
+
+    __slots__ = ("_store", "_idx")
+
+    def __init__(self, store: "ChunkStore", idx: int):
+        self._store = store
+        self._idx = idx
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._store.get_field(self._idx, key)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._store.get_field(self._idx, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self._store.get_field(self._idx, key) is not _MISSING
+
+    def keys(self) -> List[str]:
+        return self._store.field_names(self._idx)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Chunk'ı bağımsız bir sözlüğe çevirir (ör. JSON'a yazmak için)"""
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"ChunkView({self._idx}, {self.get('chunk_id')!r})"
+
+
+class ChunkStore:
+    """Chunk'ları bitişik tampon ve sayısal dizilerde tutan liste benzeri depo"""
+
+    def __init__(self):
+        # Paylaşılan metinler (kaynak ve bölüm adları); 0 = boş
+        self._strings: List[str] = [""]
+        self._string_ids: Dict[str, int] = {"": 0}
+        # Intent etiket kümeleri; 0 = etiketsiz
+        self._intent_sets: List[Tuple[str, ...]] = [()]
+        self._intent_set_ids: Dict[Tuple[str, ...], int] = {(): 0}
+
+        # İçerik tamponu ve chunk başlangıçları (son eleman tamponun sonu)
+        self._buffer = bytearray()
+        self._offsets = array('Q', [0])
+        self._source_of = array('I')
+        self._section_of = array('I')
+        self._local_ids = array('i')  # chunk_id = "<kaynak>_<n>"; -1 ise extras'ta
+        self._intent_of = array('H')
+        # Sütunlara sığmayan alanlar: chunk indeksi -> {alan: değer}
+        self._extras: Dict[int, Dict[str, Any]] = {}
+
+    def _intern(self, value: str) -> int:
+        """Metni paylaşılan tabloya ekleyip id'sini döndürür"""
+        sid = self._string_ids.get(value)
+        if sid is None:
+            sid = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = sid
+        return sid
+
+    def _intern_intents(self, intents: Iterable[str]) -> int:
+        """Intent etiket kümesini paylaşılan tabloya ekleyip id'sini döndürür"""
+        key = tuple(intents)
+        sid = self._intent_set_ids.get(key)
+        if sid is None:
+            sid = len(self._intent_sets)
+            self._intent_sets.append(key)
+            self._intent_set_ids[key] = sid
+        return sid
+
+    def _writable_buffer(self) -> bytearray:
+        """Belleğe eşlenmiş tamponu, eklenebilmesi için belleğe kopyalar"""
+        if not isinstance(self._buffer, bytearray):
+            self._buffer = bytearray(self._buffer)
+        return self._buffer
+
+    def _writable_columns(self):
+        """Belleğe eşlenmiş sayısal sütunları, değiştirilebilmeleri için diziye kopyalar"""
+        for name, typecode in COLUMN_ARRAYS:
+            column = getattr(self, name)
+            if not isinstance(column, array):
+                setattr(self, name, array(typecode, column.tobytes()))
+
+    def append(self, chunk: Dict[str, Any]):
+        """Chunk sözlüğünü sütunlara ekler"""
+        idx = len(self)
+        source = chunk.get("source", "")
+        extras = {key: value for key, value in chunk.items() if key not in COLUMN_FIELDS}
+
+        local_id = -1
+        chunk_id = chunk.get("chunk_id")
+        if chunk_id is not None:
+            prefix, _, number = str(chunk_id).rpartition("_")
+            if prefix == source and number.isdigit() and int(number) < 2 ** 31:
+                local_id = int(number)
+            else:
+                extras["chunk_id"] = chunk_id
+
+        buffer = self._writable_buffer()
+        self._writable_columns()
+        buffer += chunk["content"].encode('utf-8')
+        self._offsets.append(len(buffer))
+        self._source_of.append(self._intern(source))
+        self._section_of.append(self._intern(chunk.get("section", "")))
+        self._local_ids.append(local_id)
+        self._intent_of.append(self._intern_intents(chunk.get("intents", ())))
+        if extras:
+            self._extras[idx] = extras
+
+    def extend(self, chunks: Iterable[Dict[str, Any]]):
+        for chunk in chunks:
+            self.append(chunk)
+
+    def __len__(self) -> int:
+        return len(self._source_of)
+
+    def __getitem__(self, idx: int) -> ChunkView:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return ChunkView(self, idx)
+
+    def __iter__(self) -> Iterator[ChunkView]:
+        for idx in range(len(self)):
+            yield ChunkView(self, idx)
+
+    def content(self, idx: int) -> str:
+        """Chunk içeriği (görünüm oluşturmadan)"""
+        return self._buffer[self._offsets[idx]:self._offsets[idx + 1]].decode('utf-8')
+
+    def source(self, idx: int) -> str:
+        """Chunk'ın kaynak dosyası"""
+        return self._strings[self._source_of[idx]]
+
+    def intents(self, idx: int) -> List[str]:
+        """Chunk'ın intent etiketleri"""
+        return list(self._intent_sets[self._intent_of[idx]])
+
+    def set_intents(self, idx: int, intents: Iterable[str]):
+        """Chunk'ın intent etiketlerini değiştirir"""
+        self._writable_columns()
+        self._intent_of[idx] = self._intern_intents(intents)
+
+    def get_field(self, idx: int, key: str) -> Any:
+        """Chunk alanını döndürür (yoksa _MISSING)"""
+        if key == "content":
+            return self.content(idx)
+        if key == "source":
+            return self.source(idx)
+        if key == "chunk_id":
+            local_id = self._local_ids[idx]
+            if local_id >= 0:
+                return f"{self.source(idx)}_{local_id}"
+        elif key == "section":
+            section_id = self._section_of[idx]
+            return self._strings[section_id] if section_id else _MISSING
+        elif key == "intents":
+            intent_set = self._intent_of[idx]
+            return list(self._intent_sets[intent_set]) if intent_set else _MISSING
+        return self._extras.get(idx, {}).get(key, _MISSING)
+
+    def field_names(self, idx: int) -> List[str]:
+        """Chunk'ta bulunan alan adları"""
+        return [key for key in COLUMN_FIELDS if self.get_field(idx, key) is not _MISSING] + [
+            key for key in self._extras.get(idx, {}) if key not in COLUMN_FIELDS
+        ]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Tüm chunk'ları sözlük listesi olarak döndürür"""
+        return [view.to_dict() for view in self]
+
+    def memory_bytes(self) -> int:
+        """İçerik tamponu ve sütun dizilerinin yaklaşık boyutu (byte)"""
+        arrays = (self._offsets, self._source_of, self._section_of, self._local_ids, self._intent_of)
+        return len(self._buffer) + sum(a.itemsize * len(a) for a in arrays)
+
+    def save(self, folder: str):
+        """İçerik tamponunu ve sayısal sütunları ham dosyalara, metin tablolarını JSON'a yazar"""
+        with open(os.path.join(folder, "chunks.bin"), 'wb') as f:
+            f.write(self._buffer)
+        with open(os.path.join(folder, "chunks.cols"), 'wb') as f:
+            for name, _ in COLUMN_ARRAYS:
+                f.write(getattr(self, name).tobytes())
+        meta = {
+            "count": len(self),
+            "strings": self._strings,
+            "intent_sets": self._intent_sets,
+            "extras": self._extras,
+        }
+        with open(os.path.join(folder, "chunks.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, default=str)
+
+    @classmethod
+    def load(cls, folder: str) -> "ChunkStore":
+        """
+        save ile kaydedilen depoyu yükler. İçerik tamponu ve sayısal sütunlar
+        belleğe eşlenir (mmap); sadece metin tabloları ve ek alanlar süreç
+        belleğine okunur. Eşlenen sütunlar ilk değişiklikte kopyalanır.
+        """
+        with open(os.path.join(folder, "chunks.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        store = cls()
+        store._strings = meta["strings"]
+        store._string_ids = {value: sid for sid, value in enumerate(store._strings)}
+        store._intent_sets = [tuple(intents) for intents in meta["intent_sets"]]
+        store._intent_set_ids = {intents: sid for sid, intents in enumerate(store._intent_sets)}
+        store._extras = {int(idx): extras for idx, extras in meta["extras"].items()}
+
+        # Sütun uzunlukları: offsets'te tamponun sonu için bir eleman fazladır
+        count = meta["count"]
+        sizes = [(name, typecode, array(typecode).itemsize * (count + 1 if name == "_offsets" else count))
+                 for name, typecode in COLUMN_ARRAYS]
+        path = os.path.join(folder, "chunks.cols")
+        if os.path.getsize(path) != sum(size for _, _, size in sizes):
+            raise ValueError(f"{path} {count} chunk ile uyumsuz")
+        with open(path, 'rb') as f:
+            columns = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        start = 0
+        for name, typecode, size in sizes:
+            setattr(store, name, columns[start:start + size].cast(typecode))
+            start += size
+
+        path = os.path.join(folder, "chunks.bin")
+        if os.path.getsize(path):
+            with open(path, 'rb') as f:
+                store._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return store
@@ -0,0 +1,235 @@
+"""
+Sohbet Geçmişi Deposu
+Sohbetleri kalıcı olarak saklar (varsayılan: yerel SQLite).
+
+Her sohbetin bir sahibi (owner) vardır; listeleme, okuma, silme ve temizleme
+sadece sahibin sohbetlerini kapsar. owner=None verilirse filtre uygulanmaz
+(bakım araçları için).
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Optional, Any
+
+
+class ConversationStore:
+    """Sohbet deposu arayüzü - farklı arka uçlar bu sınıftan türetilir"""
+
+    def create_chat(self, chat_id: str, title: str, collection: Optional[str] = None,
+                    owner: Optional[str] = None) -> None:
+        """Yeni sohbet kaydı oluşturur"""
+        raise NotImplementedError
+
+    def set_chat_collection(self, chat_id: str, collection: Optional[str],
+                            owner: Optional[str] = None) -> None:
+        """Sohbette aranan doküman koleksiyonunu değiştirir"""
+        raise NotImplementedError
+
+    def append_messages(self, chat_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Sohbetin sonuna mesaj ekler (mevcut mesajlar yeniden yazılmaz)"""
+        raise NotImplementedError
+
+    def get_chat(self, chat_id: str, owner: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Sohbetin başlık bilgilerini döndürür (mesajlar olmadan)"""
+        raise NotImplementedError
+
+    def get_messages(self, chat_id: str, owner: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Sohbetin mesajlarını sırasıyla döndürür"""
+        raise NotImplementedError
+
+    def list_chats(self, owner: Optional[str] = None, offset: int = 0,
+                   limit: int = 20) -> List[Dict[str, Any]]:
+        """Sohbetleri en yeniden eskiye sayfa sayfa listeler (mesajlar olmadan)"""
+        raise NotImplementedError
+
+    def count_chats(self, owner: Optional[str] = None) -> int:
+        """Sohbet sayısını döndürür"""
+        raise NotImplementedError
+
+    def delete_chat(self, chat_id: str, owner: Optional[str] = None) -> None:
+        """Sohbeti ve mesajlarını siler"""
+        raise NotImplementedError
+
+    def clear(self, owner: Optional[str] = None) -> None:
+        """Sahibin tüm sohbetlerini siler"""
+        raise NotImplementedError
+
+
+class SQLiteConversationStore(ConversationStore):
+    """SQLite tabanlı sohbet deposu"""
+
+    # Mesaj satırında ayrı sütunda tutulmayan alanlar "meta" (JSON) sütununa yazılır
+    MESSAGE_COLUMNS = ("role", "content")
+
+    def __init__(self, db_path: str = "chat_history.db"):
+        """
+        Args:
+            db_path: SQLite veritabanı dosyası
+        """
+        self.db_path = db_path
+        # Streamlit script'i farklı thread'lerde çalıştırabilir
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _create_tables(self):
+        """Tabloları ve indeksleri oluşturur"""
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS chats (
+                    id TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    message_count INTEGER NOT NULL DEFAULT 0,
+                    collection TEXT,
+                    owner TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_chats_updated ON chats(updated_at DESC);
+
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chat_id TEXT NOT NULL REFERENCES chats(id) ON DELETE CASCADE,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    meta TEXT
+                );
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_chat_seq ON messages(chat_id, seq);
+            """)
+            # Koleksiyon / sahip sütunları olmadan oluşturulmuş eski veritabanları.
+            # Eski sohbetlerin sahibi yoktur ve hiçbir oturumda listelenmez
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(chats)")}
+            if "collection" not in columns:
+                self._conn.execute("ALTER TABLE chats ADD COLUMN collection TEXT")
+            if "owner" not in columns:
+                self._conn.execute("ALTER TABLE chats ADD COLUMN owner TEXT")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chats_owner_updated ON chats(owner, updated_at DESC)"
+            )
+
+    @staticmethod
+    def _owner_filter(owner: Optional[str]):
+        """owner verilmişse sorguya eklenen koşul ve parametre"""
+        if owner is None:
+            return "", ()
+        return " AND owner = ?", (owner,)
+
+    def _now(self) -> str:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def _chat_row(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Veritabanı satırını uygulamanın kullandığı sözlüğe çevirir"""
+        updated = datetime.strptime(row["updated_at"], "%Y-%m-%d %H:%M:%S")
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "date": updated.strftime("%d.%m.%Y %H:%M"),
+            "message_count": row["message_count"],
+            "collection": row["collection"]
+        }
+
+    def create_chat(self, chat_id: str, title: str, collection: Optional[str] = None,
+                    owner: Optional[str] = None) -> None:
+        now = self._now()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO chats (id, title, created_at, updated_at, collection, owner) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (chat_id, title, now, now, collection, owner)
+            )
+
+    def set_chat_collection(self, chat_id: str, collection: Optional[str],
+                            owner: Optional[str] = None) -> None:
+        condition, params = self._owner_filter(owner)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE chats SET collection = ? WHERE id = ?{condition}",
+                               (collection, chat_id) + params)
+
+    def append_messages(self, chat_id: str, messages: List[Dict[str, Any]]) -> None:
+        if not messages:
+            return
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT message_count FROM chats WHERE id = ?", (chat_id,)
+            ).fetchone()
+            start = row["message_count"] if row else 0
+
+            rows = []
+            for offset, message in enumerate(messages):
+                meta = {k: v for k, v in message.items() if k not in self.MESSAGE_COLUMNS}
+                rows.append((
+                    chat_id, start + offset, message["role"], message["content"],
+                    json.dumps(meta, ensure_ascii=False) if meta else None
+                ))
+            self._conn.executemany(
+                "INSERT INTO messages (chat_id, seq, role, content, meta) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute(
+                "UPDATE chats SET message_count = ?, updated_at = ? WHERE id = ?",
+                (start + len(messages), self._now(), chat_id)
+            )
+
+    def get_chat(self, chat_id: str, owner: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        condition, params = self._owner_filter(owner)
+        with self._lock:
+            row = self._conn.execute(f"SELECT * FROM chats WHERE id = ?{condition}",
+                                     (chat_id,) + params).fetchone()
+        return self._chat_row(row) if row else None
+
+    def get_messages(self, chat_id: str, owner: Optional[str] = None) -> List[Dict[str, Any]]:
+        condition, params = self._owner_filter(owner)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT m.role, m.content, m.meta FROM messages m JOIN chats ON chats.id = m.chat_id "
+                f"WHERE m.chat_id = ?{condition} ORDER BY m.seq",
+                (chat_id,) + params
+            ).fetchall()
+
+        messages = []
+        for row in rows:
+            message = {"role": row["role"], "content": row["content"]}
+            if row["meta"]:
+                message.update(json.loads(row["meta"]))
+            messages.append(message)
+        return messages
+
+    def list_chats(self, owner: Optional[str] = None, offset: int = 0,
+                   limit: int = 20) -> List[Dict[str, Any]]:
+        condition, params = self._owner_filter(owner)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM chats WHERE 1 = 1{condition} "
+                "ORDER BY updated_at DESC, rowid DESC LIMIT ? OFFSET ?",
+                params + (limit, offset)
+            ).fetchall()
+        return [self._chat_row(row) for row in rows]
+
+    def count_chats(self, owner: Optional[str] = None) -> int:
+        condition, params = self._owner_filter(owner)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM chats WHERE 1 = 1{condition}",
+                                      params).fetchone()[0]
+
+    def delete_chat(self, chat_id: str, owner: Optional[str] = None) -> None:
+        condition, params = self._owner_filter(owner)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"DELETE FROM messages WHERE chat_id IN (SELECT id FROM chats WHERE id = ?{condition})",
+                (chat_id,) + params
+            )
+            self._conn.execute(f"DELETE FROM chats WHERE id = ?{condition}", (chat_id,) + params)
+
+    def clear(self, owner: Optional[str] = None) -> None:
+        condition, params = self._owner_filter(owner)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"DELETE FROM messages WHERE chat_id IN (SELECT id FROM chats WHERE 1 = 1{condition})",
+                params
+            )
+            self._conn.execute(f"DELETE FROM chats WHERE 1 = 1{condition}", params)
@@ -0,0 +1,279 @@
+"""
+Yoğun Vektör (Dense) Arama Modülü
+Ağ ve GPU gerektirmeyen yerel gömme (embedding) ile anlamsal doküman araması.
+
+Gömme iki parçadan oluşur:
+- Hashing: kelime ve karakter 3-gram'ları sabit boyutlu bir uzaya hash'lenir
+  (çekim ekleri ve yazım hataları için, bkz. hashed_features.py)
+- Kategori projeksiyonu: intents.txt üzerinden çevrimdışı öğrenilen
+  kelime -> kategori dağılımı ("hararet" ve "ısınıyor" aynı yöne düşer)
+"""
+
+import os
+import re
+import json
+import math
+import mmap
+from array import array
+from typing import List, Dict, Tuple, Optional, Iterable
+from collections import defaultdict
+from importlib.util import find_spec
+
+from hashed_features import hash_feature, char_ngrams
+
+# numpy varsa matris işlemleri için kullanılır; import ilk aramada yapılır
+NUMPY_AVAILABLE = find_spec("numpy") is not None
+np = None
+
+
+def _load_numpy():
+    """numpy'ı ilk kullanımda yükler"""
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+class HashingEmbedder:
+    """Hashing + kategori projeksiyonu ile CPU üzerinde metin gömme"""
+
+    # Kategori projeksiyonunun hashing özelliklerine göre ağırlığı
+    PROJECTION_WEIGHT = 2.0
+
+    def __init__(self, n_features: int = 256, data_file: Optional[str] = "intents.txt"):
+        """
+        Args:
+            n_features: Hashing uzayının boyutu
+            data_file: Projeksiyonun öğrenileceği eğitim verisi (intent|cümle)
+        """
+        self.n_features = n_features
+        self.labels: List[str] = []
+        # kelime -> kategori dağılımı (P(kategori | kelime))
+        self.projection: Dict[str, List[float]] = {}
+        # Belleğe eşlenmiş projeksiyon (bkz. load_projection): kelime -> satır ve
+        # (kelime x kategori) float32 matris; doluysa projection yerine kullanılır
+        self.projection_rows: Dict[str, int] = {}
+        self.projection_matrix = array('f')
+
+        if data_file and os.path.exists(data_file):
+            self.fit(self._load_training_data(data_file))
+
+    @property
+    def dim(self) -> int:
+        """Gömme vektörünün toplam boyutu"""
+        return self.n_features + len(self.labels)
+
+    def _load_training_data(self, data_file: str) -> List[Tuple[str, str]]:
+        """Eğitim verisini dosyadan yükler"""
+        examples = []
+        with open(data_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#') or '|' not in line:
+                    continue
+                intent, text = line.split('|', 1)
+                examples.append((intent.strip().lower(), text.strip()))
+        return examples
+
+    def _tokenize(self, text: str) -> List[str]:
+        """Metni kelimelere ayırır"""
+        text = re.sub(r'[^\w\s]', ' ', text.lower())
+        return [t for t in text.split() if len(t) > 1]
+
+    def _hash(self, feature: str) -> Tuple[int, float]:
+        """Özelliği (indeks, işaret) çiftine çevirir"""
+        return hash_feature(feature, self.n_features)
+
+    def fit(self, examples: Iterable[Tuple[str, str]]):
+        """Kelime -> kategori projeksiyonunu eğitim örneklerinden öğrenir"""
+        counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        labels = set()
+        for intent, text in examples:
+            labels.add(intent)
+            for token in set(self._tokenize(text)):
+                counts[token][intent] += 1
+
+        self.labels = sorted(labels)
+        self.projection = {}
+        for token, per_intent in counts.items():
+            total = sum(per_intent.values())
+            self.projection[token] = [per_intent.get(label, 0) / total for label in self.labels]
+
+    def embed(self, text: str) -> array:
+        """Metni L2-normalize edilmiş float32 vektöre çevirir"""
+        vec = array('f', bytes(4 * self.dim))
+        n = self.n_features
+        for token in self._tokenize(text):
+            idx, sign = self._hash(token)
+            vec[idx] += sign
+            for gram in char_ngrams(token):
+                idx, sign = self._hash(gram)
+                vec[idx] += 0.5 * sign
+            dist = self._distribution(token)
+            if dist:
+                for j, p in enumerate(dist):
+                    vec[n + j] += self.PROJECTION_WEIGHT * p
+
+        norm = math.sqrt(sum(v * v for v in vec))
+        if norm > 0:
+            for i in range(len(vec)):
+                vec[i] /= norm
+        return vec
+
+    def _distribution(self, token: str):
+        """Kelimenin kategori dağılımı (projeksiyonda yoksa None)"""
+        if self.projection_rows:
+            row = self.projection_rows.get(token)
+            if row is None:
+                return None
+            n = len(self.labels)
+            return self.projection_matrix[row * n:(row + 1) * n]
+        return self.projection.get(token)
+
+    def save_projection(self, tokens_path: str, matrix_path: str):
+        """Kelime ve kategori listelerini JSON'a, (kelime x kategori) matrisi ham float32 dosyasına yazar"""
+        tokens = list(self.projection_rows or self.projection)
+        with open(tokens_path, 'w', encoding='utf-8') as f:
+            json.dump({"labels": self.labels, "tokens": tokens}, f, ensure_ascii=False)
+        matrix = array('f')
+        for token in tokens:
+            matrix.extend(self._distribution(token))
+        with open(matrix_path, 'wb') as f:
+            matrix.tofile(f)
+
+    def load_projection(self, tokens_path: str, matrix_path: str):
+        """
+        save_projection ile kaydedilen projeksiyonu yükler; matris belleğe eşlenir
+        (mmap), aynı dosyayı açan süreçler onu tek kopya olarak paylaşır.
+        """
+        with open(tokens_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        matrix = array('f')
+        if os.path.getsize(matrix_path):
+            with open(matrix_path, 'rb') as f:
+                matrix = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast('f')
+        if len(matrix) != len(meta["tokens"]) * len(meta["labels"]):
+            raise ValueError(f"{matrix_path} {tokens_path} ile uyumsuz")
+        self.labels = meta["labels"]
+        self.projection = {}
+        self.projection_rows = {token: row for row, token in enumerate(meta["tokens"])}
+        self.projection_matrix = matrix
+
+
+class DenseRetriever:
+    """Gömme vektörlerini bitişik float32 matriste tutan vektör araması"""
+
+    def __init__(self, embedder: Optional[HashingEmbedder] = None):
+        self.embedder = embedder or HashingEmbedder()
+        self.dim = self.embedder.dim
+        # Satır satır (doküman x boyut) bitişik float32 matris
+        self._matrix = array('f')
+        self._np_matrix = None  # numpy görünümü (önbellek / mmap)
+        self.count = 0
+
+    def _materialize(self):
+        """Belleğe eşlenmiş matrisi, değiştirilebilmesi için bellekteki diziye kopyalar"""
+        if self._np_matrix is not None and len(self._matrix) < self.count * self.dim:
+            self._matrix = array('f')
+            self._matrix.frombytes(self._np_matrix.tobytes())
+
+    def add_texts(self, texts: Iterable[str]):
+        """Metinleri gömüp matrise ekler"""
+        self._materialize()
+        # numpy görünümü diziyi kilitler; büyütmeden önce bırakılmalı
+        self._np_matrix = None
+        for text in texts:
+            self._matrix.extend(self.embedder.embed(text))
+            self.count += 1
+
+    def clear(self):
+        """Tüm vektörleri siler"""
+        self._matrix = array('f')
+        self._np_matrix = None
+        self.count = 0
+
+    def _as_numpy(self):
+        """Matrisin (kopyasız) numpy görünümünü döndürür"""
+        _load_numpy()
+        if self._np_matrix is None:
+            self._np_matrix = np.frombuffer(self._matrix, dtype=np.float32).reshape(self.count, self.dim)
+        return self._np_matrix
+
+    def search(self, query: str, top_k: int = 5,
+               candidates: Optional[List[int]] = None) -> List[Tuple[int, float]]:
+        """Sorguya en yakın dokümanların (indeks, benzerlik) listesini döndürür"""
+        return self.search_batch([query], top_k, candidates)[0]
+
+    def search_batch(self, queries: List[str], top_k: int = 5,
+                     candidates: Optional[List[int]] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Birden fazla sorguyu tek matris çarpımıyla arar.
+
+        Args:
+            candidates: Verilirse sadece bu satırlar (ör. bir intent bölümü) aranır
+        """
+        rows = list(range(self.count)) if candidates is None else candidates
+        if not rows:
+            return [[] for _ in queries]
+
+        query_vecs = [self.embedder.embed(q) for q in queries]
+
+        if NUMPY_AVAILABLE:
+            _load_numpy()
+            matrix = self._as_numpy()
+            if candidates is not None:
+                matrix = matrix[np.asarray(rows, dtype=np.int64)]
+            q = np.frombuffer(b"".join(v.tobytes() for v in query_vecs), dtype=np.float32)
+            scores = matrix @ q.reshape(len(queries), self.dim).T  # (doküman x sorgu)
+            k = min(top_k, len(rows))
+            results = []
+            for j in range(len(queries)):
+                column = scores[:, j]
+                top = np.argpartition(-column, k - 1)[:k]
+                top = top[np.argsort(-column[top])]
+                results.append([(rows[int(i)], float(column[i])) for i in top])
+            return results
+
+        # numpy yoksa saf Python ile satır satır nokta çarpımı
+        results = []
+        for qv in query_vecs:
+            scored = []
+            for i in rows:
+                row = self._matrix[i * self.dim:(i + 1) * self.dim]
+                scored.append((i, sum(a * b for a, b in zip(row, qv))))
+            scored.sort(key=lambda x: x[1], reverse=True)
+            results.append(scored[:top_k])
+        return results
+
+    def save(self, path: str):
+        """Matrisi ham float32 dosyası olarak kaydeder"""
+        self._materialize()
+        with open(path, 'wb') as f:
+            self._matrix.tofile(f)
+
+    def load(self, path: str):
+        """
+        Kaydedilmiş matrisi yükler. numpy varsa dosya belleğe eşlenir (mmap),
+        böylece matris süreç belleğine kopyalanmaz.
+        """
+        if NUMPY_AVAILABLE:
+            _load_numpy()
+            self._np_matrix = np.memmap(path, dtype=np.float32, mode='r').reshape(-1, self.dim)
+            self.count = self._np_matrix.shape[0]
+            self._matrix = array('f')
+            return
+
+        self._matrix = array('f')
+        with open(path, 'rb') as f:
+            self._matrix.frombytes(f.read())
+        self.count = len(self._matrix) // self.dim
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[int]:
+    """Birden fazla sıralamayı Reciprocal Rank Fusion ile birleştirir"""
+    scores: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, idx in enumerate(ranking):
+            scores[idx] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -4,26 +4,116 @@ PDF, DOCX ve XLSX dosyalarını okuyup işler.
 """
 
 import os
-from typing import List, Dict, Optional
+import re
+import threading
+from typing import List, Dict, Optional, Iterable, Iterator, Any, Tuple
+from collections import defaultdict, OrderedDict
 import hashlib
+from importlib.util import find_spec
 
-try:
-    from PyPDF2 import PdfReader
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
+from dense_retriever import DenseRetriever, reciprocal_rank_fusion
+from chunk_store import ChunkStore
+from passage_extractor import extract_passages, DEFAULT_TOKEN_BUDGET
 
-try:
-    from docx import Document
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
+# Okuyucu kütüphaneler sadece kurulu olup olmadıklarına bakılarak işaretlenir;
+# asıl import ilgili dosya tipi ilk okunduğunda yapılır (hızlı başlangıç için).
+PDF_AVAILABLE = find_spec("PyPDF2") is not None
+DOCX_AVAILABLE = find_spec("docx") is not None
+XLSX_AVAILABLE = find_spec("openpyxl") is not None
 
-try:
-    import openpyxl
-    XLSX_AVAILABLE = True
-except ImportError:
-    XLSX_AVAILABLE = False
+
+# Tam eşleşme ile aranacak anahtar sütunlar: alan adı -> olası başlıklar
+KEY_COLUMN_ALIASES = {
+    "part_number": ["parça no", "parça numarası", "parça kodu", "part number",
+                    "part no", "part", "oem", "oem no", "stok kodu"],
+    "model": ["model", "araç modeli", "model adı", "vehicle model"],
+    "price": ["fiyat", "birim fiyat", "satış fiyatı", "price", "unit price", "tutar"],
+}
+
+
+def _normalize_header(header: str) -> str:
+    """Sütun başlığını karşılaştırma için sadeleştirir"""
+    return re.sub(r'[\s_.:]+', ' ', header.lower()).strip()
+
+
+def _normalize_key(value: Any) -> str:
+    """Anahtar sütun değerini indeks anahtarına çevirir"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip().lower()
+
+
+def format_context(chunks: List[Dict[str, Any]]) -> str:
+    """Chunk'ları / pasajları LLM'e verilecek bağlam metnine çevirir (depoya erişmez)"""
+    context_parts = []
+    for doc in chunks:
+        context_parts.append(f"[Kaynak: {doc['source']}]\n{doc['content']}")
+    
+    return "\n\n---\n\n".join(context_parts)
+
+
+def _normalize_query(query: str) -> str:
+    """Sorguyu önbellek anahtarına çevirir (büyük/küçük harf ve boşluklar önemsiz)"""
+    return " ".join(query.lower().split())
+
+
+# Chunk içeriğini (ör. bölüm yolu) veya kayıt biçimini değiştiren düzeltmelerde artırılır; diskteki
+# indeks önbellekleri bu sürümle eşleşmezse dokümanlar yeniden işlenir
+CHUNK_FORMAT_VERSION = 3
+
+# DOCX'te başlık sayılmayan, bölüm içi etiket satırları
+DOCX_INLINE_LABELS = {"nedeni", "nedenler", "olası nedenler", "çözüm", "çözümü", "çözümler"}
+
+# "3. Başlık" / "3) Başlık" biçimindeki numaralı satırlar
+_DOCX_NUMBERED = re.compile(r'(\d+)[.)]\s+\S')
+
+
+class _DocxOutline:
+    """
+    DOCX başlık hiyerarşisi. Stilli başlıklar seviyelerine göre yerleşir; stilsiz
+    dokümanlarda:
+    - "Başlık:" satırları stilli başlıkların altındaki en üst seviyeye döner
+    - "###" başlıkları bulundukları bölüme göredir: aynı sayıda # kardeştir,
+      daha fazla # alt bölümdür
+    - Numaralı maddeler en yakın numarasız başlığın altına girer; "N." maddesi
+      "N-1." maddesinin devamıysa (arada başka etiketler olsa da) onunla kardeştir
+    """
+    
+    def __init__(self):
+        self.stack: List[Tuple[str, int, str]] = []
+        self.last_number: Optional[int] = None
+        self.number_parent: List[Tuple[str, int, str]] = []
+    
+    def push(self, kind: str, rank: int, title: str) -> List[str]:
+        """Başlığı ekler ve güncel bölüm yolunu döndürür"""
+        stack = self.stack
+        if kind == "style":
+            while stack and not (stack[-1][0] == "style" and stack[-1][1] < rank):
+                stack.pop()
+        elif kind == "top":
+            while stack and stack[-1][0] != "style":
+                stack.pop()
+        elif kind == "md":
+            while stack and (stack[-1][0] == "num" or (stack[-1][0] == "md" and stack[-1][1] >= rank)):
+                stack.pop()
+        else:
+            if self.last_number is not None and rank == self.last_number + 1:
+                stack[:] = self.number_parent
+            else:
+                while stack and stack[-1][0] == "num":
+                    stack.pop()
+            self.last_number = rank
+            self.number_parent = list(stack)
+        
+        stack.append((kind, rank, title))
+        return [entry[2] for entry in stack]
+
+
+_KEY_COLUMN_LOOKUP = {
+    _normalize_header(alias): field
+    for field, aliases in KEY_COLUMN_ALIASES.items()
+    for alias in aliases
+}
 
 
 class DocumentProcessor:
@@ -37,66 +127,265 @@ class DocumentProcessor:
         if not os.path.exists(documents_folder):
             os.makedirs(documents_folder)
     
+    # Hash hesaplanırken okunan blok boyutu (byte)
+    HASH_BLOCK_SIZE = 1024 * 1024
+    
     def get_file_hash(self, filepath: str) -> str:
-        """Dosyanın MD5 hash'ini hesaplar"""
+        """Dosyanın MD5 hash'ini sabit boyutlu bloklar halinde okuyarak hesaplar"""
         try:
+            md5 = hashlib.md5()
             with open(filepath, 'rb') as f:
-                return hashlib.md5(f.read()).hexdigest()
+                for block in iter(lambda: f.read(self.HASH_BLOCK_SIZE), b""):
+                    md5.update(block)
+            return md5.hexdigest()
         except Exception:
             return ""
     
-    def extract_text_from_pdf(self, filepath: str) -> str:
-        """PDF dosyasından metin çıkarır"""
+    def iter_pdf_pages(self, filepath: str) -> Iterator[str]:
+        """PDF sayfalarını ayrıştırıldıkça tek tek döndürür"""
         if not PDF_AVAILABLE:
-            return ""
+            return
         
         try:
-            reader = PdfReader(filepath)
-            text = ""
-            for page in reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n\n"
-            return text.strip()
+            from PyPDF2 import PdfReader
+            with open(filepath, 'rb') as f:
+                reader = PdfReader(f)
+                for page in reader.pages:
+                    page_text = page.extract_text()
+                    if page_text:
+                        yield page_text
         except Exception as e:
             print(f"PDF okuma hatası ({filepath}): {e}")
-            return ""
     
-    def extract_text_from_docx(self, filepath: str) -> str:
-        """DOCX dosyasından metin çıkarır"""
+    def extract_text_from_pdf(self, filepath: str) -> str:
+        """PDF dosyasından metin çıkarır"""
+        return "\n\n".join(self.iter_pdf_pages(filepath)).strip()
+    
+    def _docx_heading(self, paragraph, text: str,
+                      next_text: Optional[str]) -> Optional[Tuple[str, int]]:
+        """
+        Paragraf başlıksa (tür, derece), değilse None döndürür. Türler:
+        style (Heading N stili), md ("### Başlık"), num ("3. Başlık"),
+        top (stilsiz dokümanlarda "Başlık:" ya da numaralı listeden önceki başlık satırı)
+        """
+        style_name = (paragraph.style.name if paragraph.style is not None else "") or ""
+        match = re.match(r'(?:heading|başlık)\s*(\d+)', style_name.lower())
+        if match:
+            return "style", int(match.group(1))
+        if style_name.lower() == "title":
+            return "style", 1
+        
+        # Stil kullanılmayan dokümanlar için satır biçimine bakılır
+        match = re.match(r'(#+)\s+', text)
+        if match:
+            return "md", len(match.group(1))
+        if len(text) >= 100:
+            return None
+        
+        number = _DOCX_NUMBERED.match(text)
+        if text.endswith(':'):
+            if text.rstrip(':').strip().lower() in DOCX_INLINE_LABELS:
+                return None
+            return ("num", int(number.group(1))) if number else ("top", 1)
+        
+        if text[-1] in ".!?,;":
+            return None
+        next_number = _DOCX_NUMBERED.match(next_text or "")
+        if number:
+            # Art arda numaralı satırlar başlık değil, adım listesidir
+            return None if next_number else ("num", int(number.group(1)))
+        # "Elektrik ve Akü" gibi iki noktasız bölüm başlığı: ardından "1." maddesi gelir
+        if next_number and next_number.group(1) == "1" and len(text) < 60:
+            return "top", 1
+        return None
+    
+    def iter_docx_blocks(self, filepath: str) -> Iterator[Dict[str, Any]]:
+        """
+        DOCX gövdesini doküman sırasıyla dolaşır; paragrafları ve tablo
+        satırlarını, bağlı oldukları başlık hiyerarşisiyle birlikte döndürür.
+        """
         if not DOCX_AVAILABLE:
-            return ""
+            return
         
         try:
+            from docx import Document
+            from docx.oxml.ns import qn
+            from docx.table import Table
+            from docx.text.paragraph import Paragraph
             doc = Document(filepath)
-            text = ""
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text += paragraph.text + "\n\n"
-            return text.strip()
         except Exception as e:
             print(f"DOCX okuma hatası ({filepath}): {e}")
-            return ""
+            return
+        
+        # Başlık tespiti bir sonraki paragrafa bakar; boş paragraflar atlanır
+        elements = []
+        for element in doc.element.body.iterchildren():
+            if element.tag == qn('w:p'):
+                paragraph = Paragraph(element, doc)
+                text = paragraph.text.strip()
+                if text:
+                    elements.append((element, paragraph, text))
+            elif element.tag == qn('w:tbl'):
+                elements.append((element, None, None))
+        
+        outline = _DocxOutline()
+        headings: List[str] = []
+        for i, (element, paragraph, text) in enumerate(elements):
+            if paragraph is not None:
+                next_text = elements[i + 1][2] if i + 1 < len(elements) else None
+                heading = self._docx_heading(paragraph, text, next_text)
+                if heading:
+                    title = text.lstrip('#').strip().rstrip(':').strip()
+                    headings = outline.push(heading[0], heading[1], title)
+                    yield {"type": "heading", "text": text, "headings": list(headings)}
+                else:
+                    yield {"type": "paragraph", "text": text, "headings": list(headings)}
+            
+            else:
+                table = Table(element, doc)
+                header: Optional[List[str]] = None
+                for row in table.rows:
+                    cells = [cell.text.strip() for cell in row.cells]
+                    if not any(cells):
+                        continue
+                    if header is None:
+                        header = [cell or f"Sütun {col + 1}" for col, cell in enumerate(cells)]
+                        continue
+                    
+                    fields: Dict[str, Any] = {}
+                    keys: Dict[str, str] = {}
+                    for col, cell in enumerate(cells):
+                        if not cell:
+                            continue
+                        name = header[col] if col < len(header) else f"Sütun {col + 1}"
+                        fields[name] = cell
+                        key_field = _KEY_COLUMN_LOOKUP.get(_normalize_header(name))
+                        if key_field:
+                            keys[key_field] = _normalize_key(cell)
+                    
+                    yield {
+                        "type": "table_row",
+                        "text": self.format_record(fields),
+                        "headings": list(headings),
+                        "fields": fields,
+                        "keys": keys
+                    }
     
-    def extract_text_from_xlsx(self, filepath: str) -> str:
-        """XLSX dosyasından metin çıkarır"""
+    def extract_text_from_docx(self, filepath: str) -> str:
+        """DOCX dosyasından metin çıkarır (tablolar dahil)"""
+        return "\n\n".join(block["text"] for block in self.iter_docx_blocks(filepath)).strip()
+    
+    def iter_docx_chunks(self, filepath: str) -> Iterator[Dict[str, Any]]:
+        """
+        DOCX'i bölüm sınırlarından chunk'lara böler. Her tablo satırı
+        kendi başına bir chunk olur; chunk'lara bölüm yolu eklenir.
+        """
+        filename = os.path.basename(filepath)
+        index = 0
+        section: List[str] = []
+        paragraphs: List[str] = []
+        
+        def make_chunk(content: str, headings: List[str], **extra) -> Dict[str, Any]:
+            section_title = " > ".join(headings)
+            chunk = {
+                "content": f"[{section_title}]\n{content}" if section_title else content,
+                "source": filename,
+                "chunk_id": f"{filename}_{index}",
+                "section": section_title
+            }
+            chunk.update(extra)
+            return chunk
+        
+        for block in self.iter_docx_blocks(filepath):
+            # Bölüm değişiminde veya tablo satırından önce biriken metni chunk'la
+            section_changed = block["headings"] != section
+            if paragraphs and (section_changed or block["type"] == "table_row"):
+                for chunk in self.iter_chunks(paragraphs):
+                    yield make_chunk(chunk, section)
+                    index += 1
+                paragraphs = []
+            section = block["headings"]
+            
+            if block["type"] == "paragraph":
+                paragraphs.append(block["text"] + "\n\n")
+            elif block["type"] == "table_row":
+                yield make_chunk(block["text"], section,
+                                 fields=block["fields"], keys=block["keys"])
+                index += 1
+        
+        if paragraphs:
+            for chunk in self.iter_chunks(paragraphs):
+                yield make_chunk(chunk, section)
+                index += 1
+    
+    def iter_xlsx_rows(self, filepath: str) -> Iterator[Dict[str, Any]]:
+        """
+        XLSX satırlarını salt-okunur modda tembel olarak okur.
+        Her sayfanın ilk dolu satırı başlık kabul edilir; sonraki her satır
+        başlık adlarıyla eşlenmiş bir kayıt olarak döndürülür.
+        """
         if not XLSX_AVAILABLE:
-            return ""
+            return
         
         try:
-            workbook = openpyxl.load_workbook(filepath)
-            text = ""
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                text += f"\n[Sayfa: {sheet_name}]\n"
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = " | ".join(str(cell) if cell is not None else "" for cell in row)
-                    if row_text.strip():
-                        text += row_text + "\n"
-            return text.strip()
+            import openpyxl
+            workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
         except Exception as e:
             print(f"XLSX okuma hatası ({filepath}): {e}")
-            return ""
+            return
+        
+        try:
+            for sheet in workbook.worksheets:
+                headers: Optional[List[str]] = None
+                for row_number, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+                    if not any(cell is not None and str(cell).strip() for cell in row):
+                        continue
+                    
+                    if headers is None:
+                        headers = [
+                            str(cell).strip() if cell is not None and str(cell).strip()
+                            else f"Sütun {i + 1}"
+                            for i, cell in enumerate(row)
+                        ]
+                        continue
+                    
+                    fields: Dict[str, Any] = {}
+                    keys: Dict[str, str] = {}
+                    for i, cell in enumerate(row):
+                        if cell is None or not str(cell).strip():
+                            continue
+                        header = headers[i] if i < len(headers) else f"Sütun {i + 1}"
+                        fields[header] = cell
+                        key_field = _KEY_COLUMN_LOOKUP.get(_normalize_header(header))
+                        if key_field:
+                            keys[key_field] = _normalize_key(cell)
+                    
+                    yield {
+                        "sheet": sheet.title,
+                        "row": row_number,
+                        "fields": fields,
+                        "keys": keys
+                    }
+        except Exception as e:
+            print(f"XLSX okuma hatası ({filepath}): {e}")
+        finally:
+            workbook.close()
+    
+    def format_record(self, fields: Dict[str, Any], sheet: str = "") -> str:
+        """Alan adlı satır kaydını aranabilir metne çevirir"""
+        row_text = " | ".join(f"{name}: {value}" for name, value in fields.items())
+        return f"[Sayfa: {sheet}] {row_text}" if sheet else row_text
+    
+    def extract_text_from_xlsx(self, filepath: str) -> str:
+        """XLSX dosyasından metin çıkarır"""
+        lines = []
+        current_sheet = None
+        for record in self.iter_xlsx_rows(filepath):
+            if record["sheet"] != current_sheet:
+                current_sheet = record["sheet"]
+                lines.append(f"\n[Sayfa: {current_sheet}]")
+            lines.append(self.format_record(record["fields"]))
+        return "\n".join(lines).strip()
     
     def extract_text(self, filepath: str) -> str:
         """Dosya tipine göre metin çıkarır"""
@@ -111,6 +400,18 @@ class DocumentProcessor:
         else:
             return ""
     
+    def iter_text(self, filepath: str) -> Iterator[str]:
+        """Dosya tipine göre metni parça parça döndürür (PDF için sayfa sayfa)"""
+        filename = os.path.basename(filepath).lower()
+        
+        if filename.endswith('.pdf'):
+            for page_text in self.iter_pdf_pages(filepath):
+                yield page_text + "\n\n"
+        else:
+            text = self.extract_text(filepath)
+            if text:
+                yield text
+    
     def get_all_documents(self) -> List[str]:
         """Dokümanlar klasöründeki tüm desteklenen dosyaları listeler"""
         documents = []
@@ -148,88 +449,500 @@ class DocumentProcessor:
     
     def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
         """Metni küçük parçalara böler"""
-        chunks = []
-        start = 0
-        text_length = len(text)
+        return list(self.iter_chunks([text], chunk_size, overlap))
+    
+    def iter_chunks(self, blocks: Iterable[str], chunk_size: int = 1000,
+                    overlap: int = 200) -> Iterator[str]:
+        """
+        Metin bloklarını (ör. PDF sayfaları) akış halinde chunk'lara böler.
+        Tamponda en fazla bir chunk ve bir blok kadar metin tutulur.
+        """
+        buffer = ""
+        for block in blocks:
+            buffer += block
+            start = 0
+            # Tamamlanmış chunk'ları hemen üret, kalan kuyruğu tamponda tut
+            while len(buffer) - start > chunk_size:
+                end = self._chunk_end(buffer, start, chunk_size)
+                chunk = buffer[start:end].strip()
+                if chunk:
+                    yield chunk
+                start = max(end - overlap, start + 1)
+            buffer = buffer[start:]
         
-        while start < text_length:
-            end = start + chunk_size
+        # Son parça(lar)
+        start = 0
+        while start < len(buffer):
+            end = self._chunk_end(buffer, start, chunk_size)
+            chunk = buffer[start:end].strip()
+            if chunk:
+                yield chunk
+            if end >= len(buffer):
+                break
+            start = max(end - overlap, start + 1)
+    
+    def _chunk_end(self, text: str, start: int, chunk_size: int) -> int:
+        """Chunk bitişini belirler, kelime ortasında bölmemeye çalışır"""
+        end = start + chunk_size
+        if end < len(text):
+            last_space = text.rfind(' ', start, end)
+            if last_space > start:
+                end = last_space
+        return end
+    
+    def iter_document_chunks(self) -> Iterator[Dict[str, Any]]:
+        """
+        Dokümanları dosya dosya okuyup chunk'ları üretildikçe döndürür.
+        Tüm doküman metni hiçbir zaman bellekte birleştirilmez.
+        """
+        for filepath in self.get_all_documents():
+            filename = os.path.basename(filepath)
+            file_hash = self.get_file_hash(filepath)
             
-            # Kelime ortasında bölmemeye çalış
-            if end < text_length:
-                last_space = text.rfind(' ', start, end)
-                if last_space > start:
-                    end = last_space
+            # Dosya zaten işlenmiş mi kontrol et
+            if filename in self.processed_files and self.processed_files[filename] == file_hash:
+                continue
             
-            chunks.append(text[start:end].strip())
-            start = end - overlap
+            produced = False
+            for chunk in self.iter_file_chunks(filepath):
+                produced = True
+                yield chunk
+            
+            if produced:
+                self.processed_files[filename] = file_hash
+    
+    def iter_file_chunks(self, filepath: str) -> Iterator[Dict[str, Any]]:
+        """Tek bir dosyanın chunk'larını üretir"""
+        filename = os.path.basename(filepath)
+        
+        if filename.lower().endswith('.xlsx'):
+            # Tablolarda her satır ayrı, alan adlı bir kayıt olur
+            for i, record in enumerate(self.iter_xlsx_rows(filepath)):
+                yield {
+                    "content": self.format_record(record["fields"], record["sheet"]),
+                    "source": filename,
+                    "chunk_id": f"{filename}_{i}",
+                    "fields": record["fields"],
+                    "keys": record["keys"]
+                }
+            return
         
-        return chunks
+        if filename.lower().endswith('.docx'):
+            yield from self.iter_docx_chunks(filepath)
+            return
+        
+        for i, chunk in enumerate(self.iter_chunks(self.iter_text(filepath))):
+            yield {
+                "content": chunk,
+                "source": filename,
+                "chunk_id": f"{filename}_{i}"
+            }
     
-    def get_document_chunks(self) -> List[Dict[str, str]]:
+    def get_document_chunks(self) -> List[Dict[str, Any]]:
         """Tüm dokümanları chunk'lara böler"""
-        all_chunks = []
-        documents = self.process_all_documents()
-        
-        for doc in documents:
-            chunks = self.chunk_text(doc["content"])
-            for i, chunk in enumerate(chunks):
-                all_chunks.append({
-                    "content": chunk,
-                    "source": doc["filename"],
-                    "chunk_id": f"{doc['filename']}_{i}"
-                })
-        
-        return all_chunks
+        return list(self.iter_document_chunks())
 
 
 class SimpleDocumentStore:
     """Basit doküman deposu ve arama"""
     
-    def __init__(self):
-        self.documents: List[Dict[str, str]] = []
+    # Chunk etiketlemede sınıflandırıcıya tek seferde gönderilen chunk sayısı
+    INTENT_BATCH_SIZE = 64
+    # Bir chunk'a verilecek en fazla intent etiketi ve asgari skor
+    CHUNK_INTENTS = 2
+    CHUNK_INTENT_MIN_SCORE = 0.05
+    # Sorgu intent güveni bunun altındaysa tüm derlemde aranır
+    INTENT_FILTER_MIN_SCORE = 0.2
+    # Etiketlenemeyen chunk'ların bölümü (her filtreli aramaya dahil edilir)
+    GENERAL_PARTITION = "genel"
+    # Araba ile ilgisi olmayan, bölüm anahtarı olarak kullanılmayan intent'ler
+    NON_PARTITION_INTENTS = {"selamlama", "kapsam_disi"}
+    # Önbellekte tutulan en fazla sorgu sonucu (bağlam sorguları ve metinleri)
+    RESULT_CACHE_SIZE = 256
+    # LLM'e verilen doküman bağlamının token bütçesi
+    CONTEXT_TOKEN_BUDGET = DEFAULT_TOKEN_BUDGET
     
-    def add_documents(self, chunks: List[Dict[str, str]]):
-        """Doküman chunk'larını ekler"""
-        self.documents.extend(chunks)
+    def __init__(self, dense: bool = False, intent_classifier=None,
+                 cache_size: Optional[int] = None):
+        """
+        Args:
+            dense: True ise anahtar kelime aramasına ek olarak yerel gömme
+                   vektörleriyle anlamsal arama yapılır ve sonuçlar birleştirilir
+            intent_classifier: Verilirse chunk'lar eklenirken intent ile
+                   etiketlenir ve aramalar sorgunun intent bölümüyle sınırlanır
+            cache_size: Sonuç önbelleğinin boyutu (None ise RESULT_CACHE_SIZE,
+                   0 ise önbellek kapalı)
+        """
+        # Chunk'lar sütunlar halinde tutulur; elemanlar sözlük gibi okunan görünümlerdir
+        self.documents = ChunkStore()
+        # Anahtar sütun değeri (parça no, model, fiyat) -> doküman indeksleri
+        self.key_index: Dict[str, List[int]] = defaultdict(list)
+        # Intent -> o intent ile etiketlenmiş doküman indeksleri
+        self.partitions: Dict[str, List[int]] = defaultdict(list)
+        self.intent_classifier = intent_classifier
+        
+        self.dense_retriever = None
+        if dense:
+            self.dense_retriever = DenseRetriever()
+        
+        # Arka planda doküman eklenirken aramalar tutarlı bir görünüm görsün diye
+        # değişiklikler ve aramalar kilit altında yapılır
+        self._lock = threading.RLock()
+        # İçerik her değiştiğinde artar (oturumlar DTC indeksini buna göre eşitler)
+        self.version = 0
+        
+        # Sorgu -> sıralı chunk indeksleri / bağlam metni (LRU). Sonuçlar
+        # üretildikleri sürüme aittir; sürüm değişince önbellek boşaltılır
+        self.cache_size = self.RESULT_CACHE_SIZE if cache_size is None else cache_size
+        self._result_cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._cache_version = self.version
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def add_documents(self, chunks: Iterable[Dict[str, Any]]):
+        """
+        Doküman chunk'larını ekler (liste veya generator kabul eder).
+        Dosya okuma kilitsiz yapılır; kilit sadece her INTENT_BATCH_SIZE'lık
+        grubun indekse eklenmesi sırasında tutulur.
+        """
+        batch: List[Dict[str, Any]] = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= self.INTENT_BATCH_SIZE:
+                self._add_batch(batch)
+                batch = []
+        
+        if batch:
+            self._add_batch(batch)
+    
+    def _add_batch(self, chunks: List[Dict[str, Any]]):
+        """Bir grup chunk'ı indekslere ekleyip etiketler"""
+        with self._lock:
+            start = len(self.documents)
+            for idx, chunk in enumerate(chunks, start):
+                self.documents.append(chunk)
+                for value in chunk.get("keys", {}).values():
+                    if value:
+                        self.key_index[value].append(idx)
+            if self.dense_retriever is not None:
+                self.dense_retriever.add_texts(chunk["content"] for chunk in chunks)
+            self._label_batch(list(range(start, len(self.documents))))
+            self.version += 1
+    
+    def _label_batch(self, indices: List[int]):
+        """Chunk'ları intent ile etiketleyip bölümlere ayırır"""
+        if self.intent_classifier is None:
+            return
+        
+        texts = [self.documents.content(idx) for idx in indices]
+        for idx, (_, _, scores) in zip(indices, self.intent_classifier.classify_batch(texts)):
+            ranked = sorted(
+                (item for item in scores.items()
+                 if item[0] not in self.NON_PARTITION_INTENTS and item[1] >= self.CHUNK_INTENT_MIN_SCORE),
+                key=lambda x: x[1], reverse=True
+            )
+            intents = [intent for intent, _ in ranked[:self.CHUNK_INTENTS]] or [self.GENERAL_PARTITION]
+            self.documents.set_intents(idx, intents)
+            for intent in intents:
+                self.partitions[intent].append(idx)
+    
+    def save(self, folder: str):
+        """
+        Chunk'ları (intent etiketleriyle) ve dense matrisi klasöre kaydeder.
+        load ile chunk'lar yeniden işlenmeden / etiketlenmeden geri yüklenir.
+        """
+        os.makedirs(folder, exist_ok=True)
+        with self._lock:
+            self.documents.save(folder)
+            if self.dense_retriever is not None:
+                self.dense_retriever.save(os.path.join(folder, "dense.f32"))
+                # Sorgular, matrisi üreten projeksiyonla gömülür
+                self.dense_retriever.embedder.save_projection(os.path.join(folder, "dense_projection.json"),
+                                                              os.path.join(folder, "dense_projection.f32"))
+    
+    def load(self, folder: str):
+        """save ile kaydedilen depoyu yükler (içerikler, dense matris ve projeksiyon belleğe eşlenir)"""
+        documents = ChunkStore.load(folder)
+        
+        with self._lock:
+            self.clear()
+            self.documents = documents
+            for idx, chunk in enumerate(documents):
+                for value in chunk.get("keys", {}).values():
+                    if value:
+                        self.key_index[value].append(idx)
+                for intent in documents.intents(idx):
+                    self.partitions[intent].append(idx)
+            
+            dense_path = os.path.join(folder, "dense.f32")
+            if self.dense_retriever is not None and os.path.exists(dense_path):
+                projection_path = os.path.join(folder, "dense_projection.json")
+                if os.path.exists(projection_path):
+                    embedder = self.dense_retriever.embedder
+                    embedder.load_projection(projection_path, os.path.join(folder, "dense_projection.f32"))
+                    self.dense_retriever.dim = embedder.dim
+                self.dense_retriever.load(dense_path)
     
     def clear(self):
         """Tüm dokümanları temizler"""
-        self.documents = []
+        with self._lock:
+            self.documents = ChunkStore()
+            self.key_index = defaultdict(list)
+            self.partitions = defaultdict(list)
+            if self.dense_retriever is not None:
+                self.dense_retriever.clear()
+            self.version += 1
+
+    def memory_bytes(self) -> int:
+        """Chunk'lar, dense matris ve indekslerin yaklaşık bellek kullanımı (byte)"""
+        with self._lock:
+            total = self.documents.memory_bytes()
+            if self.dense_retriever is not None:
+                total += self.dense_retriever.count * self.dense_retriever.dim * 4
+            # İndeks listelerindeki her eleman bir işaretçi (8 byte)
+            total += 8 * sum(len(ids) for ids in self.key_index.values())
+            total += 8 * sum(len(ids) for ids in self.partitions.values())
+            return total
+
+    def swap_contents(self, other: "SimpleDocumentStore"):
+        """Başka bir depoda (ör. arka planda) hazırlanan indeksi tek adımda devreye alır"""
+        with self._lock:
+            self.documents = other.documents
+            self.key_index = other.key_index
+            self.partitions = other.partitions
+            self.dense_retriever = other.dense_retriever
+            self.version += 1
     
-    def search(self, query: str, top_k: int = 5) -> List[Dict[str, str]]:
-        """Basit anahtar kelime araması yapar"""
-        if not self.documents:
-            return []
-        
-        query_words = set(query.lower().split())
+    def get_candidates(self, intent: Optional[str]) -> Optional[List[int]]:
+        """Intent bölümündeki doküman indekslerini döndürür (None = tüm derlem)"""
+        if not intent or intent not in self.partitions:
+            return None
+        return sorted(set(self.partitions[intent]) | set(self.partitions.get(self.GENERAL_PARTITION, [])))
+    
+    def detect_intent(self, query: str) -> Optional[str]:
+        """Sorgunun intent'ini bulur; güven düşükse None döndürür"""
+        if self.intent_classifier is None or not self.partitions:
+            return None
+        intent, score, _ = self.intent_classifier.classify(query)
+        if intent in self.NON_PARTITION_INTENTS or score < self.INTENT_FILTER_MIN_SCORE:
+            return None
+        return intent
+    
+    def lookup(self, value: str, field: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Anahtar sütun değeri ile tam eşleşen kayıtları döndürür"""
+        results = []
+        with self._lock:
+            for idx in self.key_index.get(_normalize_key(value), []):
+                doc = self.documents[idx]
+                if field is None or field in doc.get("keys", {}):
+                    results.append(doc)
+        return results
+    
+    def _exact_matches(self, query_words: Iterable[str]) -> List[int]:
+        """Sorgu kelimelerinden anahtar sütunlarla tam eşleşenlerin indeksleri"""
+        matches = []
+        if self.key_index:
+            for word in query_words:
+                for idx in self.key_index.get(word.strip(".,;:!?()\"'"), []):
+                    if idx not in matches:
+                        matches.append(idx)
+        return matches
+    
+    def _lexical_rank(self, query_words: Iterable[str],
+                      candidates: Optional[List[int]] = None) -> List[int]:
+        """Anahtar kelime örtüşmesine göre sıralanmış doküman indeksleri"""
         scored_docs = []
         
-        for doc in self.documents:
-            content_lower = doc["content"].lower()
+        indices = range(len(self.documents)) if candidates is None else candidates
+        for idx in indices:
+            content_lower = self.documents.content(idx).lower()
             score = sum(1 for word in query_words if word in content_lower)
             if score > 0:
-                scored_docs.append((score, doc))
+                scored_docs.append((score, idx))
         
         # Skora göre sırala
         scored_docs.sort(key=lambda x: x[0], reverse=True)
         
-        return [doc for _, doc in scored_docs[:top_k]]
+        return [idx for _, idx in scored_docs]
     
-    def get_context(self, query: str, top_k: int = 3) -> str:
-        """Sorgu için ilgili bağlamı döndürür"""
-        results = self.search(query, top_k)
-        if not results:
-            return ""
+    def search(self, query: str, top_k: int = 5, intent: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Doküman araması yapar: önce anahtar sütunlarda tam eşleşme, ardından
+        anahtar kelime araması (dense açıksa anlamsal arama ile birleştirilmiş)
+        
+        Args:
+            intent: Verilirse sadece bu intent bölümündeki chunk'larda aranır
+        """
+        with self._lock:
+            return [self.documents[idx] for idx in self._search_ids(query, top_k, intent)]
+    
+    def _search_ids(self, query: str, top_k: int, intent: Optional[str]) -> List[int]:
+        """search'ün kilit altında çalışan gövdesi; sıralı chunk indekslerini döndürür"""
+        if not self.documents:
+            return []
+        
+        query_words = set(query.lower().split())
+        
+        # Önce anahtar sütunlarda tam eşleşme (ör. parça numarası)
+        exact = self._exact_matches(query_words)
+        if len(exact) >= top_k:
+            return exact[:top_k]
+        
+        candidates = self.get_candidates(intent)
+        ranked = self._lexical_rank(query_words, candidates)
+        if self.dense_retriever is not None:
+            dense_ranked = [idx for idx, _ in self.dense_retriever.search(query, top_k * 4, candidates)]
+            ranked = reciprocal_rank_fusion([ranked[:top_k * 4], dense_ranked])
+        
+        # Bölümde sonuç yoksa tüm derleme geri dön
+        if candidates is not None and not ranked and not exact:
+            return self._search_ids(query, top_k, None)
         
-        context_parts = []
-        for doc in results:
-            context_parts.append(f"[Kaynak: {doc['source']}]\n{doc['content']}")
+        results = list(exact)
+        for idx in ranked:
+            if len(results) >= top_k:
+                break
+            if idx not in results:
+                results.append(idx)
         
-        return "\n\n---\n\n".join(context_parts)
+        return results
+    
+    def lexical_search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Sadece anahtar kelime araması yapar (karşılaştırma için)"""
+        with self._lock:
+            ranked = self._lexical_rank(set(query.lower().split()))
+            return [self.documents[idx] for idx in ranked[:top_k]]
+    
+    def get_context_chunks(self, query: str, top_k: int = 3,
+                           intent: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Sorgu için ilgili chunk'ları döndürür. Intent verilmezse sınıflandırıcı ile
+        tespit edilir; güven düşükse tüm derlemde aranır. Tekrarlanan sorgular
+        önbellekten döner.
+        """
+        return self._context_chunks(query, top_k, intent, count=True)
+    
+    def _context_chunks(self, query: str, top_k: int, intent: Optional[str],
+                        count: bool) -> List[Dict[str, Any]]:
+        """get_context_chunks; count=False ise üst katmandan çağrılmıştır ve istatistiğe sayılmaz"""
+        key = self._cache_key("chunks", query, top_k, intent)
+        with self._lock:
+            ids = self._cache_get(key, count)
+            if ids is not None:
+                return [self.documents[idx] for idx in ids]
+        
+        # Sınıflandırma kilit dışında yapılır
+        search_intent = self.detect_intent(query) if intent is None else intent
+        with self._lock:
+            ids = tuple(self._search_ids(query, top_k, search_intent))
+            self._cache_put(key, ids)
+            return [self.documents[idx] for idx in ids]
+    
+    def _cache_key(self, kind: str, query: str, top_k: int, intent: Optional[str]) -> Tuple:
+        """Önbellek anahtarı; intent tespit edilecekse intent modelinin sürümü de dahildir"""
+        model_version = getattr(self.intent_classifier, "version", None) if intent is None else None
+        return (kind, _normalize_query(query), top_k, intent, model_version)
+    
+    def _cache_get(self, key: Tuple, count: bool = True) -> Any:
+        """
+        Önbellekteki sonucu döndürür (yoksa None; kilit altında çağrılır).
+        İsabet / ıskalama sadece dışarıdan gelen sorguda (count=True) sayılır; iç
+        katmanların (metin -> pasaj -> chunk) aramaları aynı sorgunun parçasıdır.
+        """
+        if self._cache_version != self.version:
+            self._result_cache.clear()
+            self._cache_version = self.version
+        value = self._result_cache.get(key)
+        if value is None:
+            if count:
+                self.cache_misses += 1
+            return None
+        self._result_cache.move_to_end(key)
+        if count:
+            self.cache_hits += 1
+        return value
+    
+    def _cache_put(self, key: Tuple, value: Any):
+        """Sonucu önbelleğe ekler, boyut aşılırsa en eskiyi çıkarır (kilit altında çağrılır)"""
+        if self.cache_size <= 0:
+            return
+        if self._cache_version != self.version:
+            self._result_cache.clear()
+            self._cache_version = self.version
+        self._result_cache[key] = value
+        self._result_cache.move_to_end(key)
+        while len(self._result_cache) > self.cache_size:
+            self._result_cache.popitem(last=False)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Sonuç önbelleğinin isabet istatistikleri"""
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+                "size": len(self._result_cache),
+                "max_size": self.cache_size,
+            }
+    
+    def get_context_passages(self, query: str, top_k: int = 3, intent: Optional[str] = None,
+                             max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Sorgu için LLM'e verilecek pasajları döndürür: aynı kaynağın ardışık
+        chunk'ları birleştirilir, her pasajdan sorguyla ilgili pencere alınır ve
+        toplam uzunluk token bütçesini (varsayılan CONTEXT_TOKEN_BUDGET) aşmaz.
+        """
+        return self._context_passages(query, top_k, intent, max_tokens, count=True)
+    
+    def _context_passages(self, query: str, top_k: int, intent: Optional[str],
+                          max_tokens: Optional[int], count: bool) -> List[Dict[str, Any]]:
+        max_tokens = max_tokens or self.CONTEXT_TOKEN_BUDGET
+        key = self._cache_key(f"passages:{max_tokens}", query, top_k, intent)
+        with self._lock:
+            passages = self._cache_get(key, count)
+            if passages is not None:
+                return [dict(passage) for passage in passages]
+            version = self.version
+        
+        chunks = self._context_chunks(query, top_k, intent, count=False)
+        passages = extract_passages(query, chunks, max_tokens)
+        with self._lock:
+            if self.version == version:
+                self._cache_put(key, tuple(dict(passage) for passage in passages))
+        return passages
+    
+    def get_context(self, query: str, top_k: int = 3, intent: Optional[str] = None) -> str:
+        """Sorgu için ilgili bağlamı döndürür (metin de önbelleklenir)"""
+        key = self._cache_key("text", query, top_k, intent)
+        with self._lock:
+            context = self._cache_get(key)
+            if context is not None:
+                return context
+        
+        with self._lock:
+            version = self.version
+        context = format_context(self._context_passages(query, top_k, intent, None, count=False))
+        with self._lock:
+            # Arada doküman eklendiyse metin eski sürüme ait olabilir
+            if self.version == version:
+                self._cache_put(key, context)
+        return context
     
     def get_category_context(self, category: str) -> str:
         """Kategoriye göre ilgili bağlamı döndürür"""
+        return self.get_context(*self._category_query(category))
+    
+    def get_category_chunks(self, category: str) -> List[Dict[str, Any]]:
+        """Kategoriye göre ilgili chunk'ları döndürür"""
+        return self.get_context_chunks(*self._category_query(category))
+    
+    def get_category_passages(self, category: str) -> List[Dict[str, Any]]:
+        """Kategoriye göre LLM'e verilecek pasajları döndürür"""
+        return self.get_context_passages(*self._category_query(category))
+    
+    def _category_query(self, category: str) -> Tuple[str, int, str]:
+        """Kategori için (sorgu, top_k, intent)"""
         # Kategori anahtar kelimeleri
         category_keywords = {
             "motor": "motor motoru çalışmıyor marş ateşleme yakıt benzin dizel",
@@ -241,5 +954,5 @@ class SimpleDocumentStore:
         }
         
         keywords = category_keywords.get(category.lower(), category)
-        return self.get_context(keywords, top_k=5)
+        return keywords, 5, category.lower()
 
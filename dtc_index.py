@@ -0,0 +1,173 @@
+"""
+Arıza Kodu (OBD-II DTC) İndeksi
+Mesajlardaki arıza kodlarını tespit edip tam eşleşme ile çözer.
+"""
+
+import os
+import re
+from typing import List, Dict, Optional, Iterable, Any
+from collections import defaultdict
+
+
+# P: güç aktarma, C: şasi, B: gövde, U: ağ - ardından 4 karakter (ör. P0300, U0100)
+DTC_PATTERN = re.compile(r'\b([PCBU][0-3][0-9A-F]{3})\b', re.IGNORECASE)
+
+# Kod sistem harfine göre gösterilecek kategori
+DTC_SYSTEM_INTENTS = {
+    "P": "motor",
+    "C": "fren",
+    "B": "elektrik",
+    "U": "elektrik"
+}
+
+
+class DTCIndex:
+    """Arıza kodu -> açıklama ve ilgili doküman chunk'ları"""
+
+    # Kod dışında bu kelimelerden oluşan mesajlar "X ne demek?" sorusu sayılır
+    SIMPLE_QUESTION_WORDS = {
+        "ne", "demek", "demektir", "nedir", "anlamı", "anlama", "gelir",
+        "kod", "kodu", "kodları", "hata", "hatası", "arıza", "arızası", "ve",
+        "what", "does", "mean", "means", "is", "code", "error", "and"
+    }
+
+    # Her kod için bağlama eklenecek en fazla doküman chunk'ı
+    MAX_DOCS_PER_CODE = 2
+
+    def __init__(self, table_file: str = "dtc_codes.txt"):
+        """
+        Args:
+            table_file: Yerel arıza kodu tablosu (format: kod|açıklama)
+        """
+        self.table_file = table_file
+        self.table: Dict[str, str] = {}
+        self.doc_entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+        self._load_table()
+
+    def _load_table(self):
+        """Arıza kodu tablosunu dosyadan yükler"""
+        if not os.path.exists(self.table_file):
+            print(f"Uyarı: {self.table_file} bulunamadı!")
+            return
+
+        with open(self.table_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if '|' in line:
+                    code, description = line.split('|', 1)
+                    self.table[code.strip().upper()] = description.strip()
+
+    def find_codes(self, text: str) -> List[str]:
+        """Metindeki arıza kodlarını sırasıyla (tekrarsız) döndürür"""
+        codes = []
+        for match in DTC_PATTERN.finditer(text):
+            code = match.group(1).upper()
+            if code not in codes:
+                codes.append(code)
+        return codes
+
+    def add_documents(self, chunks: Iterable[Dict[str, Any]]):
+        """Doküman chunk'larında geçen arıza kodlarını indeksler"""
+        for chunk in chunks:
+            for code in self.find_codes(chunk["content"]):
+                self.doc_entries[code].append(chunk)
+
+    def clear_documents(self):
+        """Dokümanlardan gelen kayıtları temizler (yerel tablo kalır)"""
+        self.doc_entries = defaultdict(list)
+
+    def lookup(self, code: str) -> Optional[Dict[str, Any]]:
+        """Tek bir arıza kodunu çözer"""
+        code = code.upper()
+        description = self.table.get(code)
+        documents = self.doc_entries.get(code, [])
+        if description is None and not documents:
+            return None
+        return {
+            "code": code,
+            "description": description,
+            "documents": documents[:self.MAX_DOCS_PER_CODE]
+        }
+
+    def get_entries(self, message: str) -> List[Dict[str, Any]]:
+        """Mesajdaki bilinen tüm arıza kodlarının kayıtlarını döndürür"""
+        entries = []
+        for code in self.find_codes(message):
+            entry = self.lookup(code)
+            if entry:
+                entries.append(entry)
+        return entries
+
+    def get_context(self, message: str, include_documents: bool = True) -> str:
+        """
+        Mesajdaki arıza kodları için LLM'e eklenecek bağlamı döndürür.
+
+        Args:
+            include_documents: False ise sadece tablo açıklamaları döner
+                (doküman chunk'ları get_documents ile ayrıca alınabilir)
+        """
+        parts = []
+        for entry in self.get_entries(message):
+            lines = [f"[{entry['code']}] {entry['description'] or 'Tabloda açıklama yok'}"]
+            if include_documents:
+                for doc in entry["documents"]:
+                    lines.append(f"[Kaynak: {doc['source']}]\n{doc['content']}")
+            parts.append("\n".join(lines))
+        return "\n\n".join(parts)
+
+    def get_documents(self, message: str) -> List[Dict[str, Any]]:
+        """Mesajdaki arıza kodlarının geçtiği doküman chunk'larını döndürür"""
+        documents = []
+        for entry in self.get_entries(message):
+            for doc in entry["documents"]:
+                if doc not in documents:
+                    documents.append(doc)
+        return documents
+
+    def get_intent(self, code: str) -> str:
+        """Kodun ait olduğu sisteme göre kategori döndürür"""
+        return DTC_SYSTEM_INTENTS.get(code[:1].upper(), "motor")
+
+    def is_simple_question(self, message: str) -> bool:
+        """Mesaj sadece kod(lar) ve "ne demek" türü kelimelerden mi oluşuyor"""
+        if not self.find_codes(message):
+            return False
+        remainder = DTC_PATTERN.sub(' ', message.lower())
+        words = re.sub(r'[^\w\s]', ' ', remainder).split()
+        return all(word in self.SIMPLE_QUESTION_WORDS for word in words)
+
+    def answer(self, message: str) -> Optional[str]:
+        """
+        Basit "P0300 ne demek?" sorularını LLM'e gitmeden yanıtlar.
+        Kodlardan biri tabloda yoksa None döner (LLM'e bırakılır).
+        """
+        if not self.is_simple_question(message):
+            return None
+
+        codes = self.find_codes(message)
+        if any(code not in self.table for code in codes):
+            return None
+
+        lines = ["🔎 **Arıza Kodu Bilgisi**", ""]
+        for code in codes:
+            lines.append(f"**{code}**: {self.table[code]}")
+        lines.append("")
+        lines.append("Kodu sildirmeden önce nedenini giderin; kod tekrar ediyorsa "
+                     "aracınızı bir serviste kontrol ettirmenizi öneririm. "
+                     "Belirtileri yazarsanız olası çözümleri birlikte inceleyebiliriz. 🚗")
+        return "\n".join(lines)
+
+
+# Test için
+if __name__ == "__main__":
+    index = DTCIndex()
+    print(f"✅ {len(index.table)} arıza kodu yüklendi.\n")
+
+    for message in ["P0300 ne demek?", "p0420", "P0171 kodu var, rölantide titriyor", "Motor ısınıyor"]:
+        print(f"📝 '{message}'")
+        print(f"   ➡️ Kodlar: {index.find_codes(message)}")
+        print(f"   ➡️ Doğrudan yanıt: {'evet' if index.answer(message) else 'hayır'}")
+        print()
@@ -4,12 +4,389 @@ Precision, Recall, F1 Score metrikleri ile değerlendirme yapar.
 """
 
 import os
+import csv
+import json
+import math
+import time
 import random
-from typing import Dict, List, Tuple
-from collections import defaultdict
+import argparse
+from typing import Dict, List, Tuple, Optional, Iterable
+from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
 from intent_classifier import IntentClassifier
 
 
+# Karşılaştırmada varsayılan gerileme sınırları
+MAX_ACCURACY_DROP = 0.01        # en fazla 1 puan doğruluk düşüşü
+MAX_LATENCY_INCREASE = 0.5      # p50 gecikmede en fazla %50 artış
+MIN_LATENCY_DELTA_MS = 0.005    # bunun altındaki gecikme farkları ölçüm gürültüsü sayılır
+
+# Kalibrasyonda denenen sıcaklık ve red eşiği değerleri
+CALIBRATION_TEMPERATURES = [0.01, 0.02, 0.03, 0.04, 0.05, 0.06, 0.08, 0.1, 0.15, 0.2, 0.3, 0.5, 1.0]
+REJECT_THRESHOLDS = [round(0.05 * i, 2) for i in range(2, 20)]
+
+
+def load_intent_file(filepath: str) -> List[Tuple[str, str]]:
+    """intent|cümle formatındaki dosyadan (intent, cümle) listesi yükler"""
+    examples = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '|' not in line:
+                continue
+            intent, text = line.split('|', 1)
+            examples.append((intent.strip().lower(), text.strip()))
+    return examples
+
+
+def reject_metrics(outcomes: List[Tuple[bool, bool]]) -> Dict[str, float]:
+    """(reddedildi_mi, gerçekten_kapsam_dışı_mı) çiftlerinden red metriklerini hesaplar"""
+    tp = sum(1 for rejected, out in outcomes if rejected and out)
+    fp = sum(1 for rejected, out in outcomes if rejected and not out)
+    fn = sum(1 for rejected, out in outcomes if not rejected and out)
+    in_scope = sum(1 for _, out in outcomes if not out)
+    precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
+    recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0.0
+    return {
+        'precision': precision,
+        'recall': recall,
+        'f1_score': f1,
+        'false_reject_rate': fp / in_scope if in_scope else 0.0,
+        'rejected': tp + fp
+    }
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Sıralı olmayan listeden yüzdelik değer hesaplar"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def performance_metrics(latencies_ms: List[float]) -> Dict[str, float]:
+    """Mesaj başına gecikmelerden hız (mesaj/sn) ve gecikme yüzdeliklerini hesaplar"""
+    total_ms = sum(latencies_ms)
+    return {
+        'throughput': len(latencies_ms) / (total_ms / 1000) if total_ms > 0 else 0.0,
+        'mean_ms': total_ms / len(latencies_ms) if latencies_ms else 0.0,
+        'p50_ms': percentile(latencies_ms, 50),
+        'p95_ms': percentile(latencies_ms, 95),
+        'p99_ms': percentile(latencies_ms, 99)
+    }
+
+
+def confusion_metrics(pairs: Iterable[Tuple[str, str]]) -> Dict:
+    """
+    (gerçek, tahmin) çiftlerinden confusion matrix ve tüm metrikleri hesaplar.
+    
+    Çiftler tek geçişte sayılır; sınıf başına TP/FP/FN matrisin satır ve
+    sütun toplamlarından çıkarılır (intent x örnek döngüsü yok).
+    """
+    confusion = Counter(pairs)
+    actual_totals: Dict[str, int] = defaultdict(int)
+    predicted_totals: Dict[str, int] = defaultdict(int)
+    correct = 0
+    for (actual, predicted), count in confusion.items():
+        actual_totals[actual] += count
+        predicted_totals[predicted] += count
+        if actual == predicted:
+            correct += count
+    total = sum(actual_totals.values())
+    intents = sorted(set(actual_totals) | set(predicted_totals))
+    
+    metrics = {}
+    for intent in intents:
+        tp = confusion.get((intent, intent), 0)
+        fp = predicted_totals[intent] - tp
+        fn = actual_totals[intent] - tp
+        
+        precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
+        recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
+        f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0.0
+        
+        metrics[intent] = {
+            'precision': precision,
+            'recall': recall,
+            'f1_score': f1,
+            'support': tp + fn  # Gerçek örneklerin sayısı
+        }
+    
+    n_classes = len(metrics) or 1
+    return {
+        'per_class': metrics,
+        'macro_avg': {
+            'precision': sum(m['precision'] for m in metrics.values()) / n_classes,
+            'recall': sum(m['recall'] for m in metrics.values()) / n_classes,
+            'f1_score': sum(m['f1_score'] for m in metrics.values()) / n_classes
+        },
+        'accuracy': correct / total if total else 0.0,
+        'total_samples': total,
+        'confusion_matrix': {
+            actual: {predicted: confusion.get((actual, predicted), 0) for predicted in intents}
+            for actual in intents
+        }
+    }
+
+
+def stratified_folds(examples: List[Tuple[str, str]], folds: int, seed: int = 42) -> List[int]:
+    """Her örneğin fold numarasını döndürür (her intent'in örnekleri fold'lara sırayla dağıtılır)"""
+    by_intent: Dict[str, List[int]] = defaultdict(list)
+    for idx, (intent, _) in enumerate(examples):
+        by_intent[intent].append(idx)
+    
+    rng = random.Random(seed)
+    fold_of = [0] * len(examples)
+    for intent in sorted(by_intent):
+        indices = by_intent[intent]
+        rng.shuffle(indices)
+        for i, idx in enumerate(indices):
+            fold_of[idx] = i % folds
+    return fold_of
+
+
+def split_fold(examples: List[Tuple[str, str]], fold_of: List[int],
+               fold: int) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """(eğitim, doğrulama) örneklerini döndürür"""
+    train = [example for example, f in zip(examples, fold_of) if f != fold]
+    held_out = [example for example, f in zip(examples, fold_of) if f == fold]
+    return train, held_out
+
+
+def _run_fold(task: Tuple[List[Tuple[str, str]], List[Tuple[str, str]], str, str]) -> Dict:
+    """Bir fold'u eğitip doğrulama örneklerini sınıflandırır (işçi süreçte çalışır)"""
+    train, held_out, engine, features = task
+    start = time.perf_counter()
+    classifier = IntentClassifier(examples=train, calibration_file=None, verbose=False,
+                                  engine=engine, features=features)
+    train_ms = (time.perf_counter() - start) * 1000
+    
+    pairs = []
+    latencies = []
+    for actual, text in held_out:
+        start = time.perf_counter()
+        predicted, _, _ = classifier.classify(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+        pairs.append((actual, predicted))
+    return {'pairs': pairs, 'latencies': latencies, 'train_ms': train_ms}
+
+
+def cross_validate(data_file: str = "intents.txt", folds: int = 5,
+                   workers: Optional[int] = None, engine: str = "centroid",
+                   features: str = "words") -> Dict:
+    """
+    Katmanlı k-fold çapraz doğrulama yapar; fold'lar paralel süreçlerde eğitilip skorlanır.
+    
+    Args:
+        data_file: intent|cümle formatındaki veri
+        folds: Fold sayısı
+        workers: İşçi süreç sayısı (None: CPU sayısı, 1: aynı süreçte sırayla)
+        engine: Sınıflandırma motoru (centroid, nb, logreg)
+        features: Özellik türü (words, char)
+        
+    Returns:
+        Tüm fold'ların tahminlerinden hesaplanan metrikler, fold doğrulukları ve performans
+    """
+    examples = load_intent_file(data_file)
+    fold_of = stratified_folds(examples, folds)
+    tasks = [split_fold(examples, fold_of, fold) + (engine, features) for fold in range(folds)]
+    
+    start = time.perf_counter()
+    if workers == 1:
+        outputs = [_run_fold(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(_run_fold, tasks))
+    wall_ms = (time.perf_counter() - start) * 1000
+    
+    results = confusion_metrics(pair for output in outputs for pair in output['pairs'])
+    fold_accuracy = [
+        sum(1 for actual, predicted in output['pairs'] if actual == predicted) / len(output['pairs'])
+        for output in outputs if output['pairs']
+    ]
+    mean_accuracy = sum(fold_accuracy) / len(fold_accuracy) if fold_accuracy else 0.0
+    
+    results['engine'] = engine
+    results['features'] = features
+    results['folds'] = folds
+    results['fold_accuracy'] = fold_accuracy
+    results['accuracy_std'] = math.sqrt(
+        sum((a - mean_accuracy) ** 2 for a in fold_accuracy) / len(fold_accuracy)
+    ) if fold_accuracy else 0.0
+    results['performance'] = performance_metrics(
+        [ms for output in outputs for ms in output['latencies']]
+    )
+    results['performance']['train_ms'] = sum(o['train_ms'] for o in outputs) / len(outputs)
+    results['performance']['wall_ms'] = wall_ms
+    return results
+
+
+def print_cv_report(results: Dict):
+    """Çapraz doğrulama sonuçlarını yazdırır"""
+    perf = results['performance']
+    
+    print("\n" + "="*70)
+    print(f"🔁 {results['folds']}-FOLD ÇAPRAZ DOĞRULAMA ({results['engine']}, {results['features']})")
+    print("="*70)
+    print(f"   • Accuracy: {results['accuracy']:.2%} (± {results['accuracy_std']:.2%})")
+    print(f"   • Fold'lar: {', '.join(f'{a:.2%}' for a in results['fold_accuracy'])}")
+    print(f"   • Macro F1: {results['macro_avg']['f1_score']:.2%}")
+    print(f"   • Toplam Örnek: {results['total_samples']}")
+    print(f"\n⚡ Performans:")
+    print(f"   • Hız: {perf['throughput']:.0f} mesaj/sn")
+    print(f"   • Gecikme (ms): p50 {perf['p50_ms']:.3f} • p95 {perf['p95_ms']:.3f} • p99 {perf['p99_ms']:.3f}")
+    print(f"   • Fold başına eğitim: {perf['train_ms']:.0f} ms • Toplam süre: {perf['wall_ms']:.0f} ms")
+    
+    print("\n" + "-"*70)
+    print(f"{'Kategori':<20} {'Precision':>12} {'Recall':>12} {'F1 Score':>12} {'Destek':>10}")
+    print("-"*70)
+    for intent, metrics in sorted(results['per_class'].items()):
+        print(f"{intent:<20} {metrics['precision']:>11.2%} {metrics['recall']:>11.2%} {metrics['f1_score']:>11.2%} {metrics['support']:>10}")
+    print("="*70)
+
+
+def save_results_json(results: Dict, filename: str) -> Dict:
+    """Değerlendirme / çapraz doğrulama sonuçlarını JSON olarak kaydeder"""
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"✅ JSON rapor kaydedildi: {filename}")
+    return results
+
+
+def save_results_csv(results: Dict, filename: str):
+    """
+    Sınıf başına metrikleri CSV olarak kaydeder. Her satırın sonunda confusion
+    matrix'in o sınıfa ait satırı (pred_<intent> sütunları) bulunur.
+    """
+    matrix = results.get('confusion_matrix', {})
+    intents = sorted(matrix)
+    with open(filename, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['intent', 'precision', 'recall', 'f1_score', 'support']
+                        + [f"pred_{intent}" for intent in intents])
+        for intent, metrics in sorted(results['per_class'].items()):
+            writer.writerow(
+                [intent, f"{metrics['precision']:.4f}", f"{metrics['recall']:.4f}",
+                 f"{metrics['f1_score']:.4f}", metrics['support']]
+                + [matrix.get(intent, {}).get(predicted, 0) for predicted in intents]
+            )
+    print(f"✅ CSV rapor kaydedildi: {filename}")
+
+
+def compare_runs(baseline: Dict, candidate: Dict,
+                 max_accuracy_drop: float = MAX_ACCURACY_DROP,
+                 max_latency_increase: float = MAX_LATENCY_INCREASE) -> Tuple[bool, List[str]]:
+    """
+    İki değerlendirme sonucunu karşılaştırır.
+    
+    Returns:
+        (gerileme_yok_mu, rapor_satırları)
+    """
+    lines = []
+    ok = True
+    
+    def delta_line(name: str, old: float, new: float, fmt: str, failed: bool) -> str:
+        mark = "❌" if failed else "✅"
+        return f"{mark} {name:<18} {old:{fmt}} → {new:{fmt}} ({new - old:+{fmt}})"
+    
+    # Kalite: doğruluk kapı, macro F1 bilgi amaçlı
+    old_acc, new_acc = baseline['accuracy'], candidate['accuracy']
+    failed = old_acc - new_acc > max_accuracy_drop
+    ok = ok and not failed
+    lines.append(delta_line("Accuracy", old_acc, new_acc, ".2%", failed))
+    old_f1, new_f1 = baseline['macro_avg']['f1_score'], candidate['macro_avg']['f1_score']
+    lines.append(delta_line("Macro F1", old_f1, new_f1, ".2%", False))
+    
+    # Hız: p50 gecikme kapı, p95 bilgi amaçlı
+    old_perf, new_perf = baseline.get('performance', {}), candidate.get('performance', {})
+    if old_perf and new_perf:
+        old_ms, new_ms = old_perf['p50_ms'], new_perf['p50_ms']
+        failed = (new_ms - old_ms > MIN_LATENCY_DELTA_MS
+                  and new_ms > old_ms * (1 + max_latency_increase))
+        ok = ok and not failed
+        lines.append(delta_line("Gecikme p50 (ms)", old_ms, new_ms, ".4f", failed))
+        lines.append(delta_line("Gecikme p95 (ms)", old_perf['p95_ms'], new_perf['p95_ms'], ".4f", False))
+    
+    # Sınıf bazında belirgin F1 düşüşleri (bilgi amaçlı)
+    for intent, metrics in sorted(candidate['per_class'].items()):
+        old_metrics = baseline['per_class'].get(intent)
+        if old_metrics and old_metrics['f1_score'] - metrics['f1_score'] > 0.05:
+            lines.append(f"   ⚠️ {intent}: F1 {old_metrics['f1_score']:.2%} → {metrics['f1_score']:.2%}")
+    
+    return ok, lines
+
+
+def fit_calibration(data_file: str = "intents.txt",
+                    output_file: Optional[str] = "intent_calibration.json",
+                    folds: int = 5, max_false_reject_rate: float = 0.01,
+                    engine: str = "centroid", features: str = "words") -> Dict:
+    """
+    Sıcaklık ve kapsam dışı red eşiğini çevrimdışı öğrenir.
+    
+    Eğitim verisi k parçaya bölünür; her parça diğerleriyle eğitilen modelle
+    skorlanır (fold dışı skorlar). Sıcaklık bu skorlarda negatif log-olabilirliği
+    en aza indirecek şekilde, red eşiği ise araba sorularının en fazla
+    max_false_reject_rate kadarını reddeden en düşük değer olarak seçilir.
+    
+    Returns:
+        Kalibrasyon sözlüğü (output_file verilirse JSON olarak da kaydedilir)
+    """
+    examples = load_intent_file(data_file)
+    fold_of = stratified_folds(examples, folds)
+    
+    # Fold dışı skorlar: (gerçek intent, motorun intent skorları)
+    oof: List[Tuple[str, Dict[str, float]]] = []
+    for fold in range(folds):
+        train, held_out = split_fold(examples, fold_of, fold)
+        classifier = IntentClassifier(examples=train, calibration_file=None, verbose=False,
+                                      engine=engine, features=features)
+        for intent, text in held_out:
+            oof.append((intent, classifier.classify(text)[2]))
+    
+    scorer = IntentClassifier(examples=[], calibration_file=None, verbose=False)
+    
+    def nll(temperature: float) -> float:
+        total = 0.0
+        for intent, scores in oof:
+            probs = scorer.calibrate_scores(scores, temperature)
+            total -= math.log(max(probs.get(intent, 0.0), 1e-12))
+        return total / len(oof)
+    
+    temperature = min(CALIBRATION_TEMPERATURES, key=nll)
+    scorer.temperature = temperature
+    
+    sweep = {}
+    for threshold in REJECT_THRESHOLDS:
+        outcomes = [(scorer.should_reject(scores, threshold), intent == "kapsam_disi")
+                    for intent, scores in oof]
+        sweep[threshold] = reject_metrics(outcomes)
+    
+    # Yanlış red sınırını aşmayan en düşük eşik (en yüksek duyarlılık)
+    eligible = [t for t, m in sweep.items() if m['false_reject_rate'] <= max_false_reject_rate]
+    reject_threshold = min(eligible) if eligible else max(REJECT_THRESHOLDS)
+    
+    calibration = {
+        "engine": engine,
+        "features": features,
+        "temperature": temperature,
+        "reject_threshold": reject_threshold,
+        "nll": round(nll(temperature), 4),
+        "max_false_reject_rate": max_false_reject_rate,
+        "folds": folds,
+        "samples": len(oof),
+        "oof_reject": {k: round(v, 4) for k, v in sweep[reject_threshold].items()}
+    }
+    
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(calibration, f, ensure_ascii=False, indent=2)
+        print(f"✅ Kalibrasyon kaydedildi: {output_file}")
+    
+    return calibration
+
+
 class IntentEvaluator:
     """Intent Classification değerlendirme sınıfı"""
     
@@ -23,6 +400,8 @@ class IntentEvaluator:
         self.test_ratio = test_ratio
         self.test_data: List[Tuple[str, str]] = []
         self.predictions: List[Tuple[str, str, str]] = []  # (text, actual, predicted)
+        self.scores: List[Dict[str, float]] = []  # Her örneğin intent skorları
+        self.results: Dict = {}
         
     def prepare_test_data(self, test_file: str = "test_intents.txt"):
         """Test verisini ayrı dosyadan yükler"""
@@ -87,147 +466,124 @@ class IntentEvaluator:
             self.prepare_test_data()
         
         self.predictions = []
+        self.scores = []
+        latencies = []
         
         # Her test örneği için tahmin yap
         for actual_intent, text in self.test_data:
-            predicted_intent, score, _ = self.classifier.classify(text)
+            start = time.perf_counter()
+            predicted_intent, score, scores = self.classifier.classify(text)
+            latencies.append((time.perf_counter() - start) * 1000)
             self.predictions.append((text, actual_intent, predicted_intent))
+            self.scores.append(scores)
         
         # Metrikleri hesapla
-        return self._calculate_metrics()
+        self.results = self._calculate_metrics()
+        self.results['performance'] = performance_metrics(latencies)
+        return self.results
     
     def _calculate_metrics(self) -> Dict:
         """Precision, Recall, F1 Score hesaplar"""
-        # Tüm intent'leri topla
-        all_intents = set()
-        for _, actual, predicted in self.predictions:
-            all_intents.add(actual)
-            all_intents.add(predicted)
-        
-        # Her intent için TP, FP, FN hesapla
-        metrics = {}
-        
-        for intent in all_intents:
-            tp = 0  # True Positive
-            fp = 0  # False Positive
-            fn = 0  # False Negative
-            
-            for _, actual, predicted in self.predictions:
-                if actual == intent and predicted == intent:
-                    tp += 1
-                elif actual != intent and predicted == intent:
-                    fp += 1
-                elif actual == intent and predicted != intent:
-                    fn += 1
-            
-            # Precision = TP / (TP + FP)
-            precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
-            
-            # Recall = TP / (TP + FN)
-            recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
-            
-            # F1 = 2 * (Precision * Recall) / (Precision + Recall)
-            f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0.0
-            
-            metrics[intent] = {
-                'precision': precision,
-                'recall': recall,
-                'f1_score': f1,
-                'support': tp + fn  # Gerçek örneklerin sayısı
-            }
+        return confusion_metrics((actual, predicted) for _, actual, predicted in self.predictions)
+    
+    def evaluate_reject(self, threshold: Optional[float] = None) -> Dict[str, float]:
+        """
+        Kapsam dışı erken red kararını test verisi üzerinde değerlendirir.
         
-        # Macro average hesapla
-        macro_precision = sum(m['precision'] for m in metrics.values()) / len(metrics)
-        macro_recall = sum(m['recall'] for m in metrics.values()) / len(metrics)
-        macro_f1 = sum(m['f1_score'] for m in metrics.values()) / len(metrics)
+        Args:
+            threshold: Red eşiği (None ise sınıflandırıcının kalibre eşiği)
+        """
+        # Skorlar değerlendirmede bir kez hesaplanır, her eşik için yeniden sınıflandırılmaz
+        if not self.results:
+            self.evaluate()
         
-        # Accuracy hesapla
-        correct = sum(1 for _, actual, predicted in self.predictions if actual == predicted)
-        accuracy = correct / len(self.predictions) if self.predictions else 0.0
+        outcomes = [
+            (self.classifier.should_reject(scores, threshold), actual == "kapsam_disi")
+            for (_, actual, _), scores in zip(self.predictions, self.scores)
+        ]
+        return reject_metrics(outcomes)
+    
+    def print_reject_report(self, thresholds: Optional[List[float]] = None):
+        """Farklı red eşikleri için kesinlik / duyarlılık tablosu yazdırır"""
+        thresholds = thresholds or REJECT_THRESHOLDS
+        current = self.classifier.reject_threshold
         
-        return {
-            'per_class': metrics,
-            'macro_avg': {
-                'precision': macro_precision,
-                'recall': macro_recall,
-                'f1_score': macro_f1
-            },
-            'accuracy': accuracy,
-            'total_samples': len(self.predictions)
-        }
+        print("\n" + "="*70)
+        print("🚫 KAPSAM DIŞI ERKEN RED")
+        print(f"   Sıcaklık: {self.classifier.temperature} • Kullanılan eşik: {current}")
+        print("="*70)
+        print(f"{'Eşik':>8} {'Precision':>12} {'Recall':>12} {'F1 Score':>12} {'Yanlış red':>12}")
+        print("-"*70)
+        for threshold in thresholds:
+            m = self.evaluate_reject(threshold)
+            marker = " ◀" if abs(threshold - current) < 1e-9 else ""
+            print(f"{threshold:>8.2f} {m['precision']:>11.2%} {m['recall']:>11.2%} "
+                  f"{m['f1_score']:>11.2%} {m['false_reject_rate']:>11.2%}{marker}")
+        print("="*70)
     
     def get_confusion_matrix(self) -> Dict[str, Dict[str, int]]:
-        """Confusion matrix oluşturur"""
-        if not self.predictions:
+        """Confusion matrix oluşturur (metriklerle aynı geçişte hesaplanır)"""
+        if not self.results:
             self.evaluate()
-        
-        # Tüm intent'leri al
-        all_intents = sorted(set(
-            [p[1] for p in self.predictions] + [p[2] for p in self.predictions]
-        ))
-        
-        # Confusion matrix
-        matrix: Dict[str, Dict[str, int]] = {
-            intent: {i: 0 for i in all_intents} for intent in all_intents
-        }
-        
-        for _, actual, predicted in self.predictions:
-            matrix[actual][predicted] += 1
-        
-        return matrix
+        return self.results['confusion_matrix']
     
-    def print_report(self):
-        """Detaylı değerlendirme raporu yazdırır"""
-        results = self.evaluate()
+    def format_report(self) -> str:
+        """Detaylı değerlendirme raporunu metin olarak oluşturur"""
+        results = self.results or self.evaluate()
+        lines = []
         
-        print("\n" + "="*70)
-        print("📊 INTENT CLASSIFICATION DEĞERLENDİRME RAPORU")
-        print("="*70)
+        lines.append("\n" + "="*70)
+        lines.append("📊 INTENT CLASSIFICATION DEĞERLENDİRME RAPORU")
+        lines.append("="*70)
         
-        print(f"\n📈 Genel Metrikler:")
-        print(f"   • Accuracy: {results['accuracy']:.2%}")
-        print(f"   • Toplam Örnek: {results['total_samples']}")
+        lines.append(f"\n📈 Genel Metrikler:")
+        lines.append(f"   • Accuracy: {results['accuracy']:.2%}")
+        lines.append(f"   • Toplam Örnek: {results['total_samples']}")
         
-        print(f"\n📊 Macro Average:")
-        print(f"   • Precision: {results['macro_avg']['precision']:.2%}")
-        print(f"   • Recall: {results['macro_avg']['recall']:.2%}")
-        print(f"   • F1 Score: {results['macro_avg']['f1_score']:.2%}")
+        lines.append(f"\n📊 Macro Average:")
+        lines.append(f"   • Precision: {results['macro_avg']['precision']:.2%}")
+        lines.append(f"   • Recall: {results['macro_avg']['recall']:.2%}")
+        lines.append(f"   • F1 Score: {results['macro_avg']['f1_score']:.2%}")
         
-        print("\n" + "-"*70)
-        print(f"{'Kategori':<20} {'Precision':>12} {'Recall':>12} {'F1 Score':>12} {'Destek':>10}")
-        print("-"*70)
+        perf = results['performance']
+        lines.append(f"\n⚡ Performans:")
+        lines.append(f"   • Hız: {perf['throughput']:.0f} mesaj/sn")
+        lines.append(f"   • Gecikme (ms): p50 {perf['p50_ms']:.3f} • p95 {perf['p95_ms']:.3f} • p99 {perf['p99_ms']:.3f}")
+        
+        lines.append("\n" + "-"*70)
+        lines.append(f"{'Kategori':<20} {'Precision':>12} {'Recall':>12} {'F1 Score':>12} {'Destek':>10}")
+        lines.append("-"*70)
         
         for intent, metrics in sorted(results['per_class'].items()):
-            print(f"{intent:<20} {metrics['precision']:>11.2%} {metrics['recall']:>11.2%} {metrics['f1_score']:>11.2%} {metrics['support']:>10}")
+            lines.append(f"{intent:<20} {metrics['precision']:>11.2%} {metrics['recall']:>11.2%} {metrics['f1_score']:>11.2%} {metrics['support']:>10}")
         
-        print("-"*70)
+        lines.append("-"*70)
         
         # Confusion matrix
-        print("\n📋 Confusion Matrix (satırlar: gerçek, sütunlar: tahmin):")
+        lines.append("\n📋 Confusion Matrix (satırlar: gerçek, sütunlar: tahmin):")
         matrix = self.get_confusion_matrix()
         intents = sorted(matrix.keys())
         
         # Header
-        print(f"\n{'':>15}", end="")
-        for intent in intents:
-            print(f"{intent[:8]:>10}", end="")
-        print()
+        lines.append(f"\n{'':>15}" + "".join(f"{intent[:8]:>10}" for intent in intents))
         
         # Rows
         for actual in intents:
-            print(f"{actual[:14]:<15}", end="")
-            for predicted in intents:
-                count = matrix[actual][predicted]
-                if count > 0:
-                    print(f"{count:>10}", end="")
-                else:
-                    print(f"{'·':>10}", end="")
-            print()
-        
-        print("\n" + "="*70)
+            cells = [
+                f"{matrix[actual][predicted]:>10}" if matrix[actual][predicted] > 0 else f"{'·':>10}"
+                for predicted in intents
+            ]
+            lines.append(f"{actual[:14]:<15}" + "".join(cells))
+        
+        lines.append("\n" + "="*70)
+        return "\n".join(lines) + "\n"
     
-    def get_misclassified(self, limit: int = 10) -> List[Tuple[str, str, str]]:
-        """Yanlış sınıflandırılan örnekleri döndürür"""
+    def print_report(self):
+        """Detaylı değerlendirme raporu yazdırır"""
+        print(self.format_report(), end="")
+    
+    def get_misclassified(self, limit: Optional[int] = 10) -> List[Tuple[str, str, str]]:
+        """Yanlış sınıflandırılan örnekleri döndürür (limit=None: hepsi)"""
         if not self.predictions:
             self.evaluate()
         
@@ -241,37 +597,111 @@ class IntentEvaluator:
     
     def save_report(self, filename: str = "evaluation_report.txt"):
         """Değerlendirme raporunu dosyaya kaydeder"""
-        import io
-        import sys
-        
-        # Çıktıyı yakala
-        old_stdout = sys.stdout
-        sys.stdout = buffer = io.StringIO()
-        
-        self.print_report()
+        lines = [self.format_report()]
         
         # Yanlış sınıflandırmaları ekle
-        print("\n📛 YANLIŞ SINIFLANDIRILAN ÖRNEKLER:")
-        print("-"*70)
+        lines.append("\n📛 YANLIŞ SINIFLANDIRILAN ÖRNEKLER:\n")
+        lines.append("-"*70 + "\n")
         for text, actual, predicted in self.get_misclassified(20):
-            print(f"Metin: {text[:50]}...")
-            print(f"   Gerçek: {actual} → Tahmin: {predicted}")
-            print()
-        
-        report = buffer.getvalue()
-        sys.stdout = old_stdout
+            lines.append(f"Metin: {text[:50]}...\n")
+            lines.append(f"   Gerçek: {actual} → Tahmin: {predicted}\n")
+            lines.append("\n")
         
+        report = "".join(lines)
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(report)
         
         print(f"✅ Rapor kaydedildi: {filename}")
         return report
+    
+    def to_dict(self) -> Dict:
+        """Metrikler, confusion matrix, yanlış sınıflandırmalar ve süreleri tek sözlükte döndürür"""
+        results = self.results or self.evaluate()
+        return {
+            **results,
+            'misclassified': [
+                {'text': text, 'actual': actual, 'predicted': predicted}
+                for text, actual, predicted in self.get_misclassified(None)
+            ],
+            'meta': {
+                'date': time.strftime("%Y-%m-%d %H:%M:%S"),
+                'engine': self.classifier.engine,
+                'features': self.classifier.features,
+                'training_file': self.classifier.data_file,
+                'training_samples': len(self.classifier.training_data)
+            }
+        }
+    
+    def save_json(self, filename: str = "evaluation_report.json") -> Dict:
+        """Değerlendirme sonuçlarını JSON olarak kaydeder"""
+        return save_results_json(self.to_dict(), filename)
+    
+    def save_csv(self, filename: str = "evaluation_report.csv"):
+        """Sınıf metriklerini ve confusion matrix satırlarını CSV olarak kaydeder"""
+        save_results_csv(self.results or self.evaluate(), filename)
 
 
 # Ana çalıştırma
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Intent sınıflandırıcı değerlendirmesi")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Sıcaklık ve red eşiğini öğrenip intent_calibration.json'a kaydet")
+    parser.add_argument("--reject-threshold", type=float, default=None,
+                        help="Kapsam dışı red eşiğini bu değerle değerlendir")
+    parser.add_argument("--cv", type=int, default=0, metavar="K",
+                        help="Test dosyası yerine K-fold çapraz doğrulama yap")
+    parser.add_argument("--engine", default="centroid", choices=IntentClassifier.ENGINES,
+                        help="Sınıflandırma motoru")
+    parser.add_argument("--features", default="words", choices=IntentClassifier.FEATURES,
+                        help="Özellik türü: kelimeler veya hash'lenmiş karakter n-gram'ları")
+    parser.add_argument("--data", default="intents.txt",
+                        help="Çapraz doğrulamada kullanılacak veri dosyası")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Çapraz doğrulama işçi süreç sayısı (varsayılan: CPU sayısı)")
+    parser.add_argument("--json", default=None,
+                        help="Sonuçların yazılacağı JSON dosyası (varsayılan: evaluation_report.json)")
+    parser.add_argument("--csv", default=None,
+                        help="Sınıf metriklerinin yazılacağı CSV dosyası")
+    parser.add_argument("--compare", nargs=2, metavar=("ESKI", "YENI"),
+                        help="İki JSON raporu karşılaştır, gerileme varsa hata koduyla çık")
+    parser.add_argument("--max-accuracy-drop", type=float, default=MAX_ACCURACY_DROP,
+                        help="İzin verilen en fazla doğruluk düşüşü (0.01 = 1 puan)")
+    parser.add_argument("--max-latency-increase", type=float, default=MAX_LATENCY_INCREASE,
+                        help="İzin verilen en fazla p50 gecikme artışı (0.5 = %%50)")
+    args = parser.parse_args()
+    
+    if args.compare:
+        with open(args.compare[0], 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.compare[1], 'r', encoding='utf-8') as f:
+            candidate = json.load(f)
+        ok, lines = compare_runs(baseline, candidate, args.max_accuracy_drop, args.max_latency_increase)
+        print("\n" + "="*70)
+        print(f"🔍 KARŞILAŞTIRMA: {args.compare[0]} → {args.compare[1]}")
+        print("="*70)
+        print("\n".join(lines))
+        print("="*70)
+        print("✅ Gerileme yok." if ok else "❌ Gerileme tespit edildi.")
+        raise SystemExit(0 if ok else 1)
+    
+    if args.cv:
+        print(f"🔁 {args.cv}-fold çapraz doğrulama başlıyor ({args.data})...")
+        cv_results = cross_validate(args.data, folds=args.cv, workers=args.workers,
+                                    engine=args.engine, features=args.features)
+        print_cv_report(cv_results)
+        if args.json:
+            save_results_json(cv_results, args.json)
+        if args.csv:
+            save_results_csv(cv_results, args.csv)
+        raise SystemExit(0)
+    
+    if args.calibrate:
+        print(f"🎯 Kalibrasyon öğreniliyor (intents.txt, 5 fold, {args.engine}, {args.features})...")
+        calibration = fit_calibration(engine=args.engine, features=args.features)
+        print(f"   Sıcaklık: {calibration['temperature']} • Red eşiği: {calibration['reject_threshold']}")
+    
     print("🔄 Intent Classifier yükleniyor...")
-    classifier = IntentClassifier()
+    classifier = IntentClassifier(engine=args.engine, features=args.features)
     
     print("📊 Değerlendirme başlıyor...")
     evaluator = IntentEvaluator(classifier, test_ratio=0.2)
@@ -279,6 +709,14 @@ if __name__ == "__main__":
     
     # Raporu kaydet
     evaluator.save_report("evaluation_report.txt")
+    evaluator.save_json(args.json or "evaluation_report.json")
+    if args.csv:
+        evaluator.save_csv(args.csv)
+    
+    # Kapsam dışı erken red
+    if args.reject_threshold is not None:
+        classifier.reject_threshold = args.reject_threshold
+    evaluator.print_reject_report()
     
     # Yanlış sınıflandırmaları göster
     print("\n📛 Örnek yanlış sınıflandırmalar:")
@@ -4,15 +4,32 @@ Car expert ChatBot with LangChain integration.
 """
 
 import os
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from typing import List, Dict, Tuple
-from intent_classifier import IntentClassifier
+import time
+from typing import List, Dict, Tuple, Optional, Any, Set
+from intent_classifier import get_shared_intent_model
+from intent_feedback import log_low_confidence
+from dtc_index import DTCIndex
+from model_router import ModelRouter, ROUTE_TEMPLATE, ROUTE_FAST, ROUTE_DTC, ROUTE_REJECT, CHARS_PER_TOKEN
+from passage_extractor import extract_passages, DEFAULT_TOKEN_BUDGET
 
-# Load environment variables
-load_dotenv()
+# LangChain ve sağlayıcı paketleri ağır olduğu için ilk kullanımda yüklenir;
+# sadece seçilen sağlayıcının paketi import edilir.
+_env_loaded = False
+
+
+def load_env():
+    """Load environment variables from .env once"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def lc_messages():
+    """Return the langchain_core.messages module (imported on first use)"""
+    from langchain_core import messages
+    return messages
 
 
 class CarExpertChatBot:
@@ -81,11 +98,21 @@ class CarExpertChatBot:
 
 When greeting, introduce yourself as a car expert assistant.
 
+Document excerpts are labelled like [#source_3]. When a message says the relevant sources were given earlier in the conversation, use those earlier excerpts.
+
 If user asks about blocked topics (health, food, code, politics, etc.), respond:
 "Üzgünüm, ben sadece araba ve araç sorunları konusunda uzman bir asistanım. Bu konuda yardımcı olamıyorum. Arabanızla ilgili bir sorunuz varsa memnuniyetle yardımcı olurum! 🚗"
 """
 
+    # Düşük güvenli mesajlar inceleme kuyruğuna yazılsın mı (yük testinde kapatılır)
+    LOG_LOW_CONFIDENCE = True
+    
+    # Arıza kodu bilgileri ve doküman pasajlarının birlikte sığacağı token bütçesi
+    CONTEXT_TOKEN_BUDGET = DEFAULT_TOKEN_BUDGET
+
     def __init__(self, model_name: str = None):
+        load_env()
+        
         # Get API key from environment variable
         self.api_key = os.getenv("GEMINI_API_KEY")
         
@@ -100,9 +127,14 @@ If user asks about blocked topics (health, food, code, politics, etc.), respond:
         # Allow choosing model; fall back to default if not provided
         self.model_name = model_name or "gemini-2.5-flash"
         
-        # Intent Classifier başlat
+        # Intent Classifier başlat (tüm oturumlarda ortak, intents.txt değişince yeniden yüklenir)
         try:
-            self.intent_classifier = IntentClassifier()
+            if os.getenv("SHARED_INDEX_DIR"):
+                # Çok süreçli dağıtım: koordinatörün yayınladığı nesildeki model
+                from shared_index import get_shared_index
+                self.intent_classifier = get_shared_index().intent_model
+            else:
+                self.intent_classifier = get_shared_intent_model()
         except Exception as e:
             print(f"Intent classifier yüklenemedi: {e}")
             self.intent_classifier = None
@@ -110,40 +142,76 @@ If user asks about blocked topics (health, food, code, politics, etc.), respond:
         self.last_detected_intent = None
         self.last_intent_score = 0.0
         
+        # Konuşmaya daha önce eklenmiş doküman chunk'ları (tekrar gönderilmez)
+        self.sent_chunk_ids: Set[str] = set()
+        self.last_prompt_stats: Dict[str, int] = {}
+        
+        # Arıza kodu (DTC) indeksi - yerel tablo + yüklenen dokümanlar
+        try:
+            self.dtc_index = DTCIndex()
+        except Exception as e:
+            print(f"Arıza kodu indeksi yüklenemedi: {e}")
+            self.dtc_index = None
+        
+        # Greetings -> template, simple questions -> fast model, rest -> selected model
+        self.router = ModelRouter()
+        self.last_route = None
+        self.fast_llm = None
+        
+        # Son yanıtın aşama süreleri (ms) ve LLM hatası (kayıt / yük testi için)
+        self.last_timings: Dict[str, float] = {}
+        self.last_error: Optional[str] = None
+        
         self.initialize_llm()
     
+    def create_llm(self, model_name: str):
+        """Create a LangChain chat model for the given model name"""
+        if model_name.startswith("gpt"):
+            # OpenAI Model
+            openai_api_key = os.getenv("OPENAI_API_KEY")
+            if not openai_api_key:
+                raise ValueError("OPENAI_API_KEY bulunamadı! Lütfen .env dosyasını kontrol edin.")
+            
+            from langchain_openai import ChatOpenAI
+            return ChatOpenAI(
+                model=model_name,
+                openai_api_key=openai_api_key,
+                temperature=0.7
+            )
+        
+        # Gemini Model
+        if not self.api_key:
+            raise ValueError(
+                "GEMINI_API_KEY bulunamadı! Lütfen .env dosyası oluşturup "
+                "GEMINI_API_KEY=your_api_key_here şeklinde ekleyin."
+            )
+        
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(
+            model=model_name,
+            google_api_key=self.api_key,
+            temperature=0.7
+        )
+    
+    def get_fast_llm(self):
+        """Return the small/fast model of the selected provider (created on first use)"""
+        if self.fast_llm is None:
+            try:
+                self.fast_llm = self.create_llm(self.router.get_fast_model(self.model_name))
+            except Exception as e:
+                print(f"Fast model initialization error, using main model: {e}")
+                self.fast_llm = self.llm
+        return self.fast_llm
+    
     def initialize_llm(self):
         """Initialize LangChain with Gemini"""
         try:
-            # Check which model is selected
-            if self.model_name.startswith("gpt"):
-                 # OpenAI Model
-                openai_api_key = os.getenv("OPENAI_API_KEY")
-                if not openai_api_key:
-                    raise ValueError("OPENAI_API_KEY bulunamadı! Lütfen .env dosyasını kontrol edin.")
-                
-                self.llm = ChatOpenAI(
-                    model=self.model_name,
-                    openai_api_key=openai_api_key,
-                    temperature=0.7
-                )
-            else:
-                # Gemini Model
-                if not self.api_key:
-                    raise ValueError(
-                        "GEMINI_API_KEY bulunamadı! Lütfen .env dosyası oluşturup "
-                        "GEMINI_API_KEY=your_api_key_here şeklinde ekleyin."
-                    )
-                
-                self.llm = ChatGoogleGenerativeAI(
-                    model=self.model_name,
-                    google_api_key=self.api_key,
-                    temperature=0.7
-                )
+            self.llm = self.create_llm(self.model_name)
+            self.fast_llm = None
             
             # Add system message
             self.messages = [
-                SystemMessage(content=self.SYSTEM_PROMPT)
+                lc_messages().SystemMessage(content=self.SYSTEM_PROMPT)
             ]
             
             return True
@@ -155,7 +223,8 @@ If user asks about blocked topics (health, food, code, politics, etc.), respond:
         """Change model and re-initialize the LLM."""
         self.model_name = model_name
         # reset messages to keep system prompt intact
-        self.messages = [SystemMessage(content=self.SYSTEM_PROMPT)]
+        self.messages = [lc_messages().SystemMessage(content=self.SYSTEM_PROMPT)]
+        self.sent_chunk_ids = set()
         return bool(self.initialize_llm())
     
     def is_blocked_topic(self, message: str) -> bool:
@@ -182,24 +251,137 @@ If user asks about blocked topics (health, food, code, politics, etc.), respond:
         
         return False
     
-    def get_response(self, user_message: str) -> Tuple[str, str, float]:
+    def _fit_dtc_context(self, user_message: str, dtc_context: str,
+                         context_chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Arıza kodunun geçtiği doküman chunk'larını pasajların önüne ekler; toplam
+        CONTEXT_TOKEN_BUDGET'ı aşmaz. Tablo açıklamalarının payı düşüldükten sonra
+        kod chunk'larından pencere alınır, gelen pasajlar (kimlikleri önceki
+        turlarla eşleşsin diye kesilmeden) kalan bütçeye sığdığı sürece eklenir.
+        """
+        budget = max(self.CONTEXT_TOKEN_BUDGET - -(-len(dtc_context) // CHARS_PER_TOKEN), 0)
+        passages = extract_passages(user_message, self.dtc_index.get_documents(user_message), budget)
+        remaining = budget * CHARS_PER_TOKEN - sum(len(p["content"]) for p in passages)
+        for passage in context_chunks:
+            if len(passage["content"]) <= remaining:
+                passages.append(passage)
+                remaining -= len(passage["content"])
+        return passages
+    
+    def is_small_talk(self, user_message: str) -> bool:
+        """
+        Mesaj şablonla yanıtlanacak bir selamlaşma mı. Doküman araması yanıt
+        yolu seçilmeden önce yapıldığından, çağıran bu durumda aramayı atlar.
+        """
+        if not self.intent_classifier:
+            return False
+        if self.dtc_index and self.dtc_index.find_codes(user_message):
+            return False
+        intent, score, _ = self.intent_classifier.classify(user_message)
+        return self.router.choose_route(user_message, intent, score) == ROUTE_TEMPLATE
+    
+    def build_user_prompt(self, user_message: str, context_chunks: List[Dict[str, Any]],
+                          dtc_context: str = "") -> Tuple[str, List[str]]:
+        """Build the user turn sent to the LLM.
+        
+        Chunks already present earlier in the conversation are referenced by id
+        instead of being pasted again. The system prompt and earlier turns are
+        never rewritten, so the prompt prefix stays byte-identical across turns
+        and remains eligible for provider-side context caching.
+        
+        Returns:
+            Tuple[str, List[str]]: (prompt, yeni_eklenen_chunk_id'leri)
+        """
+        new_chunks = []
+        reused_ids = []
+        for chunk in context_chunks:
+            chunk_id = chunk.get("chunk_id") or chunk["content"][:40]
+            if chunk_id in self.sent_chunk_ids or chunk_id in reused_ids:
+                reused_ids.append(chunk_id)
+            elif all(c.get("chunk_id") != chunk_id for c in new_chunks):
+                new_chunks.append(chunk)
+        
+        parts = [user_message]
+        if dtc_context:
+            parts.append(f"🔎 Arıza Kodu Bilgileri:\n{dtc_context}")
+        if new_chunks:
+            context = "\n\n---\n\n".join(
+                f"[#{c.get('chunk_id', '')} | Kaynak: {c['source']}]\n{c['content']}" for c in new_chunks
+            )
+            parts.append(f"📚 Dokümanlardan Bilgiler:\n{context}")
+        if reused_ids:
+            refs = ", ".join(f"#{chunk_id}" for chunk_id in dict.fromkeys(reused_ids))
+            parts.append(f"📚 İlgili kaynaklar konuşmanın önceki mesajlarında verildi: {refs}")
+        
+        new_ids = [c.get("chunk_id") or c["content"][:40] for c in new_chunks]
+        self.last_prompt_stats = {
+            "new_context_chunks": len(new_chunks),
+            "reused_context_chunks": len(set(reused_ids)),
+            "prompt_chars": len("\n\n".join(parts))
+        }
+        return "\n\n".join(parts), new_ids
+    
+    def get_response(self, user_message: str,
+                     context_chunks: Optional[List[Dict[str, Any]]] = None) -> Tuple[str, str, float]:
         """Generate response to user message using LangChain
         
+        Args:
+            user_message: Kullanıcının mesajı (doküman bağlamı olmadan)
+            context_chunks: Dokümanlardan bulunan ilgili chunk'lar
+        
         Returns:
             Tuple[str, str, float]: (yanıt, tespit_edilen_intent, güven_skoru)
         """
+        context_chunks = list(context_chunks or [])
+        timings = self.last_timings = {}
+        self.last_error = None
+        self.last_route = None
         
         # Intent Classification ile kategori tespiti
         detected_intent = "bilinmiyor"
         intent_score = 0.0
+        intent_scores = {}
         
+        stage_start = time.perf_counter()
         if self.intent_classifier:
-            detected_intent, intent_score, _ = self.intent_classifier.classify(user_message)
+            detected_intent, intent_score, intent_scores = self.intent_classifier.classify(user_message)
             self.last_detected_intent = detected_intent
             self.last_intent_score = intent_score
+        timings["intent_ms"] = (time.perf_counter() - stage_start) * 1000
         
-        # Kapsam dışı intent kontrolü (selamlama hariç)
-        if detected_intent == "kapsam_disi" and intent_score > 0.15:
+        # Arıza kodu (DTC) kontrolü - tam eşleşme, LLM'den önce
+        stage_start = time.perf_counter()
+        dtc_context = ""
+        if self.dtc_index:
+            dtc_codes = self.dtc_index.find_codes(user_message)
+            if dtc_codes:
+                detected_intent = self.dtc_index.get_intent(dtc_codes[0])
+                intent_score = 1.0
+                self.last_detected_intent = detected_intent
+                self.last_intent_score = intent_score
+                
+                # Basit "kod ne demek" sorularını doğrudan yanıtla
+                direct_answer = self.dtc_index.answer(user_message)
+                if direct_answer:
+                    self._remember_turn(user_message, direct_answer)
+                    self.last_route = ROUTE_DTC
+                    self.router.record(ROUTE_DTC, (time.perf_counter() - stage_start) * 1000)
+                    return direct_answer, detected_intent, intent_score
+                
+                dtc_context = self.dtc_index.get_context(user_message, include_documents=False)
+                context_chunks = self._fit_dtc_context(user_message, dtc_context, context_chunks)
+        timings["dtc_ms"] = (time.perf_counter() - stage_start) * 1000
+        
+        # Kapsam dışı erken red: kalibre olasılık eşiği aşarsa LLM'e gidilmez
+        stage_start = time.perf_counter()
+        if (self.intent_classifier and not dtc_context
+                and self.intent_classifier.should_reject(intent_scores)):
+            detected_intent = "kapsam_disi"
+            intent_score, _ = self.intent_classifier.out_of_scope_probability(intent_scores)
+            self.last_detected_intent = detected_intent
+            self.last_intent_score = intent_score
+            self.last_route = ROUTE_REJECT
+            self.router.record(ROUTE_REJECT, (time.perf_counter() - stage_start) * 1000)
             return ("""🚗 Üzgünüm, ben sadece araba ve araç sorunları konusunda uzman bir asistanım.
 
 Bu konuda size yardımcı olamıyorum. Arabanızla ilgili bir sorunuz varsa memnuniyetle yardımcı olurum!
@@ -211,15 +393,61 @@ Bu konuda size yardımcı olamıyorum. Arabanızla ilgili bir sorunuz varsa memn
 - Vites geçerken ses geliyor
 - Akü ne sıklıkla değiştirilmeli?""", detected_intent, intent_score)
         
+        # Yanıt yolu: şablon / hızlı model / seçili model
+        route = self.router.choose_route(
+            user_message, detected_intent, intent_score,
+            has_dtc=bool(dtc_context), context_chunks=len(context_chunks)
+        )
+        self.last_route = route
+        
+        if route == ROUTE_TEMPLATE:
+            start = time.perf_counter()
+            answer = self.router.template_answer(user_message)
+            self._remember_turn(user_message, answer)
+            self.router.record(route, (time.perf_counter() - start) * 1000)
+            return answer, detected_intent, intent_score
+        
+        # Düşük güvenli sınıflandırmalar temsilci onayı için inceleme kuyruğuna
+        if self.intent_classifier and not dtc_context and self.LOG_LOW_CONFIDENCE:
+            try:
+                log_low_confidence(user_message, detected_intent, intent_score)
+            except OSError as e:
+                print(f"Intent review log error: {e}")
+        
         try:
+            if route == ROUTE_FAST:
+                llm, model_name = self.get_fast_llm(), self.router.get_fast_model(self.model_name)
+            else:
+                llm, model_name = self.llm, self.model_name
+            
+            # Arıza kodu ve doküman bağlamını ekle (önceden gönderilenler tekrar edilmez)
+            stage_start = time.perf_counter()
+            llm_message, new_chunk_ids = self.build_user_prompt(user_message, context_chunks, dtc_context)
+            timings["prompt_ms"] = (time.perf_counter() - stage_start) * 1000
+            
             # Add user message to history
-            self.messages.append(HumanMessage(content=user_message))
+            self.messages.append(lc_messages().HumanMessage(content=llm_message))
             
             # Get response from LangChain
-            response = self.llm.invoke(self.messages)
+            start = time.perf_counter()
+            try:
+                response = llm.invoke(self.messages)
+            except Exception:
+                # Yanıtsız kalan mesaj bir sonraki turun önekini bozmasın
+                self.messages.pop()
+                raise
+            finally:
+                timings["llm_ms"] = (time.perf_counter() - start) * 1000
+            
+            self.router.record(
+                route, (time.perf_counter() - start) * 1000, model_name,
+                input_chars=sum(len(m.content) for m in self.messages),
+                output_chars=len(response.content)
+            )
             
             # Add AI response to history
-            self.messages.append(AIMessage(content=response.content))
+            self.messages.append(lc_messages().AIMessage(content=response.content))
+            self.sent_chunk_ids.update(new_chunk_ids)
             
             # Add to simple history
             self.chat_history.append({
@@ -234,8 +462,16 @@ Bu konuda size yardımcı olamıyorum. Arabanızla ilgili bir sorunuz varsa memn
             return response.content, detected_intent, intent_score
             
         except Exception as e:
+            self.last_error = str(e)
             return f"⚠️ Yanıt üretilirken bir hata oluştu: {str(e)}", detected_intent, intent_score
     
+    def _remember_turn(self, user_message: str, answer: str):
+        """Add a locally answered turn (no LLM call) to both histories"""
+        self.chat_history.append({"role": "user", "content": user_message})
+        self.chat_history.append({"role": "assistant", "content": answer})
+        self.messages.append(lc_messages().HumanMessage(content=user_message))
+        self.messages.append(lc_messages().AIMessage(content=answer))
+    
     def get_intent_description(self, intent: str) -> str:
         """Intent için açıklama döndürür"""
         if self.intent_classifier:
@@ -246,8 +482,9 @@ Bu konuda size yardımcı olamıyorum. Arabanızla ilgili bir sorunuz varsa memn
         """Clear chat history"""
         self.chat_history = []
         self.messages = [
-            SystemMessage(content=self.SYSTEM_PROMPT)
+            lc_messages().SystemMessage(content=self.SYSTEM_PROMPT)
         ]
+        self.sent_chunk_ids = set()
     
     def get_chat_history(self) -> List[Dict[str, str]]:
         """Return chat history"""
@@ -0,0 +1,62 @@
+"""
+Hashing Özellik Modülü
+Kelimeleri ve karakter n-gram'larını sabit boyutlu bir indeks uzayına hash'ler.
+
+Sözlük tutulmadığı için bellek kullanımı derlem boyutundan bağımsızdır ve
+başlangıçta yüklenecek bir kelime dağarcığı yoktur. Yazım hataları ve çekim
+ekleri ("frenler tutmuyo") ortak n-gram'lar sayesinde eşleşmeye devam eder.
+
+Intent sınıflandırıcı (features="char") ve dense doküman araması
+(HashingEmbedder) aynı hash fonksiyonunu kullanır.
+"""
+
+import zlib
+from typing import List, Tuple, Iterable
+
+
+# Varsayılan özellik uzayı boyutu
+DEFAULT_N_FEATURES = 2 ** 18
+
+
+def hash_feature(feature: str, n_features: int) -> Tuple[int, float]:
+    """Özelliği (indeks, işaret) çiftine çevirir - süreçten bağımsız, kararlı hash"""
+    h = zlib.crc32(feature.encode('utf-8'))
+    return h % n_features, (1.0 if (h >> 31) & 1 else -1.0)
+
+
+def char_ngrams(token: str, n_min: int = 3, n_max: int = 3) -> List[str]:
+    """Kelimenin sınır işaretli ("<kelime>") karakter n-gram'larını döndürür"""
+    padded = f"<{token}>"
+    return [
+        padded[i:i + n]
+        for n in range(n_min, n_max + 1)
+        for i in range(len(padded) - n + 1)
+    ]
+
+
+class CharNgramHasher:
+    """Kelime listesini sabit boyutlu uzaydaki özellik indekslerine çevirir"""
+
+    def __init__(self, n_features: int = DEFAULT_N_FEATURES,
+                 ngram_range: Tuple[int, int] = (3, 5), include_words: bool = True):
+        """
+        Args:
+            n_features: Özellik uzayının boyutu (bellek üst sınırı)
+            ngram_range: Karakter n-gram uzunlukları (en az, en çok)
+            include_words: Kelimenin kendisini de ayrı özellik olarak ekle
+        """
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.include_words = include_words
+
+    def hash_tokens(self, tokens: Iterable[str]) -> List[int]:
+        """Kelimelerin özellik indekslerini (tekrarlarıyla) döndürür"""
+        n_min, n_max = self.ngram_range
+        features = []
+        for token in tokens:
+            if self.include_words:
+                # Kelime ve n-gram aynı metin olsa da ayrı özellik olsun
+                features.append(hash_feature(f"w:{token}", self.n_features)[0])
+            for gram in char_ngrams(token, n_min, n_max):
+                features.append(hash_feature(gram, self.n_features)[0])
+        return features
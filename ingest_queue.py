@@ -0,0 +1,216 @@
+"""
+Doküman Yükleme Kuyruğu
+Yüklenen dosyalar arka plan thread'lerinde diske yazılıp indekse eklenir;
+Streamlit betiği ve sohbet yanıtları dosya işlenirken beklemez.
+
+- Aynı içerik (MD5) tekrar yüklenirse yeni iş açılmaz
+- Aynı anda bekleyen/çalışan iş sayısı sınırlıdır (kuyruk doluysa iş reddedilir)
+- Yeni dosyalar mevcut indekse artımlı eklenir; var olan bir dosyanın yeni
+  sürümünde indeks arka planda baştan kurulup tek adımda devreye alınır
+"""
+
+import os
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any
+
+from document_processor import DocumentProcessor, SimpleDocumentStore
+
+
+# İş durumları
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_DUPLICATE = "duplicate"
+STATUS_REJECTED = "rejected"
+
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+
+class IngestQueue:
+    """Doküman yükleme ve yeniden yükleme işlerini arka planda çalıştırır"""
+
+    # Eşzamanlı işlenen iş sayısı
+    MAX_WORKERS = 2
+    # Bekleyen + çalışan en fazla iş sayısı (fazlası reddedilir)
+    MAX_PENDING = 8
+    # Durum listesinde tutulan en fazla iş sayısı
+    HISTORY_SIZE = 50
+
+    def __init__(self, store: Optional[SimpleDocumentStore], documents_folder: str = "documents",
+                 max_workers: Optional[int] = None, max_pending: Optional[int] = None):
+        """
+        Args:
+            store: Dosyaların ekleneceği depo (None ise dosyalar sadece diske
+                   yazılır; ör. paylaşımlı indeksi koordinatör günceller). Çalışırken
+                   değiştirilebilir; her iş başladığı andaki depoyu kullanır
+            documents_folder: Dosyaların yazılacağı klasör
+            max_workers: Eşzamanlı iş sayısı (varsayılan MAX_WORKERS)
+            max_pending: Bekleyen iş sınırı (varsayılan MAX_PENDING)
+        """
+        self.store = store
+        self.documents_folder = documents_folder
+        self.max_pending = max_pending or self.MAX_PENDING
+        self.processor = DocumentProcessor(documents_folder)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or self.MAX_WORKERS,
+                                            thread_name_prefix="ingest")
+        self._lock = threading.Lock()
+        # İndeks kurulumu ile dosya eklemeleri sırayla yapılır
+        self._index_lock = threading.Lock()
+        self._jobs: List[Dict[str, Any]] = []
+        self._next_id = 1
+        # İçerik hash'i -> dosya adı (klasördeki ve başarıyla işlenen dosyalar) ve
+        # dosya adı -> diskteki sürümün hash'i (dosya değiştirilince eski hash silinir)
+        self._file_hashes: Dict[str, str] = {
+            os.path.basename(path): self.processor.get_file_hash(path)
+            for path in self.processor.get_all_documents()
+        }
+        self._hashes: Dict[str, str] = {
+            content_hash: filename for filename, content_hash in self._file_hashes.items()
+        }
+
+    def _new_job(self, kind: str, filename: str, status: str, **extra) -> Dict[str, Any]:
+        """İş kaydı oluşturup listeye ekler (kilit altında çağrılır)"""
+        job = {
+            "id": self._next_id,
+            "kind": kind,
+            "filename": filename,
+            "status": status,
+            "chunks": 0,
+            "error": None,
+            "created": datetime.now().strftime("%H:%M:%S"),
+            "finished": None,
+        }
+        job.update(extra)
+        self._next_id += 1
+        self._jobs.append(job)
+        del self._jobs[:-self.HISTORY_SIZE]
+        return job
+
+    def pending_count(self) -> int:
+        """Bekleyen ve çalışan iş sayısı"""
+        with self._lock:
+            return sum(1 for job in self._jobs if job["status"] in ACTIVE_STATUSES)
+
+    def _has_capacity(self) -> bool:
+        """Kuyrukta yer var mı (kilit altında çağrılır)"""
+        return sum(1 for job in self._jobs if job["status"] in ACTIVE_STATUSES) < self.max_pending
+
+    def submit(self, filename: str, data: bytes) -> Dict[str, Any]:
+        """
+        Yüklenen dosya için iş açar.
+
+        Returns:
+            İş kaydının kopyası (status: queued, duplicate veya rejected)
+        """
+        filename = os.path.basename(filename)
+        content_hash = hashlib.md5(data).hexdigest()
+
+        with self._lock:
+            existing = self._hashes.get(content_hash)
+            if existing is not None:
+                return dict(self._new_job("upload", filename, STATUS_DUPLICATE, duplicate_of=existing))
+            if not self._has_capacity():
+                return dict(self._new_job("upload", filename, STATUS_REJECTED,
+                                          error="Kuyruk dolu, lütfen biraz sonra tekrar deneyin"))
+            job = self._new_job("upload", filename, STATUS_QUEUED, hash=content_hash)
+            # Aynı içerik iş bitmeden tekrar yüklenirse de yinelenen sayılır
+            self._hashes[content_hash] = filename
+
+        self._executor.submit(self._run_upload, job, data)
+        return dict(job)
+
+    def submit_reload(self) -> Dict[str, Any]:
+        """Tüm dokümanları yeniden işleyen iş açar (bekleyen varsa onu döndürür)"""
+        with self._lock:
+            for job in self._jobs:
+                if job["kind"] == "reload" and job["status"] == STATUS_QUEUED:
+                    return dict(job)
+            if not self._has_capacity():
+                return dict(self._new_job("reload", "", STATUS_REJECTED,
+                                          error="Kuyruk dolu, lütfen biraz sonra tekrar deneyin"))
+            job = self._new_job("reload", "", STATUS_QUEUED)
+
+        self._executor.submit(self._run_reload, job)
+        return dict(job)
+
+    def _set_status(self, job: Dict[str, Any], status: str, **fields):
+        """İş kaydını günceller"""
+        with self._lock:
+            job.update(fields, status=status)
+            if status not in ACTIVE_STATUSES:
+                job["finished"] = datetime.now().strftime("%H:%M:%S")
+
+    def _run_upload(self, job: Dict[str, Any], data: bytes):
+        """Dosyayı diske yazıp depoya ekler (işçi thread'de çalışır)"""
+        self._set_status(job, STATUS_RUNNING)
+        filepath = os.path.join(self.documents_folder, job["filename"])
+        try:
+            # Yarım dosya hiçbir zaman okunmasın diye önce geçici dosyaya yazılır
+            tmp_path = os.path.join(self.documents_folder, f".{job['filename']}.uploading")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            with self._index_lock:
+                store = self.store
+                replaced = os.path.exists(filepath)
+                os.replace(tmp_path, filepath)
+                self._track_file(job["filename"], job["hash"])
+                chunks = 0
+                if store is not None:
+                    if replaced:
+                        # Eski sürümün chunk'ları çıkarılamadığından indeks baştan kurulur
+                        chunks = self._rebuild(store)
+                    else:
+                        before = len(store.documents)
+                        store.add_documents(self.processor.iter_file_chunks(filepath))
+                        self.processor.processed_files[job["filename"]] = job["hash"]
+                        chunks = len(store.documents) - before
+        except Exception as e:
+            with self._lock:
+                self._hashes.pop(job["hash"], None)
+            self._set_status(job, STATUS_FAILED, error=str(e))
+            print(f"❌ Doküman işlenemedi ({job['filename']}): {e}")
+            return
+        self._set_status(job, STATUS_DONE, chunks=chunks)
+
+    def _track_file(self, filename: str, content_hash: str):
+        """Diskteki dosyanın yeni hash'ini kaydeder; değiştirilen eski sürüm artık yinelenen sayılmaz"""
+        with self._lock:
+            old_hash = self._file_hashes.get(filename)
+            if old_hash != content_hash and self._hashes.get(old_hash) == filename:
+                del self._hashes[old_hash]
+            self._file_hashes[filename] = content_hash
+
+    def _run_reload(self, job: Dict[str, Any]):
+        """Tüm dokümanları yeniden işler (işçi thread'de çalışır)"""
+        self._set_status(job, STATUS_RUNNING)
+        try:
+            with self._index_lock:
+                store = self.store
+                chunks = self._rebuild(store) if store is not None else 0
+        except Exception as e:
+            self._set_status(job, STATUS_FAILED, error=str(e))
+            print(f"❌ Dokümanlar yeniden yüklenemedi: {e}")
+            return
+        self._set_status(job, STATUS_DONE, chunks=chunks)
+
+    def _rebuild(self, store: SimpleDocumentStore) -> int:
+        """İndeksi yeni bir depoda baştan kurup verilen depoya aktarır"""
+        fresh = SimpleDocumentStore(dense=store.dense_retriever is not None,
+                                    intent_classifier=store.intent_classifier)
+        self.processor.processed_files.clear()
+        fresh.add_documents(self.processor.iter_document_chunks())
+        store.swap_contents(fresh)
+        return len(fresh.documents)
+
+    def get_jobs(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """En yeni işlerin kopyalarını döndürür"""
+        with self._lock:
+            return [dict(job) for job in reversed(self._jobs[-limit:])]
+
+    def shutdown(self, wait: bool = True):
+        """İşçi thread'lerini durdurur"""
+        self._executor.shutdown(wait=wait)
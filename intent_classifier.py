@@ -1,15 +1,53 @@
 """
 Intent Classification Module
 Kullanıcı mesajlarını kategorilere ayıran sınıflandırıcı.
-TF-IDF + Naive Bayes kullanarak intent tespiti yapar.
+Aynı tokenizasyon üzerinde üç motor sunar:
+- centroid: TF-IDF intent ortalamalarına kosinüs benzerliği (varsayılan)
+- nb: Multinomial Naive Bayes
+- logreg: L2 düzenlileştirmeli lojistik regresyon (TF-IDF özellikleri)
+
+Özellikler kelimeler (features="words") ya da sabit boyutlu uzaya hash'lenen
+karakter n-gram'ları (features="char", bkz. hashed_features.py) olabilir.
 """
 
 import os
 import re
-from typing import Tuple, List, Dict
+import copy
+import json
+import hashlib
+import time
+import mmap
+import random
+import threading
+from array import array
+from typing import Tuple, List, Dict, Optional
 from collections import defaultdict
+from importlib.util import find_spec
 import math
 
+from hashed_features import CharNgramHasher, DEFAULT_N_FEATURES
+
+# numpy varsa toplu sınıflandırma tek matris geçişiyle yapılır; import ilk kullanımda
+NUMPY_AVAILABLE = find_spec("numpy") is not None
+np = None
+
+
+def _load_numpy():
+    """numpy'ı ilk kullanımda yükler"""
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+def _map_floats(path: str):
+    """Ham float32 dosyasını salt-okunur belleğe eşler (mmap); boş dosyada boş dizi"""
+    if not os.path.getsize(path):
+        return array('f')
+    with open(path, 'rb') as f:
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast('f')
+
 
 class IntentClassifier:
     """TF-IDF tabanlı Intent Sınıflandırıcı"""
@@ -29,27 +67,130 @@ class IntentClassifier:
         "kapsam_disi": "❌ Kapsam Dışı"
     }
     
-    def __init__(self, data_file: str = "intents.txt"):
+    # Kalibrasyon dosyası yoksa kullanılan varsayılanlar
+    # (evaluate_intent.py --calibrate ile intent_calibration.json üretilir)
+    DEFAULT_TEMPERATURE = 0.05
+    DEFAULT_REJECT_THRESHOLD = 0.5
+    
+    # Sınıflandırma motorları
+    ENGINES = ("centroid", "nb", "logreg")
+    # Özellik türleri: kelimeler veya hash'lenmiş karakter n-gram'ları
+    FEATURES = ("words", "char")
+    # Naive Bayes Laplace yumuşatması
+    NB_ALPHA = 0.5
+    # Lojistik regresyon (SGD) parametreleri
+    LOGREG_EPOCHS = 40
+    LOGREG_WARM_EPOCHS = 10  # add_examples sonrası mevcut ağırlıklardan devam
+    LOGREG_REHEARSAL = 30  # warm start'ta yeni örnek başına tekrar edilen eski örnek
+    LOGREG_LEARNING_RATE = 1.0
+    LOGREG_L2 = 1e-4
+    
+    def __init__(self, data_file: str = "intents.txt",
+                 calibration_file: str = "intent_calibration.json",
+                 examples: Optional[List[Tuple[str, str]]] = None,
+                 verbose: bool = True, engine: str = "centroid",
+                 features: str = "words", n_features: int = DEFAULT_N_FEATURES,
+                 train_linear: bool = True):
         """
         Intent Classifier başlatıcı
         
         Args:
             data_file: Eğitim verisi dosyası yolu
+            calibration_file: Skor kalibrasyonu (sıcaklık, red eşiği) dosyası
+            examples: Verilirse dosya yerine bu (intent, cümle) örnekleriyle eğitilir
+            verbose: Yükleme bilgilerini yazdır
+            engine: Sınıflandırma motoru (centroid, nb, logreg)
+            features: Özellik türü (words, char)
+            n_features: char özelliklerinde hash uzayının boyutu
+            train_linear: False ise doğrusal ağırlıklar eğitilmez (load_linear ile yüklenecek)
         """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Bilinmeyen sınıflandırma motoru: {engine} (seçenekler: {', '.join(self.ENGINES)})")
+        if features not in self.FEATURES:
+            raise ValueError(f"Bilinmeyen özellik türü: {features} (seçenekler: {', '.join(self.FEATURES)})")
+        self.engine = engine
+        self.features = features
+        # char modunda kelime dağarcığı tutulmaz, özellik = hash indeksi
+        self.hasher = CharNgramHasher(n_features) if features == "char" else None
         self.data_file = data_file
+        self.calibration_file = calibration_file
+        self.verbose = verbose
         self.training_data: List[Tuple[str, str]] = []
         self.intent_docs: Dict[str, List[str]] = defaultdict(list)
         
-        # TF-IDF için
+        # TF-IDF için (char modunda anahtarlar hash indeksleridir)
         self.vocabulary: Dict[str, int] = {}
         self.idf: Dict[str, float] = {}
         self.intent_vectors: Dict[str, Dict[str, float]] = {}
+        self.intent_norms: Dict[str, float] = {}
+        
+        # Artımlı öğrenme için tutulan sayaçlar
+        self.doc_freq: Dict[str, int] = defaultdict(int)
+        self.intent_tf_sums: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.intent_counts: Dict[str, int] = defaultdict(int)
+        self.intent_word_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.intent_token_totals: Dict[str, int] = defaultdict(int)
+        
+        # Doğrusal motorlar (nb, logreg): özellik x intent float32 ağırlık matrisi
+        # (satır = vocabulary / hash indeksi) ve intent başına sabit terim
+        self.labels: List[str] = []
+        self.weights = array('f')
+        self.bias: List[float] = []
+        
+        # Paylaşımlı indeksten belleğe eşlenen (mmap) model: satır başına IDF ve
+        # centroid motorunda norma bölünmüş (özellik x intent) intent vektörleri.
+        # Doluysa skorlar eğitim sözlükleri yerine bu matrislerden hesaplanır
+        self.row_idf = array('f')
+        self.centroid_weights = array('f')
+        # Eğitim verisi olmadan yüklenen modelde kaynak modelin özeti (bkz. fingerprint)
+        self.source_fingerprint: Optional[str] = None
+        
+        # Toplu sınıflandırma için intent vektörlerinden kurulan (özellik x intent)
+        # matris; intent_vectors değişince (yeni nesne) yeniden kurulur
+        self._centroid_matrix_cache = None
+        
+        # Kalibrasyon: softmax(skor / sıcaklık) ve kapsam dışı red eşiği
+        self.temperature = self.DEFAULT_TEMPERATURE
+        self.reject_threshold = self.DEFAULT_REJECT_THRESHOLD
         
         # Eğitim verisini yükle
-        self._load_training_data()
-        self._build_vocabulary()
+        if examples is not None:
+            self._load_examples(examples)
+        else:
+            self._load_training_data()
+        self._build_vocabulary(self.training_data)
         self._compute_idf()
         self._compute_intent_vectors()
+        if train_linear:
+            self._train_linear()
+        self._load_calibration()
+    
+    def _load_examples(self, examples: List[Tuple[str, str]]):
+        """Eğitim verisini (intent, cümle) listesinden yükler"""
+        for intent, text in examples:
+            intent = intent.strip().lower()
+            text = text.strip().lower()
+            self.training_data.append((intent, text))
+            self.intent_docs[intent].append(text)
+    
+    def _load_calibration(self):
+        """Kalibrasyon parametrelerini dosyadan yükler (yoksa varsayılanlar kalır)"""
+        if not self.calibration_file or not os.path.exists(self.calibration_file):
+            return
+        
+        try:
+            with open(self.calibration_file, 'r', encoding='utf-8') as f:
+                calibration = json.load(f)
+            calibrated_for = (calibration.get("engine", "centroid"), calibration.get("features", "words"))
+            if calibrated_for != (self.engine, self.features):
+                if self.verbose:
+                    print(f"Uyarı: {self.calibration_file} '{'/'.join(calibrated_for)}' için, "
+                          f"varsayılan kalibrasyon kullanılıyor")
+                return
+            self.temperature = float(calibration.get("temperature", self.temperature))
+            self.reject_threshold = float(calibration.get("reject_threshold", self.reject_threshold))
+        except (OSError, ValueError) as e:
+            print(f"Uyarı: {self.calibration_file} okunamadı: {e}")
     
     def _load_training_data(self):
         """Eğitim verisini dosyadan yükler"""
@@ -74,10 +215,11 @@ class IntentClassifier:
                         self.training_data.append((intent, text))
                         self.intent_docs[intent].append(text)
         
-        print(f"✅ {len(self.training_data)} eğitim örneği yüklendi.")
-        print(f"📊 Kategoriler: {list(self.intent_docs.keys())}")
+        if self.verbose:
+            print(f"✅ {len(self.training_data)} eğitim örneği yüklendi.")
+            print(f"📊 Kategoriler: {list(self.intent_docs.keys())}")
     
-    def _tokenize(self, text: str) -> List[str]:
+    def _words(self, text: str) -> List[str]:
         """Metni kelimelere ayırır"""
         # Küçük harfe çevir
         text = text.lower()
@@ -89,32 +231,62 @@ class IntentClassifier:
         tokens = [t for t in tokens if len(t) > 1]
         return tokens
     
-    def _build_vocabulary(self):
-        """Kelime dağarcığı oluşturur"""
-        word_idx = 0
-        for intent, text in self.training_data:
+    def _tokenize(self, text: str) -> List:
+        """Metnin özelliklerini döndürür: kelimeler veya (char modunda) hash indeksleri"""
+        tokens = self._words(text)
+        if self.hasher:
+            return self.hasher.hash_tokens(tokens)
+        return tokens
+    
+    def _feature_index(self, token) -> Optional[int]:
+        """Özelliğin ağırlık matrisindeki satırı (bilinmeyen kelimede None)"""
+        if self.hasher:
+            return token
+        return self.vocabulary.get(token)
+    
+    def _n_rows(self) -> int:
+        """Ağırlık matrisinin satır sayısı"""
+        return self.hasher.n_features if self.hasher else len(self.vocabulary)
+    
+    def _build_vocabulary(self, examples: List[Tuple[str, str]]):
+        """
+        Kelime dağarcığına örnekleri ekler ve sayaçları günceller:
+        doküman frekansları ile intent başına TF toplamı ve örnek sayısı
+        """
+        for intent, text in examples:
             tokens = self._tokenize(text)
+            if not self.hasher:
+                for token in tokens:
+                    if token not in self.vocabulary:
+                        self.vocabulary[token] = len(self.vocabulary)
+            for token in set(tokens):
+                self.doc_freq[token] += 1
+            
+            tf_sums = self.intent_tf_sums[intent]
+            for word, tf_val in self._compute_tf(tokens).items():
+                tf_sums[word] += tf_val
+            self.intent_counts[intent] += 1
+            
+            word_counts = self.intent_word_counts[intent]
             for token in tokens:
-                if token not in self.vocabulary:
-                    self.vocabulary[token] = word_idx
-                    word_idx += 1
+                word_counts[token] += 1
+            self.intent_token_totals[intent] += len(tokens)
         
-        print(f"📚 Kelime dağarcığı: {len(self.vocabulary)} kelime")
+        if self.verbose:
+            if self.hasher:
+                print(f"📚 Hash uzayı: {self.hasher.n_features} özellik ({len(self.doc_freq)} dolu)")
+            else:
+                print(f"📚 Kelime dağarcığı: {len(self.vocabulary)} kelime")
     
     def _compute_idf(self):
         """IDF (Inverse Document Frequency) hesaplar"""
         N = len(self.training_data)  # Toplam doküman sayısı
         
-        # Her kelimenin kaç dokümanda geçtiğini say
-        doc_freq: Dict[str, int] = defaultdict(int)
-        for intent, text in self.training_data:
-            tokens = set(self._tokenize(text))
-            for token in tokens:
-                doc_freq[token] += 1
-        
-        # IDF hesapla: log(N / df)
-        for word, df in doc_freq.items():
-            self.idf[word] = math.log(N / (df + 1)) + 1  # Smoothing
+        # IDF hesapla: log(N / df) - yeni sözlük tek atamayla devreye alınır
+        self.idf = {
+            word: math.log(N / (df + 1)) + 1  # Smoothing
+            for word, df in self.doc_freq.items()
+        }
     
     def _compute_tf(self, tokens: List[str]) -> Dict[str, float]:
         """TF (Term Frequency) hesaplar"""
@@ -139,27 +311,370 @@ class IntentClassifier:
         
         tfidf: Dict[str, float] = {}
         for word, tf_val in tf.items():
-            idf_val = self.idf.get(word, 1.0)
+            idf_val = self._idf_value(word)
             tfidf[word] = tf_val * idf_val
         
         return tfidf
     
+    def _idf_value(self, token) -> float:
+        """Özelliğin IDF değeri (bilinmeyen özellikte 1.0)"""
+        if self.row_idf:
+            idx = self._feature_index(token)
+            return 1.0 if idx is None else self.row_idf[idx]
+        return self.idf.get(token, 1.0)
+    
     def _compute_intent_vectors(self):
-        """Her intent için ortalama TF-IDF vektörü hesaplar"""
-        for intent, docs in self.intent_docs.items():
-            # Intent için tüm dokümanların TF-IDF'lerini topla
-            combined: Dict[str, float] = defaultdict(float)
-            for doc in docs:
-                tfidf = self._compute_tfidf(doc)
-                for word, val in tfidf.items():
-                    combined[word] += val
+        """
+        Her intent için ortalama TF-IDF vektörü hesaplar.
+        
+        Ortalama, tutulan TF toplamlarından hesaplanır: mean(tf * idf) = idf * sum(tf) / n.
+        Böylece dokümanlar yeniden işlenmez; maliyet kelime x intent sayısıyla sınırlıdır.
+        """
+        vectors: Dict[str, Dict[str, float]] = {}
+        norms: Dict[str, float] = {}
+        for intent, tf_sums in self.intent_tf_sums.items():
+            num_docs = self.intent_counts[intent]
+            vector = {
+                word: tf_sum * self.idf.get(word, 1.0) / num_docs
+                for word, tf_sum in tf_sums.items()
+            }
+            vectors[intent] = vector
+            norms[intent] = math.sqrt(sum(v ** 2 for v in vector.values()))
+        
+        # Devam eden sınıflandırmalar tutarlı bir görünümle bitsin diye tek atamayla değiştirilir
+        self.intent_norms = norms
+        self.intent_vectors = vectors
+    
+    def fingerprint(self) -> str:
+        """
+        Modelin içerik özeti: motor, özellikler, eğitim örnekleri ve kalibrasyon.
+        Aynı özet aynı sınıflandırmaları verir; diskteki önbellekler (ör. chunk
+        intent etiketleri) bu özetle doğrulanır. Paylaşımlı indeksten yüklenen
+        modelde eğitim verisi olmadığından kaynak modelin özeti döner.
+        """
+        if self.source_fingerprint:
+            return self.source_fingerprint
+        digest = hashlib.sha256()
+        digest.update(f"{self.engine}|{self.features}|{self._n_rows() if self.hasher else ''}\n".encode('utf-8'))
+        for intent, text in self.training_data:
+            digest.update(f"{intent}|{text}\n".encode('utf-8'))
+        digest.update(f"{self.temperature!r}|{self.reject_threshold!r}".encode('utf-8'))
+        return digest.hexdigest()
+    
+    def copy(self) -> "IntentClassifier":
+        """
+        Artımlı güncelleme için kopya. add_examples'ın yerinde değiştirdiği sayaçlar
+        ve eğitim verisi kopyalanır; tek atamayla değiştirilen yapılar (idf, intent
+        vektörleri, ağırlıklar) paylaşılır. Maliyet model boyutuyla sınırlıdır,
+        örnekler yeniden işlenmez.
+        """
+        clone = copy.copy(self)
+        clone.training_data = list(self.training_data)
+        clone.intent_docs = defaultdict(list, {i: list(d) for i, d in self.intent_docs.items()})
+        clone.vocabulary = dict(self.vocabulary)
+        clone.doc_freq = defaultdict(int, self.doc_freq)
+        clone.intent_tf_sums = defaultdict(lambda: defaultdict(float), {
+            i: defaultdict(float, sums) for i, sums in self.intent_tf_sums.items()
+        })
+        clone.intent_counts = defaultdict(int, self.intent_counts)
+        clone.intent_word_counts = defaultdict(lambda: defaultdict(int), {
+            i: defaultdict(int, counts) for i, counts in self.intent_word_counts.items()
+        })
+        clone.intent_token_totals = defaultdict(int, self.intent_token_totals)
+        return clone
+    
+    def add_examples(self, examples: List[Tuple[str, str]]) -> int:
+        """
+        Çalışırken yeni etiketli örnekler ekler (tam yeniden eğitim yapılmaz).
+        
+        Sadece yeni örnekler tokenize edilir; doküman frekansları, IDF ve intent
+        vektörleri tutulan toplamlar üzerinden güncellenir. Örnek sayısı (N) değiştiği
+        için IDF tüm kelimelerde kayar, bu yüzden tüm vektörler toplamlardan yeniden ölçeklenir.
+        
+        Model yerinde güncellenir; başka thread'lerin sınıflandırdığı bir model
+        güncellenecekse önce copy() ile kopyalanmalıdır (bkz. IntentModelHandle).
+        
+        Args:
+            examples: (intent, cümle) listesi
             
-            # Ortalamasını al
-            num_docs = len(docs)
-            for word in combined:
-                combined[word] /= num_docs
+        Returns:
+            Eklenen örnek sayısı
+        """
+        new_examples = [
+            (intent.strip().lower(), text.strip().lower())
+            for intent, text in examples
+            if intent.strip() and text.strip()
+        ]
+        if not new_examples:
+            return 0
+        
+        for intent, text in new_examples:
+            self.training_data.append((intent, text))
+            self.intent_docs[intent].append(text)
+        
+        verbose, self.verbose = self.verbose, False
+        self._build_vocabulary(new_examples)
+        self.verbose = verbose
+        self._compute_idf()
+        self._compute_intent_vectors()
+        self._train_linear(new_examples)
+        return len(new_examples)
+    
+    def _train_linear(self, new_examples: Optional[List[Tuple[str, str]]] = None):
+        """
+        Doğrusal motorun ağırlık matrisini eğitir (centroid motorunda bir şey yapmaz).
+        new_examples verilirse logreg sadece bu örneklerle mevcut ağırlıklardan devam eder.
+        """
+        if self.engine == "nb":
+            self._train_naive_bayes()
+        elif self.engine == "logreg":
+            self._train_logreg(new_examples)
+    
+    def _train_naive_bayes(self):
+        """
+        Multinomial Naive Bayes: ağırlık = log P(kelime | intent), sabit = log P(intent).
+        Tutulan kelime sayaçlarından hesaplanır; örnekler yeniden işlenmez.
+        """
+        labels = sorted(self.intent_counts)
+        n_labels = len(labels)
+        vocab_size = len(self.doc_freq)
+        total_docs = sum(self.intent_counts.values())
+        
+        # Eğitimde görülen özelliklerin satırları; diğerleri sıfır (etkisiz) kalır
+        rows = {self._feature_index(word): [0.0] * n_labels for word in self.doc_freq}
+        for k, intent in enumerate(labels):
+            word_counts = self.intent_word_counts[intent]
+            denominator = math.log(self.intent_token_totals[intent] + self.NB_ALPHA * vocab_size)
+            log_unseen = math.log(self.NB_ALPHA) - denominator
+            for word in self.doc_freq:
+                count = word_counts.get(word)
+                rows[self._feature_index(word)][k] = (
+                    math.log(count + self.NB_ALPHA) - denominator if count else log_unseen
+                )
+        
+        self._set_weights(labels, rows, [math.log(self.intent_counts[i] / total_docs) for i in labels])
+    
+    def _linear_features(self, tokens: List[str]) -> List[Tuple[int, float]]:
+        """
+        Doğrusal motorun seyrek özellikleri: (matris satırı, değer) listesi.
+        nb: özellik sayıları, logreg: L2-normalize TF-IDF. Bilinmeyen kelimeler atlanır.
+        """
+        if self.engine == "nb":
+            counts: Dict[int, float] = defaultdict(float)
+            for token in tokens:
+                idx = self._feature_index(token)
+                if idx is not None:
+                    counts[idx] += 1.0
+            return list(counts.items())
+        
+        tfidf = {w: tf_val * self._idf_value(w) for w, tf_val in self._compute_tf(tokens).items()}
+        norm = math.sqrt(sum(v ** 2 for v in tfidf.values()))
+        if norm == 0:
+            return []
+        features = []
+        for w, v in tfidf.items():
+            idx = self._feature_index(w)
+            if idx is not None:
+                features.append((idx, v / norm))
+        return features
+    
+    def _train_logreg(self, new_examples: Optional[List[Tuple[str, str]]] = None):
+        """
+        Çok sınıflı lojistik regresyonu SGD ile eğitir (L2 düzenlileştirme).
+        
+        new_examples verilirse (warm start) mevcut ağırlıklardan devam edilir ve
+        SGD sadece yeni örnekler ile eski örneklerden rastgele seçilen sınırlı bir
+        tekrar kümesi (yeni örnek başına LOGREG_REHEARSAL) üzerinde çalışır.
+        Maliyet derlem boyutuna değil eklenen örnek sayısına bağlıdır; eski
+        örneklerin unutulmasını tekrar kümesi sınırlar.
+        """
+        labels = sorted(self.intent_counts)
+        n_labels = len(labels)
+        label_idx = {intent: k for k, intent in enumerate(labels)}
+        # Sadece eğitimde görülen özelliklerin satırları güncellenir
+        rows = {self._feature_index(word): [0.0] * n_labels for word in self.doc_freq}
+        bias = [0.0] * n_labels
+        
+        epochs = self.LOGREG_EPOCHS
+        # Warm start'ta öğrenme oranı tam eğitimin bittiği yerden azalmaya devam eder
+        first_epoch = 0
+        examples = self.training_data
+        if new_examples and self.labels:
+            # Önceki ağırlıkları özellik satırı ve intent adına göre aktar
+            old_k = {intent: k for k, intent in enumerate(self.labels)}
+            old_rows = len(self.weights) // len(self.labels)
+            for idx in rows:
+                if idx < old_rows:
+                    row = self.weights[idx * len(self.labels):(idx + 1) * len(self.labels)]
+                    rows[idx] = [row[old_k[i]] if i in old_k else 0.0 for i in labels]
+            bias = [self.bias[old_k[i]] if i in old_k else 0.0 for i in labels]
+            epochs = self.LOGREG_WARM_EPOCHS
+            first_epoch = self.LOGREG_EPOCHS
             
-            self.intent_vectors[intent] = dict(combined)
+            old_count = len(self.training_data) - len(new_examples)
+            rehearsal = min(old_count, self.LOGREG_REHEARSAL * len(new_examples))
+            sample_rng = random.Random(len(self.training_data))
+            examples = [self.training_data[i] for i in sample_rng.sample(range(old_count), rehearsal)]
+            examples += new_examples
+        
+        data = [(self._linear_features(self._tokenize(text)), label_idx[intent])
+                for intent, text in examples]
+        order = list(range(len(data)))
+        rng = random.Random(42)
+        for epoch in range(first_epoch, first_epoch + epochs):
+            rng.shuffle(order)
+            eta = self.LOGREG_LEARNING_RATE / (1 + 0.1 * epoch)
+            for j in order:
+                features, y = data[j]
+                logits = list(bias)
+                for idx, value in features:
+                    row = rows[idx]
+                    for k in range(n_labels):
+                        logits[k] += value * row[k]
+                probs = self._softmax(logits)
+                probs[y] -= 1.0  # gradyan: p - y
+                for idx, value in features:
+                    row = rows[idx]
+                    for k in range(n_labels):
+                        row[k] -= eta * (probs[k] * value + self.LOGREG_L2 * row[k])
+                for k in range(n_labels):
+                    bias[k] -= eta * probs[k]
+        
+        self._set_weights(labels, rows, bias)
+    
+    def _set_weights(self, labels: List[str], rows: Dict[int, List[float]], bias: List[float]):
+        """
+        Ağırlıkları bitişik float32 matrise yazar (yeni nesneler tek atamayla devreye alınır).
+        rows'ta olmayan satırlar sıfırdır.
+        """
+        n_labels = len(labels)
+        weights = array('f', bytes(4 * n_labels * self._n_rows()))
+        for idx, row in rows.items():
+            weights[idx * n_labels:(idx + 1) * n_labels] = array('f', row)
+        self.bias = bias
+        self.weights = weights
+        self.labels = labels
+    
+    def save_linear(self, path: str) -> Dict:
+        """
+        Doğrusal motorun ağırlık matrisini ham float32 dosyası olarak kaydeder.
+        
+        Returns:
+            load_linear için gereken bilgiler (intent sırası, sabit terimler)
+        """
+        with open(path, 'wb') as f:
+            f.write(bytes(self.weights))
+        return {"labels": list(self.labels), "bias": list(self.bias), "rows": self._n_rows()}
+    
+    def load_linear(self, path: str, labels: List[str], bias: List[float]):
+        """
+        save_linear ile kaydedilen matrisi salt-okunur belleğe eşler (mmap).
+        Aynı dosyayı açan süreçler matrisi tek kopya olarak paylaşır.
+        """
+        weights = _map_floats(path)
+        if len(weights) != len(labels) * self._n_rows():
+            raise ValueError(f"{path} bu eğitim verisiyle uyumsuz ({len(weights)} ağırlık)")
+        self.bias = list(bias)
+        self.weights = weights
+        self.labels = list(labels)
+    
+    def save_centroid(self, path: str) -> Dict:
+        """
+        Centroid motorunun norma bölünmüş intent vektörlerini ham float32
+        (özellik x intent) matrisi olarak kaydeder; satırlar ağırlık matrisindekiyle aynıdır.
+        
+        Returns:
+            load_centroid için gereken bilgiler (intent sırası)
+        """
+        labels = list(self.intent_vectors)
+        n_labels = len(labels)
+        weights = array('f', bytes(4 * n_labels * self._n_rows()))
+        for k, intent in enumerate(labels):
+            norm = self.intent_norms.get(intent, 0.0)
+            if norm == 0:
+                continue
+            for feature, value in self.intent_vectors[intent].items():
+                idx = self._feature_index(feature)
+                if idx is not None:
+                    weights[idx * n_labels + k] = value / norm
+        with open(path, 'wb') as f:
+            f.write(bytes(weights))
+        return {"labels": labels, "rows": self._n_rows()}
+    
+    def load_centroid(self, path: str, labels: List[str]):
+        """
+        save_centroid ile kaydedilen matrisi salt-okunur belleğe eşler (mmap);
+        centroid skorları intent vektörü sözlükleri yerine bu matristen hesaplanır.
+        """
+        weights = _map_floats(path)
+        if len(weights) != len(labels) * self._n_rows():
+            raise ValueError(f"{path} bu eğitim verisiyle uyumsuz ({len(weights)} ağırlık)")
+        self.centroid_weights = weights
+        self.labels = list(labels)
+    
+    def save_features(self, vocabulary_path: str, idf_path: str):
+        """
+        Kelime dağarcığını (satır sırasıyla, satır başına bir kelime; char modunda boş)
+        ve satır başına IDF değerlerini ham float32 dosyası olarak kaydeder.
+        """
+        with open(vocabulary_path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{word}\n" for word in self.vocabulary)
+        row_idf = array('f', [1.0]) * self._n_rows()
+        for token, value in self.idf.items():
+            idx = self._feature_index(token)
+            if idx is not None:
+                row_idf[idx] = value
+        with open(idf_path, 'wb') as f:
+            f.write(bytes(row_idf))
+    
+    def load_features(self, vocabulary_path: str, idf_path: str):
+        """
+        save_features ile kaydedilen kelime dağarcığını yükler ve IDF değerlerini
+        belleğe eşler (mmap). Eğitim verisi olmadan (examples=[]) oluşturulup böyle
+        yüklenen model sadece sınıflandırma içindir; örnek eklenemez.
+        """
+        with open(vocabulary_path, 'r', encoding='utf-8') as f:
+            self.vocabulary = {line.rstrip('\n'): row for row, line in enumerate(f)}
+        row_idf = _map_floats(idf_path)
+        if len(row_idf) != self._n_rows():
+            raise ValueError(f"{idf_path} kelime dağarcığıyla uyumsuz ({len(row_idf)} satır)")
+        self.row_idf = row_idf
+    
+    def _softmax(self, logits: List[float]) -> List[float]:
+        """Sayısal olarak kararlı softmax"""
+        max_logit = max(logits)
+        exps = [math.exp(v - max_logit) for v in logits]
+        total = sum(exps)
+        return [v / total for v in exps]
+    
+    def _linear_scores(self, text: str) -> Optional[Dict[str, float]]:
+        """
+        Doğrusal motorla intent olasılıklarını hesaplar: her bilinen özellik için
+        matristen bir satır alınıp toplanır. Metinde kelime yoksa None döner.
+        """
+        tokens = self._tokenize(text)
+        if not tokens:
+            return None
+        
+        labels, weights, n_labels = self.labels, self.weights, len(self.labels)
+        features = self._linear_features(tokens)
+        if not features:
+            # Hiçbir kelime bilinmiyor - centroid motorundaki gibi sıfır skor
+            return {intent: 0.0 for intent in labels}
+        
+        logits = list(self.bias)
+        n_rows = len(weights) // n_labels if n_labels else 0
+        for idx, value in features:
+            # Kelime dağarcığı ağırlıklardan önce büyür; matriste henüz satırı olmayan
+            # kelimeler bilinmeyen kelime gibi atlanır
+            if idx >= n_rows:
+                continue
+            start = idx * n_labels
+            row = weights[start:start + n_labels]
+            logits = [acc + value * w for acc, w in zip(logits, row)]
+        if not labels:
+            return {}
+        return dict(zip(labels, self._softmax(logits)))
     
     def _cosine_similarity(self, vec1: Dict[str, float], vec2: Dict[str, float]) -> float:
         """İki vektör arasındaki kosinüs benzerliğini hesaplar"""
@@ -191,19 +706,26 @@ class IntentClassifier:
         Returns:
             (tahmin_edilen_intent, güven_skoru, tüm_skorlar)
         """
-        # Girdi vektörünü hesapla
-        input_vector = self._compute_tfidf(text)
+        if self.engine == "centroid" and self.centroid_weights:
+            # Belleğe eşlenmiş intent matrisi (paylaşımlı indeks)
+            scores = self._mapped_centroid_scores(text)
+        elif self.engine == "centroid":
+            # Girdi vektörünü hesapla
+            input_vector = self._compute_tfidf(text)
+            # Her intent ile benzerlik hesapla
+            scores = self._score_vector(input_vector) if input_vector else None
+        else:
+            # Doğrusal motor: intent olasılıkları
+            scores = self._linear_scores(text)
         
-        if not input_vector:
+        return self._decide(scores)
+    
+    def _decide(self, scores: Optional[Dict[str, float]]) -> Tuple[str, float, Dict[str, float]]:
+        """Skorlardan (intent, güven, skorlar) sonucunu üretir"""
+        if scores is None:
             # Boş veya çok kısa metin
             return "selamlama", 0.5, {"selamlama": 0.5}
         
-        # Her intent ile benzerlik hesapla
-        scores: Dict[str, float] = {}
-        for intent, intent_vec in self.intent_vectors.items():
-            similarity = self._cosine_similarity(input_vector, intent_vec)
-            scores[intent] = similarity
-        
         # En yüksek skoru bul
         if not scores:
             return "kapsam_disi", 0.0, {}
@@ -218,6 +740,190 @@ class IntentClassifier:
         
         return best_intent, best_score, scores
     
+    def _score_vector(self, input_vector: Dict[str, float]) -> Dict[str, float]:
+        """Girdi vektörünün her intent ile kosinüs benzerliği (önceden hesaplı normlarla)"""
+        input_norm = math.sqrt(sum(v ** 2 for v in input_vector.values()))
+        scores: Dict[str, float] = {}
+        for intent, intent_vec in self.intent_vectors.items():
+            intent_norm = self.intent_norms.get(intent, 0.0)
+            if input_norm == 0 or intent_norm == 0:
+                scores[intent] = 0.0
+                continue
+            dot_product = sum(val * intent_vec[w] for w, val in input_vector.items() if w in intent_vec)
+            scores[intent] = dot_product / (input_norm * intent_norm)
+        return scores
+    
+    def _mapped_centroid_scores(self, text: str) -> Optional[Dict[str, float]]:
+        """
+        Belleğe eşlenmiş centroid matrisiyle kosinüs benzerlikleri (_score_vector ile
+        aynı kurallar). Metinde kelime yoksa None döner.
+        """
+        input_vector = self._compute_tfidf(text)
+        if not input_vector:
+            return None
+        
+        labels, weights, n_labels = self.labels, self.centroid_weights, len(self.labels)
+        input_norm = math.sqrt(sum(v ** 2 for v in input_vector.values()))
+        if input_norm == 0:
+            return {intent: 0.0 for intent in labels}
+        dots = [0.0] * n_labels
+        for feature, value in input_vector.items():
+            idx = self._feature_index(feature)
+            if idx is None:
+                continue
+            start = idx * n_labels
+            dots = [acc + value * w for acc, w in zip(dots, weights[start:start + n_labels])]
+        return {intent: dot / input_norm for intent, dot in zip(labels, dots)}
+    
+    def classify_batch(self, texts: List[str]) -> List[Tuple[str, float, Dict[str, float]]]:
+        """
+        Birden fazla metni tek geçişte sınıflandırır (ör. doküman chunk'larının etiketlenmesi).
+        
+        Metinler tek tek tokenize edilir; tüm metinlerin seyrek özellikleri birlikte
+        toplanıp intent matrisiyle (centroid: norma bölünmüş intent vektörleri,
+        nb/logreg: ağırlık matrisi) tek seferde çarpılır. Sonuçlar classify ile aynıdır.
+        numpy yoksa metinler tek tek sınıflandırılır.
+        """
+        if not texts:
+            return []
+        if not NUMPY_AVAILABLE:
+            return [self.classify(text) for text in texts]
+        _load_numpy()
+        if self.engine == "centroid":
+            batch_scores = self._centroid_scores_batch(texts)
+        else:
+            batch_scores = self._linear_scores_batch(texts)
+        return [self._decide(scores) for scores in batch_scores]
+    
+    def _centroid_matrix(self):
+        """
+        (intent listesi, özellik -> satır, özellik x intent matrisi); sütunlar intent
+        normuna bölünmüş. Matris belleğe eşlenmişse satırlar ağırlık matrisindeki gibidir (None).
+        """
+        if self.centroid_weights:
+            matrix = np.frombuffer(self.centroid_weights, dtype=np.float32).reshape(-1, len(self.labels))
+            return self.labels, None, matrix
+        
+        vectors = self.intent_vectors
+        cache = self._centroid_matrix_cache
+        if cache is not None and cache[0] is vectors:
+            return cache[1:]
+        
+        intents = list(vectors)
+        rows: Dict = {}
+        for vector in vectors.values():
+            for feature in vector:
+                rows.setdefault(feature, len(rows))
+        matrix = np.zeros((len(rows), len(intents)), dtype=np.float64)
+        for k, intent in enumerate(intents):
+            norm = self.intent_norms.get(intent, 0.0)
+            if norm == 0:
+                continue
+            for feature, value in vectors[intent].items():
+                matrix[rows[feature], k] = value / norm
+        
+        self._centroid_matrix_cache = (vectors, intents, rows, matrix)
+        return intents, rows, matrix
+    
+    @staticmethod
+    def _sparse_product(entries: List[Tuple[int, int, float]], n_texts: int, matrix):
+        """Seyrek (metin, satır, değer) girdilerini matrisle çarpar: (metin x intent)"""
+        result = np.zeros((n_texts, matrix.shape[1]), dtype=np.float64)
+        if entries:
+            # Girdiler metin sırasıyla eklenir: her metnin satırları ardışık bloklardır
+            text_ids, row_ids, values = (np.asarray(column) for column in zip(*entries))
+            products = values[:, None] * matrix[row_ids]
+            starts = np.flatnonzero(np.r_[True, text_ids[1:] != text_ids[:-1]])
+            result[text_ids[starts]] = np.add.reduceat(products, starts, axis=0)
+        return result
+    
+    def _centroid_scores_batch(self, texts: List[str]) -> List[Optional[Dict[str, float]]]:
+        """Metinlerin intent vektörleriyle kosinüs benzerlikleri (boş metinde None)"""
+        intents, rows, matrix = self._centroid_matrix()
+        entries = []
+        norms = []
+        for t, text in enumerate(texts):
+            vector = self._compute_tfidf(text)
+            norms.append(math.sqrt(sum(v ** 2 for v in vector.values())) if vector else 0.0)
+            for feature, value in vector.items():
+                row = self._feature_index(feature) if rows is None else rows.get(feature)
+                if row is not None:
+                    entries.append((t, row, value))
+        
+        dots = self._sparse_product(entries, len(texts), matrix)
+        results: List[Optional[Dict[str, float]]] = []
+        for t, norm in enumerate(norms):
+            if not norm:
+                results.append(None)
+                continue
+            results.append(dict(zip(intents, (dots[t] / norm).tolist())))
+        return results
+    
+    def _linear_scores_batch(self, texts: List[str]) -> List[Optional[Dict[str, float]]]:
+        """Doğrusal motorla metinlerin intent olasılıkları (_linear_scores ile aynı kurallar)"""
+        labels, n_labels = self.labels, len(self.labels)
+        if not n_labels:
+            return [None if not self._tokenize(text) else {} for text in texts]
+        weights = np.frombuffer(self.weights, dtype=np.float32).reshape(-1, n_labels)
+        n_rows = weights.shape[0]
+        
+        entries = []
+        kinds = []  # None: boş metin, False: bilinen özellik yok, True: skorlanır
+        for t, text in enumerate(texts):
+            tokens = self._tokenize(text)
+            if not tokens:
+                kinds.append(None)
+                continue
+            features = self._linear_features(tokens)
+            kinds.append(bool(features))
+            for idx, value in features:
+                if idx < n_rows:
+                    entries.append((t, idx, value))
+        
+        logits = self._sparse_product(entries, len(texts), weights) + np.asarray(self.bias, dtype=np.float64)
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        
+        results: List[Optional[Dict[str, float]]] = []
+        for t, kind in enumerate(kinds):
+            if kind is None:
+                results.append(None)
+            elif not kind:
+                results.append({intent: 0.0 for intent in labels})
+            else:
+                results.append(dict(zip(labels, probs[t].tolist())))
+        return results
+    
+    def calibrate_scores(self, scores: Dict[str, float],
+                         temperature: Optional[float] = None) -> Dict[str, float]:
+        """Kosinüs skorlarını sıcaklık ölçekli softmax ile olasılıklara çevirir"""
+        if not scores:
+            return {}
+        temperature = temperature or self.temperature
+        max_score = max(scores.values())
+        exps = {intent: math.exp((score - max_score) / temperature) for intent, score in scores.items()}
+        total = sum(exps.values())
+        return {intent: value / total for intent, value in exps.items()}
+    
+    def out_of_scope_probability(self, scores: Dict[str, float]) -> Tuple[float, float]:
+        """
+        Kalibre edilmiş kapsam dışı olasılığını ve en yakın diğer intent'e farkını döndürür
+        
+        Returns:
+            (p_kapsam_disi, p_kapsam_disi - en yüksek diğer olasılık)
+        """
+        probs = self.calibrate_scores(scores)
+        p_out = probs.get("kapsam_disi", 0.0)
+        p_other = max((p for intent, p in probs.items() if intent != "kapsam_disi"), default=0.0)
+        return p_out, p_out - p_other
+    
+    def should_reject(self, scores: Dict[str, float], threshold: Optional[float] = None) -> bool:
+        """Mesaj LLM'e gönderilmeden kapsam dışı olarak reddedilmeli mi"""
+        threshold = self.reject_threshold if threshold is None else threshold
+        p_out, margin = self.out_of_scope_probability(scores)
+        return margin > 0 and p_out >= threshold
+    
     def get_intent_description(self, intent: str) -> str:
         """Intent için açıklama döndürür"""
         return self.INTENT_DESCRIPTIONS.get(intent, "❓ Bilinmeyen")
@@ -243,12 +949,248 @@ class IntentClassifier:
         if intent not in self.intent_vectors:
             return []
         
+        if self.hasher:
+            # Hash indeksleri kelimeye geri çevrilemez; örneklerdeki kelimeler
+            # intent vektöründeki özellik ağırlıklarının toplamıyla sıralanır
+            vec = self.intent_vectors[intent]
+            word_scores = {
+                word: sum(vec.get(idx, 0.0) for idx in self.hasher.hash_tokens([word]))
+                for text in self.intent_docs[intent] for word in self._words(text)
+            }
+            return sorted(word_scores, key=word_scores.get, reverse=True)[:20]
+        
         vec = self.intent_vectors[intent]
         # En yüksek TF-IDF değerine sahip kelimeleri döndür
         sorted_words = sorted(vec.items(), key=lambda x: x[1], reverse=True)
         return [word for word, _ in sorted_words[:20]]
 
 
+class IntentModelHandle:
+    """
+    Sürümlü, çalışırken yeniden yüklenebilen intent modeli.
+    
+    Eğitim ve kalibrasyon dosyaları arka plan thread'inde izlenir; değiştiklerinde
+    yeni model ayrı olarak oluşturulup tek atamayla devreye alınır. Devam eden
+    sınıflandırmalar eski modelle tamamlanır, sonraki istekler yeni modeli kullanır.
+    Öznitelik erişimleri (classify, should_reject, ...) güncel modele yönlendirilir.
+    
+    Geri bildirim dosyasına (onaylanmış örnekler) eklenen satırlar ise modeli
+    yeniden oluşturmadan add_examples ile artımlı olarak öğrenilir. Güncelleme
+    modelin kopyasında yapılır ve kopya tek atamayla devreye alınır; devam eden
+    sınıflandırmalar yarım güncellenmiş bir model görmez.
+    """
+    
+    # Dosya değişikliği kontrol aralığı (saniye)
+    POLL_INTERVAL = 5.0
+    
+    def __init__(self, data_file: str = "intents.txt",
+                 calibration_file: str = "intent_calibration.json",
+                 feedback_file: Optional[str] = "intent_feedback.txt",
+                 poll_interval: Optional[float] = None, watch: bool = True,
+                 engine: str = "centroid", features: str = "words"):
+        """
+        Args:
+            data_file: Eğitim verisi dosyası
+            calibration_file: Kalibrasyon dosyası
+            feedback_file: Onaylanmış ek örnekler (intent|cümle, sadece sonuna eklenir)
+            poll_interval: Değişiklik kontrol aralığı (varsayılan POLL_INTERVAL)
+            watch: Dosyaları arka planda izle
+            engine: Sınıflandırma motoru (centroid, nb, logreg)
+            features: Özellik türü (words, char)
+        """
+        self.data_file = data_file
+        self.engine = engine
+        self.features = features
+        self.calibration_file = calibration_file
+        self.feedback_file = feedback_file
+        self.poll_interval = poll_interval or self.POLL_INTERVAL
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        
+        self._signature = self._file_signature()
+        self.model = IntentClassifier(data_file, calibration_file, engine=engine, features=features)
+        self._feedback_offset = 0
+        self._apply_feedback(self.model)
+        self.version = 1
+        self.loaded_at = time.time()
+        self.last_error: Optional[str] = None
+        
+        if watch:
+            self.start_watching()
+    
+    def __getattr__(self, name):
+        # Sadece handle'da olmayan öznitelikler için çağrılır
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+    
+    def _file_signature(self) -> Tuple:
+        """İzlenen dosyaların (değişiklik zamanı, boyut) bilgisi"""
+        signature = []
+        for path in (self.data_file, self.calibration_file, self.feedback_file):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except (OSError, TypeError):
+                signature.append(None)
+        return tuple(signature)
+    
+    def _apply_feedback(self, model: IntentClassifier, offset: int = 0) -> int:
+        """
+        Geri bildirim dosyasının offset'ten sonraki tam satırlarını modele ekler.
+        
+        Returns:
+            Eklenen örnek sayısı
+        """
+        if not self.feedback_file or not os.path.exists(self.feedback_file):
+            self._feedback_offset = 0
+            return 0
+        
+        with open(self.feedback_file, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        # Yazılmakta olan yarım satır bir sonraki kontrole bırakılır
+        end = data.rfind(b"\n") + 1
+        self._feedback_offset = offset + end
+        
+        examples = []
+        for line in data[:end].decode('utf-8').splitlines():
+            line = line.strip()
+            if not line or line.startswith('#') or '|' not in line:
+                continue
+            intent, text = line.split('|', 1)
+            examples.append((intent, text))
+        return model.add_examples(examples)
+    
+    def add_examples(self, examples: List[Tuple[str, str]]) -> int:
+        """
+        Onaylanmış örnekleri geri bildirim dosyasına yazar ve çalışan modele ekler
+        
+        Returns:
+            Eklenen örnek sayısı
+        """
+        lines = [f"{intent.strip().lower()}|{' '.join(text.split())}"
+                 for intent, text in examples if intent.strip() and text.strip()]
+        if not lines:
+            return 0
+        
+        with self._reload_lock:
+            if self.feedback_file:
+                with open(self.feedback_file, 'a', encoding='utf-8') as f:
+                    f.write("\n".join(lines) + "\n")
+            model = self.model.copy()
+            added = self._apply_feedback(model, self._feedback_offset)
+            self._signature = self._file_signature()
+            if added:
+                self.model = model
+                self.version += 1
+                self.loaded_at = time.time()
+            return added
+    
+    def reload(self, force: bool = False) -> bool:
+        """
+        Dosyalar değiştiyse modeli günceller: eğitim veya kalibrasyon dosyası
+        değiştiyse yeniden oluşturup devreye alır, sadece geri bildirim dosyasına
+        satır eklendiyse yeni örnekleri mevcut modele artımlı olarak ekler.
+        
+        Returns:
+            Model güncellendiyse True
+        """
+        with self._reload_lock:
+            # İmza eğitimden önce alınır: eğitim sırasında dosya yine değişirse
+            # bir sonraki kontrolde tekrar yüklenir
+            signature = self._file_signature()
+            if not force and signature == self._signature:
+                return False
+            
+            feedback = signature[2]
+            feedback_appended = (
+                signature[:2] == self._signature[:2]
+                and feedback is not None and feedback[1] >= self._feedback_offset
+            )
+            if not force and feedback_appended:
+                self._signature = signature
+                model = self.model.copy()
+                added = self._apply_feedback(model, self._feedback_offset)
+                if added:
+                    self.model = model
+                    self.version += 1
+                    self.loaded_at = time.time()
+                    print(f"➕ Intent modeline {added} onaylı örnek eklendi (v{self.version})")
+                return bool(added)
+            
+            try:
+                model = IntentClassifier(self.data_file, self.calibration_file, verbose=False,
+                                         engine=self.engine, features=self.features)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Intent modeli yeniden yüklenemedi: {e}")
+                return False
+            
+            self._signature = signature
+            # Yarım kaydedilmiş / boş dosyada eski model korunur
+            if not model.training_data:
+                self.last_error = f"{self.data_file} boş, eski model korunuyor"
+                return False
+            
+            self._apply_feedback(model)
+            self.model = model
+            self.version += 1
+            self.loaded_at = time.time()
+            self.last_error = None
+            print(f"🔄 Intent modeli yeniden yüklendi (v{self.version}, "
+                  f"{len(model.training_data)} örnek)")
+            return True
+    
+    def _watch(self):
+        """Dosyaları periyodik olarak kontrol eder"""
+        while not self._stop.wait(self.poll_interval):
+            self.reload()
+    
+    def start_watching(self):
+        """Arka plan izleme thread'ini başlatır"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="intent-model-watcher", daemon=True)
+        self._watcher.start()
+    
+    def stop_watching(self):
+        """Arka plan izlemesini durdurur"""
+        self._stop.set()
+        if self._watcher:
+            self._watcher.join(timeout=self.poll_interval)
+            self._watcher = None
+
+
+# Süreç genelinde paylaşılan modeller: dosya -> handle
+_shared_models: Dict[Tuple[str, str, str, str], IntentModelHandle] = {}
+_shared_models_lock = threading.Lock()
+
+
+def get_shared_intent_model(data_file: str = "intents.txt",
+                            calibration_file: str = "intent_calibration.json",
+                            engine: Optional[str] = None,
+                            features: Optional[str] = None) -> IntentModelHandle:
+    """
+    Tüm oturumların kullandığı ortak (tek) intent modeli handle'ını döndürür
+    
+    Args:
+        engine: Sınıflandırma motoru (None ise INTENT_ENGINE ortam değişkeni, yoksa centroid)
+        features: Özellik türü (None ise INTENT_FEATURES ortam değişkeni, yoksa words)
+    """
+    engine = engine or os.getenv("INTENT_ENGINE", "centroid")
+    features = features or os.getenv("INTENT_FEATURES", "words")
+    key = (os.path.abspath(data_file), os.path.abspath(calibration_file), engine, features)
+    with _shared_models_lock:
+        handle = _shared_models.get(key)
+        if handle is None:
+            handle = IntentModelHandle(data_file, calibration_file, engine=engine, features=features)
+            _shared_models[key] = handle
+        return handle
+
+
 # Test için
 if __name__ == "__main__":
     classifier = IntentClassifier()
@@ -0,0 +1,153 @@
+"""
+Intent Geri Bildirim Modülü
+Düşük güvenle sınıflandırılan mesajları inceleme kuyruğuna yazar. Bir temsilcinin
+onayladığı örnekler intent_feedback.txt dosyasına eklenir; çalışan uygulama bu
+dosyayı izleyip yeni örnekleri modele artımlı olarak ekler (yeniden başlatma yok).
+
+Kullanım:
+    python intent_feedback.py    # bekleyen mesajları etiketle
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from typing import List, Dict, Tuple, Any
+
+from intent_classifier import IntentClassifier
+
+
+REVIEW_FILE = "intent_review.jsonl"
+FEEDBACK_FILE = "intent_feedback.txt"
+
+# Bu skorun altındaki sınıflandırmalar incelemeye gönderilir
+LOW_CONFIDENCE_SCORE = 0.2
+
+_file_lock = threading.Lock()
+
+
+def _clean(text: str) -> str:
+    """Mesajı tek satırlık örneğe çevirir"""
+    return " ".join(text.split())
+
+
+def log_low_confidence(text: str, intent: str, score: float,
+                       review_file: str = REVIEW_FILE) -> bool:
+    """
+    Düşük güvenli mesajı inceleme kuyruğuna ekler.
+
+    Returns:
+        Mesaj kuyruğa eklendiyse True
+    """
+    text = _clean(text)
+    if not text or score >= LOW_CONFIDENCE_SCORE:
+        return False
+
+    entry = {
+        "text": text,
+        "predicted": intent,
+        "score": round(score, 4),
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    with _file_lock, open(review_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return True
+
+
+def load_pending(review_file: str = REVIEW_FILE) -> List[Dict[str, Any]]:
+    """İnceleme bekleyen mesajları döndürür (aynı metin bir kez)"""
+    if not os.path.exists(review_file):
+        return []
+
+    pending: Dict[str, Dict[str, Any]] = {}
+    with open(review_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            pending.setdefault(entry["text"].lower(), entry)
+    return list(pending.values())
+
+
+def remove_pending(texts: List[str], review_file: str = REVIEW_FILE):
+    """
+    İncelenen mesajları kuyruktan çıkarır. Dosya yeniden okunur; böylece inceleme
+    sırasında uygulamanın eklediği yeni mesajlar kaybolmaz.
+    """
+    done = {text.lower() for text in texts}
+    if not done or not os.path.exists(review_file):
+        return
+
+    with _file_lock:
+        with open(review_file, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        kept = []
+        for line in lines:
+            try:
+                if json.loads(line)["text"].lower() in done:
+                    continue
+            except (ValueError, KeyError):
+                continue
+            kept.append(line)
+        with open(review_file, 'w', encoding='utf-8') as f:
+            f.writelines(kept)
+
+
+def confirm_examples(examples: List[Tuple[str, str]], feedback_file: str = FEEDBACK_FILE) -> int:
+    """
+    Onaylanan (intent, cümle) örneklerini geri bildirim dosyasına ekler.
+
+    Returns:
+        Eklenen örnek sayısı
+    """
+    lines = [f"{intent.strip().lower()}|{_clean(text)}" for intent, text in examples
+             if intent.strip() and _clean(text)]
+    if not lines:
+        return 0
+    with _file_lock, open(feedback_file, 'a', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    return len(lines)
+
+
+def main():
+    pending = load_pending()
+    if not pending:
+        print("✅ İnceleme bekleyen mesaj yok.")
+        return
+
+    intents = sorted(IntentClassifier.INTENT_DESCRIPTIONS)
+    print(f"📝 {len(pending)} mesaj inceleme bekliyor.")
+    print(f"   Kategoriler: {', '.join(intents)}")
+    print("   Enter: tahmini onayla • s: atla • q: çık\n")
+
+    confirmed = []
+    reviewed = []
+    for i, entry in enumerate(pending):
+        print(f"[{i + 1}/{len(pending)}] {entry['text']}")
+        answer = input(f"   Tahmin: {entry['predicted']} ({entry['score']:.2f}) → ").strip().lower()
+
+        if answer == "q":
+            break
+        if answer == "s":
+            reviewed.append(entry["text"])
+            continue
+
+        intent = answer or entry["predicted"]
+        if intent not in intents:
+            print(f"   ⚠️ Bilinmeyen kategori: {intent}, mesaj kuyrukta bırakıldı")
+            continue
+        confirmed.append((intent, entry["text"]))
+        reviewed.append(entry["text"])
+
+    added = confirm_examples(confirmed)
+    remove_pending(reviewed)
+    print(f"\n✅ {added} örnek {FEEDBACK_FILE} dosyasına eklendi, "
+          f"{len(pending) - len(reviewed)} mesaj kuyrukta.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Model Yönlendirme Modülü
+Mesajları maliyetine göre üç yoldan birine yönlendirir:
+- template: selamlaşma/teşekkür gibi sohbetler şablonla, LLM'siz yanıtlanır
+- fast: kısa ve güveni yüksek basit sorular küçük/hızlı modele gider
+- full: karmaşık arıza teşhisi seçili büyük modele gider
+LLM'e gitmeden yerel yanıtlanan arıza kodu soruları (dtc) ve kapsam dışı
+redler (reject) de ayrı yol olarak ölçülür.
+"""
+
+import re
+from typing import Dict, Optional, Any
+
+
+ROUTE_TEMPLATE = "template"
+ROUTE_FAST = "fast"
+ROUTE_FULL = "full"
+ROUTE_DTC = "dtc"
+ROUTE_REJECT = "reject"
+
+# Seçili modelin sağlayıcısına göre hızlı model
+FAST_MODELS = {
+    "gpt": "gpt-4o-mini",
+    "gemini": "gemini-2.5-flash-lite"
+}
+
+# Yaklaşık fiyatlar: model -> (girdi, çıktı) USD / 1M token
+MODEL_PRICES_PER_1M = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60)
+}
+
+# Token tahmini için ortalama karakter/token oranı
+CHARS_PER_TOKEN = 4
+
+
+class ModelRouter:
+    """Mesaj için yanıt yolunu seçer ve yol bazında metrik tutar"""
+
+    # Şablon kategorisi -> anahtar kelimeler
+    GREETING_PATTERNS = {
+        "thanks": ["teşekkür", "tesekkur", "sağol", "sağ ol", "eyvallah", "thanks", "thank you"],
+        "bye": ["görüşürüz", "hoşçakal", "hoşça kal", "iyi günler", "iyi geceler", "bye", "goodbye"],
+        "about": ["sen kimsin", "kimsin", "ne yapabilirsin", "who are you", "what can you do"],
+        "hello": ["merhaba", "selam", "naber", "nasılsın", "günaydın", "iyi akşamlar",
+                  "hello", "hi", "hey", "hola", "good morning", "good evening"]
+    }
+
+    GREETING_TEMPLATES = {
+        "hello": "👋 Merhaba! Ben araba sorunları konusunda uzman asistanınızım. "
+                 "Aracınızla ilgili yaşadığınız sorunu anlatırsanız memnuniyetle yardımcı olurum. 🚗",
+        "thanks": "Rica ederim! 😊 Aracınızla ilgili başka bir sorunuz olursa buradayım. 🚗",
+        "bye": "Görüşmek üzere! İyi yolculuklar dilerim. 🚗",
+        "about": "Ben bir araba uzmanı asistanıyım. Motor, fren, elektrik, klima, şanzıman, lastik, "
+                 "süspansiyon, egzoz ve bakım konularındaki sorularınızı yanıtlayabilir, "
+                 "arıza kodlarını (ör. P0300) açıklayabilirim. Sorununuzu anlatın, birlikte bakalım! 🚗"
+    }
+
+    # Şablonla yanıtlanacak mesajın en fazla kelime sayısı
+    TEMPLATE_MAX_WORDS = 6
+    # Hızlı modele gidecek mesajın en fazla kelime sayısı ve asgari intent güveni
+    FAST_MAX_WORDS = 12
+    FAST_MIN_SCORE = 0.35
+    # Bu sayıdan fazla doküman chunk'ı olan sorular büyük modele gider
+    FAST_MAX_CONTEXT_CHUNKS = 3
+
+    CAR_INTENTS = {"motor", "fren", "elektrik", "klima", "sanziman",
+                   "lastik", "suspansiyon", "egzoz", "bakim"}
+
+    def __init__(self):
+        self._patterns = {
+            name: re.compile("|".join(self._keyword_pattern(k) for k in keywords))
+            for name, keywords in self.GREETING_PATTERNS.items()
+        }
+        self.metrics: Dict[str, Dict[str, float]] = {
+            route: {"count": 0, "latency_ms": 0.0, "cost_usd": 0.0}
+            for route in (ROUTE_TEMPLATE, ROUTE_FAST, ROUTE_FULL, ROUTE_DTC, ROUTE_REJECT)
+        }
+
+    def _keyword_pattern(self, keyword: str) -> str:
+        """Kısa kelimeler tam kelime, diğerleri kelime başı (ekli halleri) ile eşleşir"""
+        escaped = re.escape(keyword)
+        if len(keyword) <= 3:
+            return rf"(?<!\w){escaped}(?!\w)"
+        return rf"(?<!\w){escaped}"
+
+    def match_template(self, message: str) -> Optional[str]:
+        """Mesaj bir selamlaşma/sohbet kalıbıysa şablon kategorisini döndürür"""
+        text = message.lower().strip()
+        if len(text.split()) > self.TEMPLATE_MAX_WORDS:
+            return None
+        for name, pattern in self._patterns.items():
+            if pattern.search(text):
+                return name
+        return None
+
+    def choose_route(self, message: str, intent: str, intent_score: float,
+                     has_dtc: bool = False, context_chunks: int = 0) -> str:
+        """
+        Mesaj için yanıt yolunu seçer. Şablon kararı doküman bağlamına bakmaz:
+        dense arama her sorguya en yakın sonuçları döndürdüğü için selamlaşmalara
+        da (ilgisiz) pasaj eklenir.
+        """
+        if intent == "selamlama" and not has_dtc:
+            if self.match_template(message):
+                return ROUTE_TEMPLATE
+
+        if (not has_dtc
+                and intent in self.CAR_INTENTS
+                and intent_score >= self.FAST_MIN_SCORE
+                and len(message.split()) <= self.FAST_MAX_WORDS
+                and context_chunks <= self.FAST_MAX_CONTEXT_CHUNKS):
+            return ROUTE_FAST
+
+        return ROUTE_FULL
+
+    def template_answer(self, message: str) -> str:
+        """Şablon yanıtını döndürür"""
+        return self.GREETING_TEMPLATES[self.match_template(message) or "hello"]
+
+    def get_fast_model(self, model_name: str) -> str:
+        """Seçili modelle aynı sağlayıcının hızlı modelini döndürür"""
+        if model_name.startswith("gpt"):
+            return FAST_MODELS["gpt"]
+        return FAST_MODELS["gemini"]
+
+    def estimate_cost(self, model_name: Optional[str], input_chars: int, output_chars: int) -> float:
+        """Karakter sayılarından yaklaşık maliyet (USD) hesaplar"""
+        if not model_name or model_name not in MODEL_PRICES_PER_1M:
+            return 0.0
+        input_price, output_price = MODEL_PRICES_PER_1M[model_name]
+        return (input_chars / CHARS_PER_TOKEN * input_price
+                + output_chars / CHARS_PER_TOKEN * output_price) / 1_000_000
+
+    def record(self, route: str, latency_ms: float, model_name: Optional[str] = None,
+               input_chars: int = 0, output_chars: int = 0):
+        """Bir yanıtın yol metriğini kaydeder"""
+        stats = self.metrics[route]
+        stats["count"] += 1
+        stats["latency_ms"] += latency_ms
+        stats["cost_usd"] += self.estimate_cost(model_name, input_chars, output_chars)
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Yol bazında sayı, ortalama gecikme ve toplam maliyeti döndürür"""
+        total = sum(stats["count"] for stats in self.metrics.values())
+        report = {}
+        for route, stats in self.metrics.items():
+            count = stats["count"]
+            report[route] = {
+                "count": count,
+                "share": count / total if total else 0.0,
+                "avg_latency_ms": stats["latency_ms"] / count if count else 0.0,
+                "cost_usd": stats["cost_usd"]
+            }
+        return report
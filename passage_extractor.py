@@ -0,0 +1,240 @@
+"""
+Pasaj Çıkarma Modülü
+Arama sonuçlarındaki chunk'ların tamamı yerine LLM'e sadece sorguyla ilgili
+kısımlar verilir:
+- Aynı kaynağın ardışık chunk'ları tek pasajda birleştirilir; chunk'lar
+  arasındaki örtüşme (varsayılan 200 karakter) tekrar edilmez
+- Her pasajda sorgu kelimelerinin en yoğun geçtiği pencere seçilir
+- Toplam bağlam, token bütçesini aşmaz
+"""
+
+import re
+from typing import List, Dict, Optional, Tuple, Any, Set
+
+from model_router import CHARS_PER_TOKEN
+
+
+# Tüm pasajların toplam token bütçesi
+DEFAULT_TOKEN_BUDGET = 500
+# Bütçe izin verdiği sürece bir pasaj bundan kısa kesilmez
+MIN_PASSAGE_CHARS = 200
+# Ardışık chunk'lar arasında aranan en uzun örtüşme ve örtüşmeyi bulmak için
+# sonraki chunk'ın başından alınan parça
+MAX_OVERLAP_CHARS = 400
+OVERLAP_PROBE_CHARS = 40
+# Türkçe ekler yüzünden kelimeler ilk harfleriyle eşleştirilir (balatası ~ balata)
+STEM_LENGTH = 5
+
+# Yoğunluk hesabında sayılmayan sık kelimeler
+STOPWORDS = {
+    "ve", "veya", "ile", "bir", "bu", "şu", "o", "da", "de", "mi", "mı", "mu", "mü",
+    "ne", "neden", "nasıl", "nedir", "için", "gibi", "çok", "daha", "en", "ama",
+    "ki", "var", "yok", "olan", "oluyor", "benim", "arabam", "arabamın", "aracım",
+}
+
+_WORD_PATTERN = re.compile(r"\w+")
+_SECTION_HEADER = re.compile(r"^\[[^\]\n]*\]\n")
+
+
+def _stem(word: str) -> str:
+    return word[:STEM_LENGTH]
+
+
+def query_stems(query: str) -> Set[str]:
+    """Sorgudaki anlamlı kelimelerin kökleri"""
+    return {
+        _stem(word) for word in (w.lower() for w in _WORD_PATTERN.findall(query))
+        if len(word) > 2 and word not in STOPWORDS
+    }
+
+
+def _chunk_number(chunk: Dict[str, Any]) -> Optional[int]:
+    """chunk_id "<kaynak>_<n>" biçimindeyse n"""
+    prefix, _, number = str(chunk.get("chunk_id", "")).rpartition("_")
+    if prefix == chunk.get("source") and number.isdigit():
+        return int(number)
+    return None
+
+
+def _join(first: str, second: str) -> str:
+    """Ardışık iki chunk'ı örtüşen kısmı tekrar etmeden birleştirir"""
+    probe = second[:OVERLAP_PROBE_CHARS]
+    if probe:
+        pos = first.find(probe, max(0, len(first) - MAX_OVERLAP_CHARS))
+        while pos >= 0:
+            if second.startswith(first[pos:]):
+                return first[:pos] + second
+            pos = first.find(probe, pos + 1)
+
+    # DOCX chunk'ları bölüm başlığıyla başlar; aynı bölümde başlık tekrarlanmaz
+    header = _SECTION_HEADER.match(first)
+    if header and second.startswith(header.group(0)):
+        second = second[header.end():]
+    return f"{first}\n{second}"
+
+
+def merge_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Aynı kaynağın ardışık chunk'larını birleştirir.
+
+    Returns:
+        Pasajlar (content, source, chunk_id); en iyi sıradaki chunk'ına göre sıralı
+    """
+    groups: List[Dict[str, Any]] = []
+    for rank, chunk in enumerate(chunks):
+        number = _chunk_number(chunk)
+        for group in groups:
+            # Yeni chunk grubun hemen önünde ya da arkasındaysa gruba katılır
+            # Numarası çözülemeyen chunk'ların grupları (first None) birleşmez
+            if (number is not None and group["first"] is not None
+                    and group["source"] == chunk["source"]
+                    and number in (group["first"] - 1, group["last"] + 1)):
+                break
+        else:
+            group = {"source": chunk["source"], "rank": rank, "members": {},
+                     "first": number, "last": number}
+            groups.append(group)
+        group["members"][number if number is not None else -rank - 1] = chunk
+
+        if number is not None:
+            group["first"] = min(group["first"], number)
+            group["last"] = max(group["last"], number)
+
+    # Ara chunk'lar sonradan geldiyse komşu gruplar birleşir
+    merged: List[Dict[str, Any]] = []
+    for group in sorted(groups, key=lambda g: (g["source"], g["first"] if g["first"] is not None else -1)):
+        previous = merged[-1] if merged else None
+        if (previous is not None and group["first"] is not None and previous["last"] is not None
+                and previous["source"] == group["source"] and group["first"] == previous["last"] + 1):
+            previous["members"].update(group["members"])
+            previous["last"] = group["last"]
+            previous["rank"] = min(previous["rank"], group["rank"])
+        else:
+            merged.append(group)
+
+    passages = []
+    for group in sorted(merged, key=lambda g: g["rank"]):
+        members = [group["members"][key] for key in sorted(group["members"])]
+        content = members[0]["content"]
+        for chunk in members[1:]:
+            content = _join(content, chunk["content"])
+        if len(members) > 1:
+            chunk_id = f"{group['source']}_{group['first']}-{group['last']}"
+        else:
+            chunk_id = members[0].get("chunk_id") or content[:40]
+        passages.append({"content": content, "source": group["source"], "chunk_id": chunk_id})
+    return passages
+
+
+def best_window(text: str, stems: Set[str], max_chars: int) -> Tuple[int, int]:
+    """
+    Sorgu köklerinin en yoğun geçtiği en fazla max_chars uzunluğundaki pencere.
+    Önce farklı kök sayısı, sonra toplam eşleşme sayısı en yüksek olan seçilir.
+
+    Returns:
+        (başlangıç, bitiş) karakter konumları
+    """
+    if len(text) <= max_chars:
+        return 0, len(text)
+
+    matches = [(m.start(), m.end(), _stem(m.group().lower())) for m in _WORD_PATTERN.finditer(text)]
+    matches = [m for m in matches if m[2] in stems]
+
+    best = (0, 0)
+    start, end = 0, 0
+    counts: Dict[str, int] = {}
+    left = 0
+    for right, (_, match_end, stem) in enumerate(matches):
+        counts[stem] = counts.get(stem, 0) + 1
+        while left < right and match_end - matches[left][0] > max_chars:
+            old = matches[left][2]
+            counts[old] -= 1
+            if not counts[old]:
+                del counts[old]
+            left += 1
+        score = (len(counts), right - left + 1)
+        if score > best:
+            best = score
+            start, end = matches[left][0], match_end
+
+    return _expand(text, start, end, max_chars)
+
+
+def _expand(text: str, start: int, end: int, max_chars: int) -> Tuple[int, int]:
+    """Pencereyi bütçe kadar genişletip cümle / kelime sınırlarına oturtur"""
+    extra = max_chars - (end - start)
+    new_start = max(0, start - extra // 2)
+    new_end = min(len(text), end + (max_chars - (end - new_start)))
+    # Metnin sonuna dayandıysa kalan pay başa verilir
+    new_start = max(0, min(new_start, new_end - max_chars))
+
+    if new_start > 0:
+        boundary = max(text.rfind(". ", new_start, start), text.rfind("\n", new_start, start))
+        if boundary >= 0:
+            new_start = boundary + 1
+        else:
+            space = text.find(" ", new_start, start)
+            if space >= 0:
+                new_start = space + 1
+    if new_end < len(text):
+        boundary = max(text.rfind(". ", end, new_end), text.rfind("\n", end, new_end))
+        if boundary >= 0:
+            new_end = boundary + 1
+        else:
+            space = text.rfind(" ", end, new_end)
+            if space >= 0:
+                new_end = space
+    return new_start, new_end
+
+
+def extract_passages(query: str, chunks: List[Dict[str, Any]],
+                     max_tokens: int = DEFAULT_TOKEN_BUDGET) -> List[Dict[str, Any]]:
+    """
+    Chunk'ları birleştirip her pasajdan sorguyla ilgili pencereyi çıkarır.
+
+    Args:
+        query: Kullanıcı sorusu
+        chunks: Arama sonuçları (sıralı)
+        max_tokens: Tüm pasajların toplam token bütçesi
+
+    Returns:
+        Pasajlar (content, source, chunk_id). Kesilen pasajların chunk_id'sine
+        pencere konumu eklenir (ör. "kilavuz.pdf_3-4@120-980"), böylece aynı
+        chunk'ın farklı pencereleri konuşmada ayrı bağlam sayılır.
+    """
+    stems = query_stems(query)
+    passages = merge_chunks(chunks)
+    budget = max_tokens * CHARS_PER_TOKEN
+
+    results = []
+    for i, passage in enumerate(passages):
+        # Kalan bütçe kalan pasajlara eşit bölünür; kısa pasajların artanı sonrakilere kalır
+        share = budget // (len(passages) - i)
+        if share < MIN_PASSAGE_CHARS:
+            share = min(budget, MIN_PASSAGE_CHARS)
+        if share <= 0:
+            break
+
+        content = passage["content"]
+        header = _SECTION_HEADER.match(content)
+        body_start = header.end() if header else 0
+        if len(content) > share:
+            # Bölüm başlığı kesilse de korunur; "…" işaretlerine yer bırakılır.
+            # Pencere kısa payda bile en az MIN_PASSAGE_CHARS // 2 olur ama kalan bütçeyi aşmaz
+            window = min(max(share - body_start - 4, MIN_PASSAGE_CHARS // 2), budget - body_start - 4)
+            if window <= 0:
+                continue
+            start, end = best_window(content[body_start:], stems, window)
+            end = min(end, start + window)
+            snippet = content[body_start + start:body_start + end].strip()
+            if start > 0:
+                snippet = "… " + snippet
+            if body_start + end < len(content):
+                snippet += " …"
+            content = content[:body_start] + snippet
+            passage = dict(passage, content=content,
+                           chunk_id=f"{passage['chunk_id']}@{body_start + start}-{body_start + end}")
+
+        results.append(passage)
+        budget -= len(content)
+    return results
@@ -0,0 +1,416 @@
+"""
+Sohbet Kaydı ve Yük Testi (Replay) Modülü
+Üretimdeki sohbetler anonimleştirilip JSONL dosyasına kaydedilir; kayıtlar
+(veya intents.txt / test_intents.txt örneklerinden üretilen sentetik sohbetler)
+CarExpertChatBot.get_response üzerinden, ağ çağrısı yapmayan yerel bir stub
+LLM ile istenen eşzamanlılık ve hızda yeniden oynatılır.
+
+Rapor: toplam verim (tur/sn), aşama bazında (retrieval, intent, dtc, prompt,
+llm, response) gecikme yüzdelikleri ve hata oranları.
+
+Kayıt (uygulama):  CONVERSATION_RECORD_FILE=recordings/conversations.jsonl streamlit run app.py
+Kullanım:
+    python replay_load.py --synthetic 200 --concurrency 8 --rate 20
+    python replay_load.py --input recordings/conversations.jsonl --concurrency 4 --json replay_report.json
+"""
+
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any
+
+from benchmark_retrieval import load_examples, percentile
+from gemini_client import CarExpertChatBot
+from intent_classifier import get_shared_intent_model
+from model_router import FAST_MODELS
+from tenant_collections import CollectionManager, DEFAULT_COLLECTION
+
+
+# Raporda gösterilen aşamalar (sırasıyla)
+STAGES = ("retrieval", "intent", "dtc", "prompt", "llm", "response")
+
+# Kişisel veriler -> yer tutucu. Arıza kodları (P0300) ve parça numaraları
+# aramayı etkilediği için korunur
+ANONYMIZE_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "<eposta>"),
+    (re.compile(r"(?<!\d)(?:\+?90[\s-]?)?0?\(?5\d{2}\)?[\s-]?\d{3}[\s-]?\d{2}[\s-]?\d{2}(?!\d)"), "<telefon>"),
+    (re.compile(r"\b[1-9]\d{10}\b"), "<tc_no>"),
+    (re.compile(r"\b[A-HJ-NPR-Z0-9]{17}\b"), "<sasi_no>"),
+    (re.compile(r"\b(?:0[1-9]|[1-7]\d|8[01])\s?[A-ZÇĞİÖŞÜ]{1,3}\s?\d{2,4}\b"), "<plaka>"),
+]
+
+
+def anonymize_text(text: str) -> str:
+    """Mesajdaki e-posta, telefon, kimlik, şasi ve plaka numaralarını maskeler"""
+    for pattern, placeholder in ANONYMIZE_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+def anonymize_id(value: str, salt: str = "") -> str:
+    """Sohbet kimliğini geri çevrilemez kısa bir özete çevirir"""
+    return hashlib.sha256(f"{salt}{value}".encode('utf-8')).hexdigest()[:12]
+
+
+class ConversationRecorder:
+    """Sohbet turlarını anonimleştirip JSONL dosyasına ekler (thread-safe)"""
+
+    def __init__(self, path: str, salt: Optional[str] = None):
+        """
+        Args:
+            path: Kayıt dosyası (satır başına bir tur)
+            salt: Sohbet kimliği özetine eklenen gizli değer (None ise RECORD_SALT)
+        """
+        self.path = path
+        self.salt = os.getenv("RECORD_SALT", "") if salt is None else salt
+        self._lock = threading.Lock()
+        # Sohbet -> (ilk turun zamanı, son tur numarası)
+        self._conversations: Dict[str, List[float]] = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def record(self, chatbot: CarExpertChatBot, conversation_id: str, message: str, answer: str,
+               context_chunks: Optional[List[Dict[str, Any]]] = None,
+               response_ms: Optional[float] = None, collection: Optional[str] = None):
+        """get_response'tan hemen sonra çağrılır; botun son tur bilgilerini kaydeder"""
+        now = time.time()
+        conversation = anonymize_id(str(conversation_id), self.salt)
+        timings = {key: round(value, 3) for key, value in chatbot.last_timings.items()}
+        if response_ms is not None:
+            timings["response_ms"] = round(response_ms, 3)
+
+        with self._lock:
+            state = self._conversations.setdefault(conversation, [now, -1])
+            state[1] += 1
+            entry = {
+                "conversation": conversation,
+                "turn": int(state[1]),
+                "offset_s": round(now - state[0], 3),
+                "message": anonymize_text(message),
+                "collection": collection,
+                "intent": chatbot.last_detected_intent,
+                "intent_score": round(float(chatbot.last_intent_score or 0.0), 4),
+                "route": chatbot.last_route,
+                "retrieval": [{"source": chunk.get("source"), "chunk_id": chunk.get("chunk_id")}
+                              for chunk in context_chunks or []],
+                "timings_ms": timings,
+                "response_chars": len(answer),
+                "error": chatbot.last_error is not None,
+            }
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def load_recording(path: str) -> List[List[Dict[str, Any]]]:
+    """Kayıt dosyasını sohbetlere (tur sırasıyla) ayırır"""
+    conversations: Dict[str, List[Dict[str, Any]]] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                turn = json.loads(line)
+                conversations.setdefault(turn["conversation"], []).append(turn)
+    return [sorted(turns, key=lambda t: t["turn"]) for turns in conversations.values()]
+
+
+def synthetic_conversations(count: int, seed: int = 42, max_turns: int = 4,
+                            files=("test_intents.txt", "intents.txt")) -> List[List[Dict[str, Any]]]:
+    """
+    Örnek cümlelerden sentetik sohbetler üretir. Aynı seed her zaman aynı
+    sohbetleri üretir; bir sohbetteki sorular çoğunlukla aynı intent'tendir.
+    """
+    examples: Dict[str, List[str]] = {}
+    for path in files:
+        if os.path.exists(path):
+            for intent, text in load_examples(path):
+                examples.setdefault(intent, []).append(text)
+    if not examples:
+        raise FileNotFoundError(f"Örnek dosyası bulunamadı: {', '.join(files)}")
+
+    rng = random.Random(seed)
+    intents = sorted(examples)
+    conversations = []
+    for index in range(count):
+        intent = rng.choice(intents)
+        turns = []
+        for turn in range(rng.randint(1, max_turns)):
+            # Konu arada bir değişir
+            if turn and rng.random() < 0.25:
+                intent = rng.choice(intents)
+            turns.append({
+                "conversation": f"synthetic-{index}",
+                "turn": turn,
+                "message": rng.choice(examples[intent]),
+                "intent": intent,
+            })
+        conversations.append(turns)
+    return conversations
+
+
+class _StubResponse:
+    __slots__ = ("content",)
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+class StubLLM:
+    """
+    LangChain sohbet modelinin yerine geçen yerel model: ağ çağrısı yapmaz,
+    gecikmesi prompt uzunluğuna bağlı ve deterministiktir.
+    """
+
+    def __init__(self, model_name: str, latency_ms: float, ms_per_1k_chars: float = 20.0,
+                 response_chars: int = 600):
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.ms_per_1k_chars = ms_per_1k_chars
+        self.response_chars = response_chars
+
+    def invoke(self, messages) -> _StubResponse:
+        prompt_chars = sum(len(message.content) for message in messages)
+        time.sleep((self.latency_ms + self.ms_per_1k_chars * prompt_chars / 1000) / 1000)
+        digest = hashlib.md5(messages[-1].content.encode('utf-8')).hexdigest()
+        text = f"🔧 [{self.model_name}] {digest} "
+        return _StubResponse((text * (self.response_chars // len(text) + 1))[:self.response_chars])
+
+
+class ReplayChatBot(CarExpertChatBot):
+    """Yanıtları StubLLM ile üreten chatbot (API anahtarı gerekmez)"""
+
+    # Yük testi mesajları intent inceleme kuyruğuna yazılmaz
+    LOG_LOW_CONFIDENCE = False
+
+    def __init__(self, model_name: Optional[str] = None, llm_latency_ms: float = 800.0,
+                 fast_llm_latency_ms: float = 250.0, ms_per_1k_chars: float = 20.0,
+                 response_chars: int = 600):
+        self.llm_latency_ms = llm_latency_ms
+        self.fast_llm_latency_ms = fast_llm_latency_ms
+        self.ms_per_1k_chars = ms_per_1k_chars
+        self.response_chars = response_chars
+        super().__init__(model_name)
+
+    def create_llm(self, model_name: str) -> StubLLM:
+        fast = model_name in FAST_MODELS.values()
+        return StubLLM(model_name, self.fast_llm_latency_ms if fast else self.llm_latency_ms,
+                       self.ms_per_1k_chars, self.response_chars)
+
+
+class ReplayRunner:
+    """Sohbetleri eşzamanlı işçilerde, verilen hızda yeniden oynatır"""
+
+    def __init__(self, conversations: List[List[Dict[str, Any]]], concurrency: int = 4,
+                 rate: float = 0.0, collections: Optional[CollectionManager] = None,
+                 bot_options: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            conversations: Sohbetler (her biri tur listesi)
+            concurrency: Aynı anda oynatılan sohbet sayısı
+            rate: Saniyedeki en fazla tur sayısı (0 = sınırsız)
+            collections: Doküman koleksiyonları (None ise varsayılan klasörler)
+            bot_options: ReplayChatBot parametreleri
+        """
+        self.conversations = conversations
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.collections = collections or CollectionManager(intent_classifier=get_shared_intent_model())
+        self.bot_options = bot_options or {}
+
+        self._local = threading.local()
+        self._pace_lock = threading.Lock()
+        self._issued = 0
+        self._start = 0.0
+        self._results_lock = threading.Lock()
+        self.results: List[Dict[str, Any]] = []
+
+    def _bot(self) -> ReplayChatBot:
+        """İşçi thread'in chatbot'u (sohbetler arasında geçmişi temizlenir)"""
+        bot = getattr(self._local, "bot", None)
+        if bot is None:
+            bot = self._local.bot = ReplayChatBot(**self.bot_options)
+        return bot
+
+    def _wait_for_slot(self):
+        """rate verilmişse bir sonraki turun zamanını bekler (turlar sırayla dağıtılır)"""
+        if self.rate <= 0:
+            return
+        with self._pace_lock:
+            due = self._start + self._issued / self.rate
+            self._issued += 1
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _run_turn(self, bot: ReplayChatBot, turn: Dict[str, Any]) -> Dict[str, Any]:
+        """Tek turu oynatır; aşama süreleri ve hataları döndürür"""
+        result: Dict[str, Any] = {"timings_ms": {}, "errors": [], "route": None}
+        message = turn["message"]
+
+        # Uygulamadaki gibi şablonla yanıtlanacak selamlaşmalarda arama yapılmaz
+        start = time.perf_counter()
+        try:
+            context_chunks = []
+            if not bot.is_small_talk(message):
+                try:
+                    store = self.collections.get(turn.get("collection") or DEFAULT_COLLECTION)
+                except KeyError:
+                    store = self.collections.get(DEFAULT_COLLECTION)
+                context_chunks = store.get_context_passages(message)
+        except Exception as e:
+            context_chunks = []
+            result["errors"].append("retrieval")
+            result["error"] = f"retrieval: {e}"
+        result["timings_ms"]["retrieval"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        try:
+            bot.get_response(message, context_chunks)
+            if bot.last_error is not None:
+                result["errors"].append("llm")
+                result["error"] = f"llm: {bot.last_error}"
+        except Exception as e:
+            result["errors"].append("response")
+            result["error"] = f"response: {e}"
+        result["timings_ms"]["response"] = (time.perf_counter() - start) * 1000
+
+        for key, value in bot.last_timings.items():
+            result["timings_ms"][key[:-3]] = value
+        result["route"] = bot.last_route or "local"
+        return result
+
+    def _run_conversation(self, turns: List[Dict[str, Any]]):
+        bot = self._bot()
+        bot.clear_history()
+        for turn in turns:
+            self._wait_for_slot()
+            result = self._run_turn(bot, turn)
+            with self._results_lock:
+                self.results.append(result)
+
+    def run(self) -> Dict[str, Any]:
+        """Tüm sohbetleri oynatıp raporu döndürür"""
+        self.results = []
+        self._issued = 0
+        # Koleksiyonlar ölçüm başlamadan yüklenir
+        for name in {turn.get("collection") or DEFAULT_COLLECTION
+                     for turns in self.conversations for turn in turns}:
+            try:
+                self.collections.get(name)
+            except KeyError:
+                print(f"⚠️ Koleksiyon bulunamadı, varsayılan kullanılacak: {name}")
+
+        self._start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="replay") as executor:
+            list(executor.map(self._run_conversation, self.conversations))
+        wall_s = time.perf_counter() - self._start
+        return build_report(self.results, wall_s, len(self.conversations))
+
+
+def build_report(results: List[Dict[str, Any]], wall_s: float, conversations: int) -> Dict[str, Any]:
+    """Tur sonuçlarından verim, aşama gecikmeleri ve hata oranlarını hesaplar"""
+    stages = {}
+    for stage in STAGES:
+        latencies = [r["timings_ms"][stage] for r in results if stage in r["timings_ms"]]
+        errors = sum(1 for r in results if stage in r["errors"])
+        if not latencies and not errors:
+            continue
+        attempts = max(len(latencies), errors)
+        stages[stage] = {
+            "count": len(latencies),
+            "errors": errors,
+            "error_rate": errors / attempts if attempts else 0.0,
+            "mean_ms": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p90_ms": percentile(latencies, 90),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": max(latencies, default=0.0),
+        }
+
+    failed = [r for r in results if r["errors"]]
+    return {
+        "conversations": conversations,
+        "turns": len(results),
+        "wall_s": wall_s,
+        "throughput_tps": len(results) / wall_s if wall_s else 0.0,
+        "error_rate": len(failed) / len(results) if results else 0.0,
+        "routes": dict(Counter(r["route"] for r in results)),
+        "stages": stages,
+        # Hata örnekleri (ilk 5)
+        "sample_errors": [r["error"] for r in failed[:5]],
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """Raporu tablo olarak yazdırır"""
+    print("=" * 86)
+    print(f"🔁 {report['conversations']} sohbet • {report['turns']} tur • {report['wall_s']:.1f} sn • "
+          f"{report['throughput_tps']:.2f} tur/sn • hata %{report['error_rate'] * 100:.1f}")
+    print("   Yollar: " + ", ".join(f"{route}: {count}" for route, count in sorted(report["routes"].items())))
+    print("-" * 86)
+    print(f"{'Aşama':<11} {'Sayı':>6} {'Hata %':>7} {'Ort. ms':>9} {'p50 ms':>9} {'p90 ms':>9} "
+          f"{'p95 ms':>9} {'p99 ms':>9} {'Maks ms':>9}")
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<11} {stats['count']:>6} {stats['error_rate'] * 100:>7.1f} {stats['mean_ms']:>9.2f} "
+              f"{stats['p50_ms']:>9.2f} {stats['p90_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+              f"{stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}")
+    print("=" * 86)
+    for error in report["sample_errors"]:
+        print(f"❌ {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kayıtlı veya sentetik sohbetlerle yük testi")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", default=None,
+                        help="ConversationRecorder ile kaydedilmiş JSONL dosyası")
+    source.add_argument("--synthetic", type=int, default=None, metavar="N",
+                        help="intents.txt / test_intents.txt örneklerinden N sentetik sohbet üret")
+    parser.add_argument("--seed", type=int, default=42, help="Sentetik sohbetler için rastgelelik tohumu")
+    parser.add_argument("--max-turns", type=int, default=4, help="Sentetik sohbetlerin en fazla tur sayısı")
+    parser.add_argument("--concurrency", type=int, default=4, help="Aynı anda oynatılan sohbet sayısı")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="Saniyedeki en fazla tur sayısı (0 = sınırsız)")
+    parser.add_argument("--model", default="gemini-2.5-flash", help="Seçili model adı (stub)")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0, help="Seçili modelin sabit gecikmesi")
+    parser.add_argument("--fast-llm-latency-ms", type=float, default=250.0, help="Hızlı modelin sabit gecikmesi")
+    parser.add_argument("--ms-per-1k-chars", type=float, default=20.0,
+                        help="Prompt'un her 1000 karakteri için eklenen gecikme")
+    parser.add_argument("--response-chars", type=int, default=600, help="Stub yanıt uzunluğu")
+    parser.add_argument("--json", default=None, help="Raporun yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    if args.input:
+        conversations = load_recording(args.input)
+    else:
+        conversations = synthetic_conversations(args.synthetic, args.seed, args.max_turns)
+
+    runner = ReplayRunner(
+        conversations, concurrency=args.concurrency, rate=args.rate,
+        bot_options={
+            "model_name": args.model,
+            "llm_latency_ms": args.llm_latency_ms,
+            "fast_llm_latency_ms": args.fast_llm_latency_ms,
+            "ms_per_1k_chars": args.ms_per_1k_chars,
+            "response_chars": args.response_chars,
+        }
+    )
+    report = runner.run()
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 Rapor kaydedildi: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
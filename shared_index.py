@@ -0,0 +1,393 @@
+"""
+Paylaşımlı İndeks Modülü (çok süreçli dağıtım)
+Doküman indeksi ve intent modeli bir koordinatör tarafından diske "nesil"
+(generation) olarak yazılır; işçi süreçler aynı nesli belleğe eşleyerek (mmap)
+okur. Chunk içerikleri ve sütunları, dense vektör matrisi ve sorgu projeksiyonu,
+intent modelinin IDF değerleri ve matrisi (centroid vektörleri ya da doğrusal
+ağırlıklar) işletim sisteminin sayfa önbelleğinde tek kopya tutulur; işçiler
+modelleri eğitim verisinden yeniden kurmaz, böylece işçi sayısı arttıkça bellek
+kullanımı sabit kalır.
+
+Nesil düzeni:
+    index/gen-000001/   manifest.json, chunks.json, chunks.cols, chunks.bin, dense.f32,
+                        dense_projection.json, dense_projection.f32,
+                        intent_vocabulary.txt, intent_idf.f32,
+                        intent_centroids.f32 | intent_weights.f32, intent_calibration.json
+    index/CURRENT       yayınlanan neslin adı (os.replace ile atomik değişir)
+
+Kullanım:
+    python shared_index.py --build                  # tek seferlik nesil üret
+    python shared_index.py                          # değişiklikleri izleyip yeni nesil yayınla
+    python shared_index.py --workers 4 --port 8501  # koordinatör + 4 Streamlit işçisi
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import threading
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Any
+
+from intent_classifier import IntentClassifier, IntentModelHandle
+from document_processor import DocumentProcessor, SimpleDocumentStore
+
+
+INDEX_ROOT = "index"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+WEIGHTS_FILE = "intent_weights.f32"
+CENTROIDS_FILE = "intent_centroids.f32"
+VOCABULARY_FILE = "intent_vocabulary.txt"
+IDF_FILE = "intent_idf.f32"
+CALIBRATION_FILE = "intent_calibration.json"
+
+# Silinmeden tutulan eski nesil sayısı (yavaş işçiler eski nesli okumaya devam edebilir)
+KEEP_GENERATIONS = 3
+
+
+def read_current(root: str = INDEX_ROOT) -> Optional[str]:
+    """Yayınlanan neslin klasör yolunu döndürür (yoksa None)"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    return os.path.join(root, name) if name else None
+
+
+def publish(root: str, name: str):
+    """CURRENT işaretçisini yeni nesle atomik olarak çevirir"""
+    tmp_path = os.path.join(root, CURRENT_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+
+def _next_generation(root: str) -> int:
+    """Kullanılmamış ilk nesil numarası"""
+    numbers = [int(name[4:]) for name in os.listdir(root)
+               if name.startswith("gen-") and name[4:].isdigit()]
+    return max(numbers, default=0) + 1
+
+
+def prune_generations(root: str = INDEX_ROOT, keep: int = KEEP_GENERATIONS):
+    """Yayınlanan nesil hariç en eski nesilleri siler"""
+    current = os.path.basename(read_current(root) or "")
+    names = sorted(name for name in os.listdir(root) if name.startswith("gen-"))
+    for name in names[:-keep] if keep else names:
+        if name != current:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def build_generation(root: str = INDEX_ROOT, documents_folder: str = "documents",
+                     data_file: str = "intents.txt",
+                     calibration_file: str = "intent_calibration.json",
+                     feedback_file: Optional[str] = "intent_feedback.txt",
+                     engine: Optional[str] = None, features: Optional[str] = None) -> str:
+    """
+    Dokümanları ve intent modelini işleyip yeni bir nesil yazar ve yayınlar.
+    Nesil önce geçici klasörde hazırlanır; yarım nesil hiçbir zaman yayınlanmaz.
+
+    Returns:
+        Yayınlanan neslin klasör yolu
+    """
+    engine = engine or os.getenv("INTENT_ENGINE", "centroid")
+    features = features or os.getenv("INTENT_FEATURES", "words")
+    os.makedirs(root, exist_ok=True)
+    start = time.perf_counter()
+
+    # Onaylanmış geri bildirim örnekleri de modele dahil edilir
+    handle = IntentModelHandle(data_file, calibration_file, feedback_file,
+                               watch=False, engine=engine, features=features)
+    classifier = handle.model
+
+    store = SimpleDocumentStore(dense=True, intent_classifier=classifier)
+    store.add_documents(DocumentProcessor(documents_folder).iter_document_chunks())
+
+    name = f"gen-{_next_generation(root):06d}"
+    tmp_dir = os.path.join(root, f".{name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    store.save(tmp_dir)
+
+    # İşçiler modeli eğitim verisinden kurmaz: kelime dağarcığı, IDF ve matris yüklenir
+    classifier.save_features(os.path.join(tmp_dir, VOCABULARY_FILE), os.path.join(tmp_dir, IDF_FILE))
+    if engine == "centroid":
+        intent_model = classifier.save_centroid(os.path.join(tmp_dir, CENTROIDS_FILE))
+    else:
+        intent_model = classifier.save_linear(os.path.join(tmp_dir, WEIGHTS_FILE))
+    intent_model["fingerprint"] = classifier.fingerprint()
+    if calibration_file and os.path.exists(calibration_file):
+        shutil.copyfile(calibration_file, os.path.join(tmp_dir, CALIBRATION_FILE))
+
+    manifest: Dict[str, Any] = {
+        "generation": name,
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "engine": engine,
+        "features": features,
+        "chunks": len(store.documents),
+        "dense_dim": store.dense_retriever.dim,
+        "training_samples": len(classifier.training_data),
+        "intent_model": intent_model,
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    os.replace(tmp_dir, os.path.join(root, name))
+    publish(root, name)
+    prune_generations(root)
+    print(f"📦 {name} yayınlandı: {manifest['chunks']} chunk, "
+          f"{manifest['training_samples']} örnek ({(time.perf_counter() - start):.1f} sn)")
+    return os.path.join(root, name)
+
+
+class IndexGeneration:
+    """Bir neslin işçi süreçteki salt-okunur görünümü: intent modeli ve doküman deposu"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.name = self.manifest["generation"]
+
+        # Sadece sınıflandıran model: eğitim verisi yüklenmez, matrisler belleğe eşlenir
+        engine = self.manifest["engine"]
+        intent_model = self.manifest["intent_model"]
+        calibration_file = os.path.join(path, CALIBRATION_FILE)
+        self.classifier = IntentClassifier(
+            calibration_file=calibration_file if os.path.exists(calibration_file) else None,
+            examples=[], verbose=False, engine=engine, features=self.manifest["features"],
+            n_features=intent_model["rows"], train_linear=False
+        )
+        self.classifier.load_features(os.path.join(path, VOCABULARY_FILE), os.path.join(path, IDF_FILE))
+        self.classifier.source_fingerprint = intent_model["fingerprint"]
+        if engine == "centroid":
+            self.classifier.load_centroid(os.path.join(path, CENTROIDS_FILE), intent_model["labels"])
+        else:
+            self.classifier.load_linear(os.path.join(path, WEIGHTS_FILE),
+                                        intent_model["labels"], intent_model["bias"])
+
+        self.store = SimpleDocumentStore(dense=True, intent_classifier=self.classifier)
+        self.store.load(path)
+        if self.store.dense_retriever.dim != self.manifest["dense_dim"]:
+            raise ValueError(f"{self.name}: dense boyutu uyumsuz "
+                             f"({self.store.dense_retriever.dim} != {self.manifest['dense_dim']})")
+
+
+class SharedIndex:
+    """
+    İşçi sürecin kullandığı güncel nesil. CURRENT işaretçisi arka planda
+    izlenir; yeni nesil ayrı olarak yüklenip tek atamayla devreye alınır,
+    devam eden istekler eski nesille tamamlanır.
+    """
+
+    # CURRENT kontrol aralığı (saniye)
+    POLL_INTERVAL = 2.0
+
+    def __init__(self, root: str = INDEX_ROOT, poll_interval: Optional[float] = None, watch: bool = True):
+        self.root = root
+        self.poll_interval = poll_interval or self.POLL_INTERVAL
+        self.current: Optional[IndexGeneration] = None
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+        self.refresh()
+        if self.current is None:
+            raise RuntimeError(f"{root} altında yayınlanmış indeks yok "
+                               f"(önce: python shared_index.py --build)")
+
+        # Nesil değişse de geçerli kalan görünümler
+        self.intent_model = SharedIndexView(self, "classifier")
+        self.store = SharedIndexView(self, "store")
+
+        if watch:
+            self.start_watching()
+
+    @property
+    def generation(self) -> str:
+        """Kullanılan neslin adı"""
+        return self.current.name
+
+    def refresh(self) -> bool:
+        """
+        Yayınlanan nesil değiştiyse yükleyip devreye alır
+
+        Returns:
+            Yeni nesil yüklendiyse True
+        """
+        with self._lock:
+            path = read_current(self.root)
+            if not path or (self.current and self.current.path == path):
+                return False
+            try:
+                generation = IndexGeneration(path)
+            except (OSError, ValueError, KeyError) as e:
+                # Yarım kalmış / silinmiş nesilde mevcut nesil korunur
+                self.last_error = str(e)
+                print(f"❌ İndeks nesli yüklenemedi ({path}): {e}")
+                return False
+            self.current = generation
+            self.last_error = None
+            print(f"🔄 İndeks nesli devreye alındı: {generation.name} (pid {os.getpid()})")
+            return True
+
+    def _watch(self):
+        """CURRENT işaretçisini periyodik olarak kontrol eder"""
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+    def start_watching(self):
+        """Arka plan izleme thread'ini başlatır"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="shared-index-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """Arka plan izlemesini durdurur"""
+        self._stop.set()
+        if self._watcher:
+            self._watcher.join(timeout=self.poll_interval)
+            self._watcher = None
+
+
+class SharedIndexView:
+    """Öznitelik erişimlerini güncel neslin nesnesine (classifier / store) yönlendirir"""
+
+    def __init__(self, index: SharedIndex, attribute: str):
+        self._index = index
+        self._attribute = attribute
+
+    def __getattr__(self, name):
+        return getattr(getattr(self._index.current, self._attribute), name)
+
+
+_shared_index: Optional[SharedIndex] = None
+_shared_index_lock = threading.Lock()
+
+
+def get_shared_index(root: Optional[str] = None) -> SharedIndex:
+    """Süreç genelinde tek paylaşımlı indeks (root verilmezse SHARED_INDEX_DIR)"""
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = SharedIndex(root or os.getenv("SHARED_INDEX_DIR", INDEX_ROOT))
+        return _shared_index
+
+
+class IndexCoordinator:
+    """Doküman klasörünü ve eğitim dosyalarını izler, değiştiklerinde yeni nesil yayınlar"""
+
+    # Değişiklik kontrol aralığı (saniye)
+    POLL_INTERVAL = 5.0
+
+    def __init__(self, root: str = INDEX_ROOT, documents_folder: str = "documents",
+                 data_file: str = "intents.txt",
+                 calibration_file: str = "intent_calibration.json",
+                 feedback_file: Optional[str] = "intent_feedback.txt",
+                 poll_interval: Optional[float] = None):
+        self.root = root
+        self.documents_folder = documents_folder
+        self.data_file = data_file
+        self.calibration_file = calibration_file
+        self.feedback_file = feedback_file
+        self.poll_interval = poll_interval or self.POLL_INTERVAL
+        self._signature: Optional[Tuple] = None
+
+    def _file_signature(self) -> Tuple:
+        """İzlenen dosyaların (ad, değişiklik zamanı, boyut) bilgisi"""
+        paths = [self.data_file, self.calibration_file, self.feedback_file]
+        if os.path.isdir(self.documents_folder):
+            paths += sorted(os.path.join(self.documents_folder, name)
+                            for name in os.listdir(self.documents_folder))
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except (OSError, TypeError):
+                signature.append((path, None))
+        return tuple(signature)
+
+    def build(self) -> str:
+        """Yeni nesil üretip yayınlar"""
+        # İmza üretimden önce alınır: üretim sırasında gelen değişiklik bir sonraki turda işlenir
+        self._signature = self._file_signature()
+        return build_generation(self.root, self.documents_folder, self.data_file,
+                                self.calibration_file, self.feedback_file)
+
+    def check(self) -> bool:
+        """Dosyalar değiştiyse yeni nesil üretir"""
+        if self._file_signature() == self._signature:
+            return False
+        try:
+            self.build()
+        except Exception as e:
+            print(f"❌ Yeni indeks nesli üretilemedi: {e}")
+            return False
+        return True
+
+    def run(self, stop: Optional[threading.Event] = None):
+        """Değişiklikleri izleyip nesil yayınlar (stop verilene / Ctrl+C'ye kadar)"""
+        stop = stop or threading.Event()
+        if self._signature is None:
+            self.build()
+        while not stop.wait(self.poll_interval):
+            self.check()
+
+
+def start_workers(count: int, base_port: int, root: str) -> List[subprocess.Popen]:
+    """Paylaşımlı indeksi kullanan Streamlit işçi süreçlerini başlatır"""
+    env = dict(os.environ, SHARED_INDEX_DIR=root)
+    workers = []
+    for i in range(count):
+        port = base_port + i
+        workers.append(subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", "app.py",
+             "--server.port", str(port), "--server.headless", "true"],
+            env=env
+        ))
+        print(f"🚀 İşçi {i + 1}: http://localhost:{port}")
+    return workers
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Paylaşımlı indeks koordinatörü")
+    parser.add_argument("--root", default=INDEX_ROOT, help="Nesillerin yazılacağı klasör")
+    parser.add_argument("--documents", default="documents", help="Doküman klasörü")
+    parser.add_argument("--build", action="store_true", help="Tek seferlik nesil üretip çık")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Başlatılacak Streamlit işçi sayısı (0: sadece koordinatör)")
+    parser.add_argument("--port", type=int, default=8501, help="İlk işçinin portu")
+    args = parser.parse_args()
+
+    coordinator = IndexCoordinator(args.root, args.documents)
+    # İşçiler başlamadan önce güncel bir nesil yayınlanmış olmalı
+    coordinator.build()
+    if args.build:
+        return 0
+
+    workers = start_workers(args.workers, args.port, args.root)
+    print(f"👀 {args.documents} ve eğitim dosyaları izleniyor (Ctrl+C ile çıkış)")
+    try:
+        coordinator.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
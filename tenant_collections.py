@@ -0,0 +1,283 @@
+"""
+Doküman Koleksiyonları (bayi / marka bazında)
+Her koleksiyon collections/<ad>/ klasöründeki dokümanlardan oluşur ve kendi
+indeksine sahiptir; aramalar sadece sohbette seçili koleksiyonda yapılır.
+
+- Koleksiyonlar ilk sorguda yüklenir. İndeks diskte önbelleklenir
+  (index/collections/<ad>/); dokümanlar değişmediyse sonraki yüklemeler
+  dosyaları yeniden işlemez, içerik ve dense matris belleğe eşlenir (mmap)
+- Yüklü koleksiyonların toplam belleği bütçeyi aşarsa en uzun süredir
+  kullanılmayan koleksiyon bellekten çıkarılır (LRU)
+- Varsayılan koleksiyon mevcut documents/ klasörüdür
+
+Kullanım:
+    manager = CollectionManager(intent_classifier=get_shared_intent_model())
+    store = manager.get("toyota")
+    chunks = store.get_context_chunks("fren balatası ses yapıyor")
+"""
+
+import os
+import re
+import json
+import shutil
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any
+
+from document_processor import DocumentProcessor, SimpleDocumentStore, CHUNK_FORMAT_VERSION
+from ingest_queue import IngestQueue
+
+
+COLLECTIONS_DIR = "collections"
+DEFAULT_COLLECTION = "genel"
+DEFAULT_FOLDER = "documents"
+INDEX_DIR = os.path.join("index", "collections")
+SIGNATURE_FILE = "signature.json"
+
+# Yüklü koleksiyonların toplam bellek bütçesi (COLLECTION_MEMORY_MB ile değiştirilebilir)
+DEFAULT_MEMORY_BUDGET_MB = 256
+
+# Koleksiyon adı klasör adı olarak kullanılır: harf, rakam, _ ve -
+_NAME_PATTERN = re.compile(r"^[\w-]+$")
+
+
+class CollectionManager:
+    """Adlandırılmış doküman koleksiyonlarını yükler, önbellekler ve bellekten çıkarır"""
+
+    def __init__(self, collections_dir: str = COLLECTIONS_DIR,
+                 default_folder: str = DEFAULT_FOLDER,
+                 index_dir: Optional[str] = INDEX_DIR,
+                 memory_budget_mb: Optional[float] = None,
+                 intent_classifier=None, dense: bool = True):
+        """
+        Args:
+            collections_dir: Koleksiyon klasörlerinin bulunduğu klasör
+            default_folder: Varsayılan koleksiyonun doküman klasörü
+            index_dir: İndeks önbelleği klasörü (None ise diske yazılmaz)
+            memory_budget_mb: Yüklü koleksiyonların bellek bütçesi (None ise
+                              COLLECTION_MEMORY_MB ortam değişkeni / varsayılan)
+            intent_classifier: Tüm koleksiyonların kullandığı intent modeli
+            dense: Koleksiyonlarda anlamsal (dense) arama yapılsın mı
+        """
+        self.collections_dir = collections_dir
+        self.default_folder = default_folder
+        self.index_dir = index_dir
+        if memory_budget_mb is None:
+            memory_budget_mb = float(os.getenv("COLLECTION_MEMORY_MB", DEFAULT_MEMORY_BUDGET_MB))
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.intent_classifier = intent_classifier
+        self.dense = dense
+
+        # Yüklü koleksiyonlar; en son kullanılan sonda
+        self._stores: "OrderedDict[str, SimpleDocumentStore]" = OrderedDict()
+        self._queues: Dict[str, IngestQueue] = {}
+        self._lock = threading.Lock()
+        # Aynı koleksiyon iki oturum tarafından aynı anda yüklenmesin
+        self._loading: Dict[str, threading.Lock] = {}
+
+        # İstatistikler
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def folder(self, name: str) -> str:
+        """Koleksiyonun doküman klasörü"""
+        if name == DEFAULT_COLLECTION:
+            return self.default_folder
+        if not _NAME_PATTERN.match(name):
+            raise ValueError(f"Geçersiz koleksiyon adı: {name!r}")
+        return os.path.join(self.collections_dir, name)
+
+    def list_collections(self) -> List[str]:
+        """Varsayılan koleksiyon ve collections/ altındaki koleksiyon adları"""
+        names = []
+        if os.path.isdir(self.collections_dir):
+            names = sorted(
+                name for name in os.listdir(self.collections_dir)
+                if name != DEFAULT_COLLECTION and _NAME_PATTERN.match(name)
+                and os.path.isdir(os.path.join(self.collections_dir, name))
+            )
+        return [DEFAULT_COLLECTION] + names
+
+    def create(self, name: str) -> str:
+        """Yeni (boş) koleksiyon klasörü oluşturur"""
+        folder = self.folder(name)
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    def get(self, name: Optional[str] = None) -> SimpleDocumentStore:
+        """
+        Koleksiyonun deposunu döndürür; yüklü değilse yükler.
+
+        Raises:
+            KeyError: Koleksiyon yoksa
+        """
+        name = name or DEFAULT_COLLECTION
+        with self._lock:
+            store = self._stores.get(name)
+            if store is not None:
+                self._stores.move_to_end(name)
+                self.hits += 1
+                return store
+            loading = self._loading.setdefault(name, threading.Lock())
+
+        with loading:
+            with self._lock:
+                # Beklerken başka bir oturum yüklemiş olabilir
+                store = self._stores.get(name)
+                if store is not None:
+                    self._stores.move_to_end(name)
+                    self.hits += 1
+                    return store
+
+            if name != DEFAULT_COLLECTION and not os.path.isdir(self.folder(name)):
+                raise KeyError(name)
+            store = self._load(name)
+
+            with self._lock:
+                self._stores[name] = store
+                self.loads += 1
+                queue = self._queues.get(name)
+                if queue is not None:
+                    queue.store = store
+                self._evict_over_budget(keep=name)
+        return store
+
+    def is_loaded(self, name: str) -> bool:
+        with self._lock:
+            return name in self._stores
+
+    def evict(self, name: str) -> bool:
+        """Koleksiyonu bellekten çıkarır (bir sonraki sorguda yeniden yüklenir)"""
+        with self._lock:
+            return self._evict(name)
+
+    def _evict(self, name: str) -> bool:
+        """Koleksiyonu bellekten çıkarır (kilit altında çağrılır)"""
+        store = self._stores.pop(name, None)
+        if store is None:
+            return False
+        # Kuyruk dosyaları diske yazmaya devam eder; depo yeniden yüklenince bağlanır
+        queue = self._queues.get(name)
+        if queue is not None:
+            queue.store = None
+        self.evictions += 1
+        print(f"♻️ Koleksiyon bellekten çıkarıldı: {name}")
+        return True
+
+    def _evict_over_budget(self, keep: str):
+        """Bütçe aşıldıysa en uzun süredir kullanılmayanları çıkarır (kilit altında çağrılır)"""
+        total = sum(store.memory_bytes() for store in self._stores.values())
+        for name in list(self._stores):
+            if total <= self.memory_budget:
+                break
+            if name == keep:
+                continue
+            total -= self._stores[name].memory_bytes()
+            self._evict(name)
+
+    def _signature(self, folder: str) -> Dict[str, Any]:
+        """Doküman dosyaları ve intent modelinden oluşan önbellek imzası"""
+        files = []
+        if os.path.isdir(folder):
+            for name in sorted(os.listdir(folder)):
+                path = os.path.join(folder, name)
+                # Yüklenmekte olan geçici dosyalar (.<ad>.uploading) sayılmaz
+                if name.startswith(".") or not os.path.isfile(path):
+                    continue
+                stat = os.stat(path)
+                files.append([name, stat.st_mtime_ns, stat.st_size])
+
+        signature: Dict[str, Any] = {"files": files, "dense": self.dense,
+                                     "chunk_format": CHUNK_FORMAT_VERSION}
+        # Chunk'ların intent etiketleri modele bağlıdır: eğitim verisi, geri bildirim
+        # örnekleri veya kalibrasyon değiştiyse özet de değişir
+        classifier = self.intent_classifier
+        if classifier is not None:
+            signature["intent_model"] = classifier.fingerprint()
+        return signature
+
+    def _load(self, name: str) -> SimpleDocumentStore:
+        """Koleksiyonu diskteki önbellekten ya da dokümanlardan yükler"""
+        folder = self.folder(name)
+        signature = self._signature(folder)
+        cache = os.path.join(self.index_dir, name) if self.index_dir else None
+
+        if cache and self._read_signature(cache) == signature:
+            store = SimpleDocumentStore(dense=self.dense, intent_classifier=self.intent_classifier)
+            try:
+                store.load(cache)
+                print(f"📂 Koleksiyon önbellekten yüklendi: {name} ({len(store.documents)} parça)")
+                return store
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Koleksiyon önbelleği okunamadı ({name}): {e}")
+
+        store = SimpleDocumentStore(dense=self.dense, intent_classifier=self.intent_classifier)
+        store.add_documents(DocumentProcessor(folder).iter_document_chunks())
+        print(f"📚 Koleksiyon yüklendi: {name} ({len(store.documents)} parça)")
+        if cache:
+            try:
+                self._write_cache(store, cache, signature)
+            except OSError as e:
+                print(f"⚠️ Koleksiyon önbelleği yazılamadı ({name}): {e}")
+        return store
+
+    def _read_signature(self, cache: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(cache, SIGNATURE_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, store: SimpleDocumentStore, cache: str, signature: Dict[str, Any]):
+        """İndeksi geçici klasöre yazıp önbelleğin yerine koyar (yarım önbellek okunmaz)"""
+        parent = os.path.dirname(cache) or "."
+        os.makedirs(parent, exist_ok=True)
+        base = os.path.basename(cache)
+        tmp_dir = os.path.join(parent, f".{base}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        store.save(tmp_dir)
+        # İmza en son yazılır: imzası olmayan önbellek geçersiz sayılır
+        with open(os.path.join(tmp_dir, SIGNATURE_FILE), 'w', encoding='utf-8') as f:
+            json.dump(signature, f)
+
+        # Eski önbelleği okuyan süreçler belleğe eşledikleri dosyaları kullanmaya devam eder
+        old_dir = os.path.join(parent, f".{base}.{os.getpid()}.old")
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(cache):
+            os.replace(cache, old_dir)
+        os.replace(tmp_dir, cache)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def get_ingest_queue(self, name: Optional[str] = None) -> IngestQueue:
+        """Koleksiyona doküman yükleyen kuyruk (koleksiyon yüklü değilse dosyalar diske yazılır)"""
+        name = name or DEFAULT_COLLECTION
+        folder = self.folder(name)
+        with self._lock:
+            queue = self._queues.get(name)
+            if queue is None:
+                queue = IngestQueue(self._stores.get(name), folder)
+                self._queues[name] = queue
+            return queue
+
+    def stats(self) -> Dict[str, Any]:
+        """Yüklü koleksiyonlar ve önbellek istatistikleri"""
+        with self._lock:
+            loaded = {name: {"chunks": len(store.documents),
+                             "memory_mb": store.memory_bytes() / (1024 * 1024)}
+                      for name, store in self._stores.items()}
+            return {
+                "loaded": loaded,
+                "memory_mb": sum(item["memory_mb"] for item in loaded.values()),
+                "budget_mb": self.memory_budget / (1024 * 1024),
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+    def shutdown(self):
+        """Yükleme kuyruklarını durdurur"""
+        with self._lock:
+            queues = list(self._queues.values())
+        for queue in queues:
+            queue.shutdown()
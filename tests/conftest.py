@@ -0,0 +1,11 @@
+"""
+Test ortamı: modüller proje kökünden import edilir, testler kökteki
+veri dosyalarını (documents/, intents.txt, ...) kullanır.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,70 @@
+"""Sütunlu chunk deposunun kaydetme / belleğe eşleyerek yükleme testleri"""
+
+import os
+
+import pytest
+
+from chunk_store import ChunkStore
+
+
+CHUNKS = [
+    {"content": "Motor yağı 10.000 km'de değişir.", "source": "bakim.pdf",
+     "chunk_id": "bakim.pdf_0", "section": "Bakım > Yağ", "intents": ["bakim"]},
+    {"content": "P0300 tekleme demektir.", "source": "kodlar.xlsx", "chunk_id": "kodlar.xlsx_sayfa1",
+     "keys": {"kod": "p0300"}, "fields": {"Kod": "P0300"}},
+    {"content": "Fren balatası ısınınca ses yapar. ğüşıöç", "source": "bakim.pdf",
+     "chunk_id": "bakim.pdf_1", "intents": ["fren", "bakim"]},
+]
+
+
+@pytest.fixture
+def saved(tmp_path):
+    store = ChunkStore()
+    store.extend(CHUNKS)
+    store.save(str(tmp_path))
+    return store, str(tmp_path)
+
+
+def test_round_trip_keeps_every_field(saved):
+    store, folder = saved
+    loaded = ChunkStore.load(folder)
+    assert len(loaded) == len(CHUNKS)
+    assert loaded.to_dicts() == store.to_dicts()
+    assert loaded[1]["chunk_id"] == "kodlar.xlsx_sayfa1"
+    assert loaded[0].get("keys", {}) == {}
+
+
+def test_columns_and_contents_are_memory_mapped(saved):
+    _, folder = saved
+    loaded = ChunkStore.load(folder)
+    assert isinstance(loaded._offsets, memoryview)
+    assert isinstance(loaded._intent_of, memoryview)
+    assert not isinstance(loaded._buffer, bytearray)
+    assert loaded.content(2).endswith("ğüşıöç")
+
+
+def test_changes_after_load_do_not_touch_files(saved):
+    _, folder = saved
+    loaded = ChunkStore.load(folder)
+    loaded.set_intents(0, ["motor"])
+    loaded.append({"content": "yeni", "source": "yeni.docx", "chunk_id": "yeni.docx_0"})
+    assert loaded.intents(0) == ["motor"]
+    assert loaded[3]["content"] == "yeni"
+
+    reloaded = ChunkStore.load(folder)
+    assert len(reloaded) == len(CHUNKS)
+    assert reloaded.intents(0) == ["bakim"]
+
+
+def test_empty_store_round_trip(tmp_path):
+    ChunkStore().save(str(tmp_path))
+    assert len(ChunkStore.load(str(tmp_path))) == 0
+
+
+def test_truncated_columns_are_rejected(saved):
+    _, folder = saved
+    path = os.path.join(folder, "chunks.cols")
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 2)
+    with pytest.raises(ValueError):
+        ChunkStore.load(folder)
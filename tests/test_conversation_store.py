@@ -0,0 +1,66 @@
+"""SQLite sohbet deposunda mesaj sırası ve sahip ayrımı testleri"""
+
+import sqlite3
+
+import pytest
+
+from conversation_store import SQLiteConversationStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteConversationStore(str(tmp_path / "chats.db"))
+
+
+def test_appended_messages_keep_order_and_meta(store):
+    store.create_chat("c1", "Fren sesi", owner="ali")
+    store.append_messages("c1", [{"role": "user", "content": "fren ses yapıyor"}])
+    store.append_messages("c1", [
+        {"role": "assistant", "content": "balatalara bakın", "intent": "fren", "score": 0.8},
+        {"role": "user", "content": "teşekkürler"},
+    ])
+    messages = store.get_messages("c1")
+    assert [m["content"] for m in messages] == ["fren ses yapıyor", "balatalara bakın", "teşekkürler"]
+    assert messages[1]["intent"] == "fren" and messages[1]["score"] == 0.8
+    assert store.get_chat("c1")["message_count"] == 3
+
+
+def test_sequence_numbers_are_contiguous_and_unique(store):
+    store.create_chat("c1", "x")
+    for i in range(3):
+        store.append_messages("c1", [{"role": "user", "content": str(i)}] * 2)
+    seqs = [row[0] for row in store._conn.execute("SELECT seq FROM messages WHERE chat_id = 'c1' ORDER BY id")]
+    assert seqs == list(range(6))
+    with pytest.raises(sqlite3.IntegrityError):
+        with store._conn:
+            store._conn.execute("INSERT INTO messages (chat_id, seq, role, content) VALUES ('c1', 0, 'user', 'x')")
+
+
+def test_empty_append_is_noop(store):
+    store.create_chat("c1", "x")
+    store.append_messages("c1", [])
+    assert store.get_chat("c1")["message_count"] == 0
+
+
+def test_chats_are_scoped_to_owner(store):
+    store.create_chat("a", "A sohbeti", owner="ali")
+    store.create_chat("b", "B sohbeti", owner="ayse")
+    store.append_messages("a", [{"role": "user", "content": "gizli"}])
+
+    assert store.get_chat("a", owner="ayse") is None
+    assert store.get_messages("a", owner="ayse") == []
+    assert [c["id"] for c in store.list_chats(owner="ayse")] == ["b"]
+    assert store.count_chats(owner="ali") == 1
+
+    store.delete_chat("a", owner="ayse")
+    store.clear(owner="ayse")
+    assert store.get_messages("a", owner="ali")[0]["content"] == "gizli"
+    assert store.count_chats() == 1
+
+
+def test_list_chats_newest_first_with_paging(store):
+    for i in range(5):
+        store.create_chat(f"c{i}", f"Sohbet {i}", owner="ali")
+    # Aynı saniyede oluşturulan sohbetler ekleme sırasının tersiyle listelenir
+    assert [c["id"] for c in store.list_chats(owner="ali", limit=2)] == ["c4", "c3"]
+    assert [c["id"] for c in store.list_chats(owner="ali", offset=2, limit=2)] == ["c2", "c1"]
@@ -0,0 +1,59 @@
+"""DOCX bölüm yolu (başlık hiyerarşisi) testleri"""
+
+import os
+
+import pytest
+
+from conftest import ROOT
+from document_processor import DocumentProcessor, DOCX_AVAILABLE
+
+FAQ_PATH = os.path.join(ROOT, "documents", "FAQ.docx")
+
+pytestmark = pytest.mark.skipif(not DOCX_AVAILABLE, reason="python-docx kurulu değil")
+
+
+@pytest.fixture(scope="module")
+def faq_sections():
+    """FAQ.docx başlıklarının bölüm yolları (sırasıyla)"""
+    processor = DocumentProcessor(os.path.join(ROOT, "documents"))
+    return [" > ".join(block["headings"]) for block in processor.iter_docx_blocks(FAQ_PATH)
+            if block["type"] == "heading"]
+
+
+def test_numbered_items_nest_under_their_section(faq_sections):
+    assert "Motor Sorunları > 3. Motor Güç Kaybı" in faq_sections
+    assert "Fren Sİstemleri > 1. Fren Pedalının Yumuşak Olması veya Dip Yapması (Pedal Travel)" in faq_sections
+    assert "Şanzıman > 4. Şanzıman Yağı Sızıntısı" in faq_sections
+
+
+def test_untitled_section_before_numbered_list_is_top_level(faq_sections):
+    # "Elektrik ve Akü" iki noktasız; fren etiketlerinin altına girmemeli
+    assert "Elektrik ve Akü" in faq_sections
+    assert "Elektrik ve Akü > 1. Akü Bitmesi (Ölü Akü)" in faq_sections
+    assert not any(section.startswith("Vızıldama/Hafif Sürtme >") for section in faq_sections)
+
+
+def test_label_headings_reset_to_top_level(faq_sections):
+    assert "Vızıldama/Hafif Sürtme" in faq_sections
+    assert "Güvenlik Tavsiyeleri" in faq_sections
+
+
+def test_numbered_sequence_continues_after_labels(faq_sections):
+    # 4. maddedeki etiketlerden sonra 5. madde yine fren bölümünde
+    assert "Fren Sİstemleri > 5. Aracın Fren Yaparken Bir Tarafa Çekmesi" in faq_sections
+
+
+def test_markdown_headings_are_relative_to_section(faq_sections):
+    assert "Fren Sİstemleri > Genel Önemli Tavsiyeler" in faq_sections
+    assert "Klima ve Isıtma > Klimanın Soğutmama Sorunları > 2. Kompresör Arızası" in faq_sections
+    # Aynı sayıda # kardeştir, önceki numaralı maddenin altına girmez
+    assert "Klima ve Isıtma > Klimadan Kötü Koku Gelmesi" in faq_sections
+    assert "Klima ve Isıtma > Isıtma Yapmama Sorunları > 2. Termostat Arızası" in faq_sections
+
+
+def test_chunks_carry_section_path():
+    processor = DocumentProcessor(os.path.join(ROOT, "documents"))
+    chunks = list(processor.iter_docx_chunks(FAQ_PATH))
+    alternator = next(chunk for chunk in chunks if "Alternatörün içindeki diyotların" in chunk["content"])
+    assert alternator["section"] == "Elektrik ve Akü > 2. Alternatör Arızası"
+    assert alternator["content"].startswith("[Elektrik ve Akü > 2. Alternatör Arızası]\n")
@@ -0,0 +1,50 @@
+"""Arıza kodu indeksi ve doğrudan yanıt testleri"""
+
+import os
+
+import pytest
+
+from conftest import ROOT
+from dtc_index import DTCIndex
+
+
+@pytest.fixture(scope="module")
+def index():
+    return DTCIndex(os.path.join(ROOT, "dtc_codes.txt"))
+
+
+def test_simple_question_is_answered_from_table(index):
+    answer = index.answer("P0300 ne demek?")
+    assert answer is not None
+    assert f"**P0300**: {index.table['P0300']}" in answer
+
+
+def test_multiple_codes_are_answered_in_order(index):
+    answer = index.answer("p0420 ve P0300 kodları ne demek")
+    assert answer.index("P0420") < answer.index("P0300")
+
+
+@pytest.mark.parametrize("message", [
+    "P0300 kodu var, rölantide titriyor",   # belirti anlatılıyor: LLM'e bırakılır
+    "P0999 ne demek?",                      # tabloda yok
+    "P0300 ve P0999 ne demek?",             # kodlardan biri tabloda yok
+    "Motor ısınıyor",                       # kod yok
+])
+def test_other_messages_go_to_llm(index, message):
+    assert index.answer(message) is None
+
+
+def test_find_codes_is_case_insensitive_and_unique(index):
+    assert index.find_codes("p0300, P0300 ve u0100") == ["P0300", "U0100"]
+    assert index.find_codes("XP0300 P03000") == []
+
+
+def test_document_chunks_are_attached_to_codes(index):
+    local = DTCIndex(os.path.join(ROOT, "dtc_codes.txt"))
+    chunks = [{"source": f"k{i}.pdf", "content": f"P0171 fakir karışım {i}"} for i in range(3)]
+    local.add_documents(chunks)
+    entry = local.lookup("p0171")
+    assert entry["documents"] == chunks[:DTCIndex.MAX_DOCS_PER_CODE]
+    assert local.get_documents("P0171 ne demek") == chunks[:DTCIndex.MAX_DOCS_PER_CODE]
+    local.clear_documents()
+    assert local.lookup("P0171")["documents"] == []
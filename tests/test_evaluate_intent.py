@@ -0,0 +1,66 @@
+"""Değerlendirme sonuçlarının karşılaştırılması ve --compare çıkış kodu testleri"""
+
+import copy
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+from evaluate_intent import compare_runs
+
+
+BASELINE = {
+    "accuracy": 0.90,
+    "macro_avg": {"f1_score": 0.88},
+    "performance": {"p50_ms": 0.20, "p95_ms": 0.40},
+    "per_class": {"fren": {"f1_score": 0.90}, "motor": {"f1_score": 0.86}},
+}
+
+
+def candidate(**changes):
+    result = copy.deepcopy(BASELINE)
+    for key, value in changes.items():
+        if key == "p50_ms":
+            result["performance"]["p50_ms"] = value
+        elif key == "fren_f1":
+            result["per_class"]["fren"]["f1_score"] = value
+        else:
+            result[key] = value
+    return result
+
+
+def test_identical_runs_pass():
+    ok, lines = compare_runs(BASELINE, candidate())
+    assert ok
+    assert all(not line.startswith("❌") for line in lines)
+
+
+def test_accuracy_drop_fails():
+    assert not compare_runs(BASELINE, candidate(accuracy=0.88))[0]
+    assert compare_runs(BASELINE, candidate(accuracy=0.895))[0]
+
+
+def test_latency_increase_fails_only_above_noise():
+    assert not compare_runs(BASELINE, candidate(p50_ms=0.40))[0]
+    # Mutlak fark ölçüm gürültüsü eşiğinin altındaysa oran büyük olsa da geçer
+    tiny = copy.deepcopy(BASELINE)
+    tiny["performance"]["p50_ms"] = 0.001
+    assert compare_runs(tiny, candidate(p50_ms=0.004))[0]
+
+
+def test_class_f1_drop_is_reported_but_not_gating():
+    ok, lines = compare_runs(BASELINE, candidate(fren_f1=0.70))
+    assert ok
+    assert any("fren" in line and "⚠️" in line for line in lines)
+
+
+@pytest.mark.parametrize("run, code", [(candidate(), 0), (candidate(accuracy=0.80), 1)])
+def test_compare_cli_exit_code(tmp_path, run, code):
+    old, new = tmp_path / "old.json", tmp_path / "new.json"
+    old.write_text(json.dumps(BASELINE), encoding="utf-8")
+    new.write_text(json.dumps(run), encoding="utf-8")
+    result = subprocess.run([sys.executable, "evaluate_intent.py", "--compare", str(old), str(new)],
+                            cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == code, result.stderr
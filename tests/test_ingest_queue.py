@@ -0,0 +1,108 @@
+"""Doküman yükleme kuyruğunda yinelenen içerik ve kuyruk sınırı testleri"""
+
+import io
+import os
+import time
+
+import pytest
+
+from document_processor import SimpleDocumentStore
+from ingest_queue import IngestQueue, STATUS_DONE, STATUS_DUPLICATE, STATUS_REJECTED
+
+
+@pytest.fixture
+def folder(tmp_path):
+    path = tmp_path / "documents"
+    path.mkdir()
+    return str(path)
+
+
+def wait_idle(queue, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while queue.pending_count():
+        assert time.monotonic() < deadline, "kuyruk boşalmadı"
+        time.sleep(0.01)
+
+
+def job_status(queue, job_id):
+    return next(job for job in queue.get_jobs(limit=50) if job["id"] == job_id)
+
+
+def test_same_content_is_not_queued_twice(folder):
+    queue = IngestQueue(None, folder, max_workers=1)
+    # İlk iş bitmeden aynı içerik tekrar yüklenirse de yinelenen sayılır
+    with queue._index_lock:
+        first = queue.submit("a.pdf", b"ayni icerik")
+        second = queue.submit("kopya.pdf", b"ayni icerik")
+    queue.shutdown()
+
+    assert second["status"] == STATUS_DUPLICATE
+    assert second["duplicate_of"] == "a.pdf"
+    assert job_status(queue, first["id"])["status"] == STATUS_DONE
+    assert os.listdir(folder) == ["a.pdf"]
+
+
+def test_file_already_in_folder_is_duplicate(folder):
+    with open(os.path.join(folder, "eski.pdf"), "wb") as f:
+        f.write(b"klasordeki dosya")
+    queue = IngestQueue(None, folder)
+    job = queue.submit("yeni.pdf", b"klasordeki dosya")
+    queue.shutdown()
+    assert job["status"] == STATUS_DUPLICATE
+    assert job["duplicate_of"] == "eski.pdf"
+
+
+def test_full_queue_rejects_until_jobs_finish(folder):
+    queue = IngestQueue(None, folder, max_workers=1, max_pending=2)
+    with queue._index_lock:
+        accepted = [queue.submit(f"{i}.pdf", f"dosya {i}".encode()) for i in range(2)]
+        rejected = queue.submit("2.pdf", b"dosya 2")
+        assert queue.pending_count() == 2
+    queue.shutdown()
+
+    assert rejected["status"] == STATUS_REJECTED
+    assert all(job_status(queue, job["id"])["status"] == STATUS_DONE for job in accepted)
+    assert queue.pending_count() == 0
+    # Reddedilen içerik kayıtlı sayılmaz, yer açılınca tekrar yüklenebilir
+    queue = IngestQueue(None, folder, max_pending=2)
+    assert queue.submit("2.pdf", b"dosya 2")["status"] != STATUS_DUPLICATE
+    queue.shutdown()
+
+
+def docx_bytes(*paragraphs):
+    docx = pytest.importorskip("docx")
+    document = docx.Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def test_upload_is_added_to_store(folder):
+    store = SimpleDocumentStore()
+    queue = IngestQueue(store, folder, max_workers=1)
+    job = queue.submit("fren.docx", docx_bytes("Fren balatası 30.000 km'de kontrol edilmelidir."))
+    queue.shutdown()
+
+    finished = job_status(queue, job["id"])
+    assert finished["status"] == STATUS_DONE
+    assert finished["chunks"] == len(store.documents) > 0
+    assert store.documents[0]["source"] == "fren.docx"
+    assert not any(name.endswith(".uploading") for name in os.listdir(folder))
+
+
+def test_replaced_version_can_be_uploaded_again(folder):
+    queue = IngestQueue(None, folder, max_workers=1)
+    for data in (b"surum 1", b"surum 2"):
+        queue.submit("a.pdf", data)
+        wait_idle(queue)
+
+    # Diskte v2 var: v1 tekrar yüklenebilmeli, v2 ise yinelenen sayılmalı
+    assert queue.submit("b.pdf", b"surum 2")["status"] == STATUS_DUPLICATE
+    again = queue.submit("a.pdf", b"surum 1")
+    queue.shutdown()
+    assert again["status"] != STATUS_DUPLICATE
+    assert job_status(queue, again["id"])["status"] == STATUS_DONE
+    with open(os.path.join(folder, "a.pdf"), "rb") as f:
+        assert f.read() == b"surum 1"
@@ -0,0 +1,60 @@
+"""Intent sınıflandırıcı testleri"""
+
+import os
+
+import pytest
+
+from conftest import ROOT
+from intent_classifier import IntentClassifier, IntentModelHandle, NUMPY_AVAILABLE
+
+DATA_FILE = os.path.join(ROOT, "intents.txt")
+TEXTS = [
+    "Arabamın motoru çalışmıyor", "Fren pedalı sertleşti", "Klima soğutmuyor",
+    "Merhaba nasılsın", "Yemek tarifi ver", "", "!!", "zzqxword",
+    "Akü değişimi nasıl yapılır ve alternatör şarj etmiyor",
+]
+
+
+def make_classifier(engine, features="words"):
+    return IntentClassifier(DATA_FILE, calibration_file=None, verbose=False,
+                            engine=engine, features=features)
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy kurulu değil")
+@pytest.mark.parametrize("engine", IntentClassifier.ENGINES)
+@pytest.mark.parametrize("features", IntentClassifier.FEATURES)
+def test_classify_batch_matches_classify(engine, features):
+    classifier = make_classifier(engine, features)
+    for single, batch in zip((classifier.classify(t) for t in TEXTS), classifier.classify_batch(TEXTS)):
+        assert batch[0] == single[0]
+        assert batch[1] == pytest.approx(single[1], abs=1e-9)
+        assert batch[2].keys() == single[2].keys()
+
+
+@pytest.mark.parametrize("engine", ["nb", "logreg"])
+def test_unweighted_new_word_is_ignored(engine):
+    # Kelime dağarcığı ağırlık matrisinden önce büyürse yeni kelime atlanmalı
+    classifier = make_classifier(engine)
+    classifier._build_vocabulary([("fren", "zzqxword balata")])
+    intent, _, scores = classifier.classify("zzqxword")
+    assert scores and intent
+
+
+def test_copy_is_independent():
+    classifier = make_classifier("nb")
+    clone = classifier.copy()
+    clone.add_examples([("fren", "qqzz balatası gıcırdıyor")])
+    assert len(clone.training_data) == len(classifier.training_data) + 1
+    assert "qqzz" in clone.vocabulary and "qqzz" not in classifier.vocabulary
+    assert clone.fingerprint() != classifier.fingerprint()
+
+
+def test_handle_swaps_model_on_feedback(tmp_path):
+    handle = IntentModelHandle(DATA_FILE, calibration_file=str(tmp_path / "none.json"),
+                               feedback_file=str(tmp_path / "feedback.txt"), watch=False, engine="logreg")
+    before = handle.model
+    assert handle.add_examples([("fren", "qqzz balatası gıcırdıyor")]) == 1
+    assert handle.model is not before
+    assert handle.version == 2
+    assert len(before.training_data) + 1 == len(handle.model.training_data)
+    assert handle.classify("qqzz balatası")[0] == "fren"
@@ -0,0 +1,52 @@
+"""Mesajların şablon / hızlı / büyük model yollarına yönlendirilme testleri"""
+
+import pytest
+
+from model_router import ModelRouter, ROUTE_TEMPLATE, ROUTE_FAST, ROUTE_FULL
+
+
+@pytest.fixture
+def router():
+    return ModelRouter()
+
+
+@pytest.mark.parametrize("message", ["Merhaba", "çok teşekkürler", "sen kimsin?", "hi"])
+def test_greetings_use_template(router, message):
+    assert router.choose_route(message, "selamlama", 0.9) == ROUTE_TEMPLATE
+
+
+def test_greeting_with_code_is_not_templated(router):
+    assert router.choose_route("merhaba P0300", "selamlama", 0.9, has_dtc=True) == ROUTE_FULL
+
+
+def test_greeting_ignores_attached_passages(router):
+    # Dense arama selamlaşmalara da en yakın pasajları ekler
+    assert router.choose_route("merhaba", "selamlama", 0.9, context_chunks=3) == ROUTE_TEMPLATE
+
+
+def test_short_keyword_matches_whole_word_only(router):
+    # "hi" kısa olduğu için "hidrolik" içinde eşleşmez
+    assert router.match_template("hidrolik yağı") is None
+    assert router.match_template("selamlar") == "hello"
+
+
+def test_short_confident_car_question_uses_fast_model(router):
+    assert router.choose_route("fren balatası ne zaman değişir", "fren", 0.6, context_chunks=2) == ROUTE_FAST
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"intent_score": ModelRouter.FAST_MIN_SCORE - 0.01},
+    {"has_dtc": True},
+    {"context_chunks": ModelRouter.FAST_MAX_CONTEXT_CHUNKS + 1},
+    {"intent": "kapsam_disi"},
+    {"message": " ".join(["fren"] * (ModelRouter.FAST_MAX_WORDS + 1))},
+])
+def test_hard_or_uncertain_questions_use_full_model(router, kwargs):
+    args = {"message": "fren balatası ne zaman değişir", "intent": "fren", "intent_score": 0.6}
+    args.update(kwargs)
+    assert router.choose_route(**args) == ROUTE_FULL
+
+
+def test_fast_model_matches_provider(router):
+    assert router.get_fast_model("gpt-4o") == "gpt-4o-mini"
+    assert router.get_fast_model("gemini-2.5-flash") == "gemini-2.5-flash-lite"
@@ -0,0 +1,73 @@
+"""Pasaj birleştirme ve token bütçesi testleri"""
+
+import pytest
+
+from model_router import CHARS_PER_TOKEN
+from passage_extractor import merge_chunks, extract_passages, query_stems, best_window
+
+
+def chunk(source, number, content):
+    chunk_id = number if isinstance(number, str) else f"{source}_{number}"
+    return {"source": source, "chunk_id": chunk_id, "content": content}
+
+
+def test_adjacent_chunks_merge_without_repeating_overlap():
+    overlap = "disk yüzeyi çizikse tornalanmalı veya değiştirilmelidir. "
+    first = chunk("a.pdf", 1, "fren balatası aşınınca ses yapar. " + overlap)
+    second = chunk("a.pdf", 2, overlap + "hidrolik seviyesi de kontrol edilmeli")
+    passages = merge_chunks([second, first])
+    assert len(passages) == 1
+    assert passages[0]["chunk_id"] == "a.pdf_1-2"
+    assert passages[0]["content"].count(overlap) == 1
+    assert passages[0]["content"].endswith("hidrolik seviyesi de kontrol edilmeli")
+
+
+def test_gap_is_filled_by_later_chunk():
+    passages = merge_chunks([chunk("a.pdf", 1, "bir"), chunk("a.pdf", 3, "üç"), chunk("a.pdf", 2, "iki")])
+    assert [p["chunk_id"] for p in passages] == ["a.pdf_1-3"]
+
+
+def test_unnumbered_chunk_id_does_not_break_merge():
+    # chunk_id "<kaynak>_<n>" biçiminde değilse chunk kendi başına kalır
+    passages = merge_chunks([chunk("x", "weird", "garip"), chunk("x", 3, "üç"), chunk("x", 4, "dört")])
+    assert [p["chunk_id"] for p in passages] == ["weird", "x_3-4"]
+
+
+def test_merge_keeps_best_rank_order():
+    passages = merge_chunks([chunk("b.pdf", 5, "b"), chunk("a.pdf", 1, "a")])
+    assert [p["source"] for p in passages] == ["b.pdf", "a.pdf"]
+
+
+def test_query_stems_skip_stopwords():
+    assert query_stems("Arabamın fren balatası neden ses yapıyor") == {"fren", "balat", "ses", "yapıy"}
+
+
+def test_best_window_prefers_dense_matches():
+    text = "x " * 300 + "fren balata fren disk " + "y " * 300
+    start, end = best_window(text, query_stems("fren balata disk"), 100)
+    assert end - start <= 100
+    assert "fren balata fren disk" in text[start:end]
+
+
+@pytest.mark.parametrize("max_tokens", [20, 60, 150, 500])
+def test_total_length_stays_within_budget(max_tokens):
+    long_text = " ".join(f"cümle {i} fren balatası ve disk hakkında bilgi." for i in range(200))
+    chunks = [chunk("a.pdf", 1, long_text), chunk("b.pdf", 7, long_text), chunk("c.pdf", 2, "kısa fren notu")]
+    passages = extract_passages("fren balatası", chunks, max_tokens=max_tokens)
+    assert sum(len(p["content"]) for p in passages) <= max_tokens * CHARS_PER_TOKEN
+
+
+def test_long_section_header_does_not_exceed_budget():
+    header = "[" + "Çok Uzun Bölüm Başlığı > " * 8 + "Son]\n"
+    chunks = [chunk("faq.docx", i, header + "fren balatası bilgisi. " * 40) for i in (1, 5, 9)]
+    passages = extract_passages("fren", chunks, max_tokens=60)
+    assert sum(len(p["content"]) for p in passages) <= 60 * CHARS_PER_TOKEN
+    for passage in passages:
+        assert passage["content"].startswith(header)
+
+
+def test_cut_passage_records_window_in_chunk_id():
+    text = "giriş " * 200 + "fren balatası değişimi" + " son" * 200
+    passages = extract_passages("fren balatası", [chunk("a.pdf", 3, text)], max_tokens=50)
+    assert passages[0]["chunk_id"].startswith("a.pdf_3@")
+    assert "fren balatası değişimi" in passages[0]["content"]